@@ -21,6 +21,8 @@ export default [
         Promise: "readonly",
         Set: "readonly",
         Map: "readonly",
+        WeakRef: "readonly",
+        FinalizationRegistry: "readonly",
         Date: "readonly",
         Math: "readonly",
         JSON: "readonly",
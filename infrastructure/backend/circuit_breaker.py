@@ -7,7 +7,7 @@ import threading
 import time
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 
 from logger_config import setup_logger
 from constants import (
@@ -78,27 +78,28 @@ class APIEndpoint:
     total_latency_ms: float = CB_DEFAULT_LATENCY
     rate_limit_hits: int = 0
     state: CircuitState = CircuitState.CLOSED
+    clock: Callable[[], float] = field(default=time.time, repr=False, compare=False)
 
     def record_success(self, latency_ms: float = CB_DEFAULT_LATENCY):
         """Record a successful API call"""
         self.successes += 1
         self.total_calls += 1
         self.total_latency_ms += latency_ms
-        self.last_success_time = time.time()
+        self.last_success_time = self.clock()
 
     def record_failure(self, error_type: str = CB_ERROR_TYPE_UNKNOWN):
         """Record a failed API call"""
         self.failures += 1
         self.total_calls += 1
         self.total_errors += 1
-        self.last_failure_time = time.time()
+        self.last_failure_time = self.clock()
 
     def record_rate_limit(self):
         """Record a rate limit hit"""
         self.rate_limit_hits += 1
         self.failures += 1
         self.total_calls += 1
-        self.last_failure_time = time.time()
+        self.last_failure_time = self.clock()
 
     def get_success_rate(self) -> float:
         """Calculate success rate (0.0 to 1.0)"""
@@ -122,7 +123,7 @@ class APIEndpoint:
         if self.last_failure_time == CB_DEFAULT_LATENCY:
             return 0
 
-        time_since_failure = time.time() - self.last_failure_time
+        time_since_failure = self.clock() - self.last_failure_time
         if time_since_failure > CB_MONITORING_WINDOW_SECONDS:
             return 0
 
@@ -147,14 +148,23 @@ class CircuitBreakerManager:
             logger.warning("Circuit is OPEN for yahoo_finance")
     """
 
-    def __init__(self, config: Optional[CircuitBreakerConfig] = None):
+    def __init__(
+        self,
+        config: Optional[CircuitBreakerConfig] = None,
+        clock: Callable[[], float] = time.time,
+    ):
         self.config = config or CircuitBreakerConfig()
+        self._clock = clock
         self._endpoints: Dict[str, APIEndpoint] = {}
         self._lock = threading.RLock()
 
         # Initialize default API sources
         self._init_default_sources()
 
+    def _new_endpoint(self, name: str, **kwargs) -> APIEndpoint:
+        """Create an endpoint that shares this manager's clock"""
+        return APIEndpoint(name=name, clock=self._clock, **kwargs)
+
     def _init_default_sources(self):
         """Initialize circuit breakers for known API sources"""
         default_sources = ["yahoo_finance", "alpha_vantage", "polygon", "alpaca"]
@@ -162,7 +172,7 @@ class CircuitBreakerManager:
         with self._lock:
             for source in default_sources:
                 if source not in self._endpoints:
-                    self._endpoints[source] = APIEndpoint(name=source)
+                    self._endpoints[source] = self._new_endpoint(source)
 
     def register_endpoint(
         self, name: str, config: Optional[CircuitBreakerConfig] = None
@@ -171,7 +181,7 @@ class CircuitBreakerManager:
         with self._lock:
             if name not in self._endpoints:
                 endpoint_config = config or self.config
-                self._endpoints[name] = APIEndpoint(name=name)
+                self._endpoints[name] = self._new_endpoint(name)
 
     def can_call(self, endpoint_name: str) -> bool:
         """
@@ -186,7 +196,7 @@ class CircuitBreakerManager:
         with self._lock:
             if endpoint_name not in self._endpoints:
                 # Unknown endpoint - allow by default
-                self._endpoints[endpoint_name] = APIEndpoint(name=endpoint_name)
+                self._endpoints[endpoint_name] = self._new_endpoint(endpoint_name)
                 return True
 
             endpoint = self._endpoints[endpoint_name]
@@ -195,7 +205,7 @@ class CircuitBreakerManager:
             if endpoint.state == CircuitState.OPEN:
                 # Check if timeout has passed - transition to HALF_OPEN
                 if (
-                    time.time() - endpoint.last_failure_time
+                    self._clock() - endpoint.last_failure_time
                     > self.config.timeout_seconds
                 ):
                     endpoint.state = CircuitState.HALF_OPEN
@@ -243,7 +253,7 @@ class CircuitBreakerManager:
         """Record a failed API call"""
         with self._lock:
             if endpoint_name not in self._endpoints:
-                self._endpoints[endpoint_name] = APIEndpoint(name=endpoint_name)
+                self._endpoints[endpoint_name] = self._new_endpoint(endpoint_name)
 
             endpoint = self._endpoints[endpoint_name]
             endpoint.record_failure(error_type)
@@ -264,7 +274,7 @@ class CircuitBreakerManager:
         """Record a rate limit hit for an endpoint"""
         with self._lock:
             if endpoint_name not in self._endpoints:
-                self._endpoints[endpoint_name] = APIEndpoint(name=endpoint_name)
+                self._endpoints[endpoint_name] = self._new_endpoint(endpoint_name)
 
             endpoint = self._endpoints[endpoint_name]
             endpoint.record_rate_limit()
@@ -280,7 +290,7 @@ class CircuitBreakerManager:
             if endpoint_name in self._endpoints:
                 self._endpoints[endpoint_name].state = CircuitState.OPEN
             else:
-                endpoint = APIEndpoint(name=endpoint_name, state=CircuitState.OPEN)
+                endpoint = self._new_endpoint(endpoint_name, state=CircuitState.OPEN)
                 self._endpoints[endpoint_name] = endpoint
             logger.info(f"CircuitBreaker: {endpoint_name} forcibly OPENED")
 
@@ -297,11 +307,11 @@ class CircuitBreakerManager:
         with self._lock:
             if endpoint_name:
                 if endpoint_name in self._endpoints:
-                    self._endpoints[endpoint_name] = APIEndpoint(name=endpoint_name)
+                    self._endpoints[endpoint_name] = self._new_endpoint(endpoint_name)
             else:
                 # Reset all
                 for name in list(self._endpoints.keys()):
-                    self._endpoints[name] = APIEndpoint(name=name)
+                    self._endpoints[name] = self._new_endpoint(name)
             logger.info(
                 f"CircuitBreaker: Reset {'all' if endpoint_name is None else endpoint_name}"
             )
@@ -436,13 +446,11 @@ def circuit_breaker_decorator(endpoint_name: str, timeout_seconds: float = 30.0)
             if not cb.can_call(endpoint_name):
                 raise CircuitOpenError(f"Circuit is OPEN for {endpoint_name}")
 
-            import time
-
-            start_time = time.time()
+            start_time = cb._clock()
 
             try:
                 result = func(*args, **kwargs)
-                latency_ms = (time.time() - start_time) * 1000
+                latency_ms = (cb._clock() - start_time) * 1000
                 cb.record_success(endpoint_name, latency_ms)
                 return result
             except Exception as err:
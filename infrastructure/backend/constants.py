@@ -14,6 +14,7 @@ HTTP_SERVER_ERROR = 500
 # API Response Keys
 KEY_SYMBOL = "symbol"
 KEY_NAME = "name"
+KEY_NAME_LOWER = "nameLower"  # Lowercased name stored for case-insensitive search
 KEY_ERROR = "error"
 KEY_MESSAGE = "message"
 KEY_STATUS_CODE = "statusCode"
@@ -24,6 +25,7 @@ KEY_COUNT = "Count"
 KEY_REGION = "region"
 KEY_CURRENCY = "currency"
 KEY_SECTOR = "sector"
+KEY_SECTOR_COUNT = "count"
 KEY_INDEX_ID = "indexId"
 KEY_INDEX_IDS = "indexIds"
 KEY_MARKET_CAP = "marketCap"
@@ -36,6 +38,19 @@ GSI_INDEX_ID = "index-id-index"
 GSI_REGION = "region-index"
 GSI_CURRENCY = "currency-index"
 GSI_SECTOR = "sector-index"
+# Error codes DynamoDB returns when a query names a GSI the table lacks
+GSI_MISSING_ERROR_CODES = ("ResourceNotFoundException", "ValidationException")
+
+# DynamoDB Read Settings
+SCAN_TOTAL_SEGMENTS = 4  # Parallel scan segments (one worker thread each)
+BATCH_GET_MAX_KEYS = 100  # BatchGetItem accepts at most 100 keys per request
+KEY_RESPONSES = "Responses"
+KEY_UNPROCESSED_KEYS = "UnprocessedKeys"
+KEY_KEYS = "Keys"
+
+# Stock Universe Cache
+STOCK_UNIVERSE_CACHE_TIMEOUT = 300  # 5 minutes
+STOCK_UNIVERSE_CACHE_MAX_ENTRIES = 128  # Least recently used results evicted first
 
 # CORS Headers
 CORS_ALLOW_ORIGIN = "*"
@@ -104,6 +119,7 @@ PARAM_SECTOR = "sector"
 PARAM_MIN_CAP = "minCap"
 PARAM_MAX_CAP = "maxCap"
 PARAM_MARKET_CAP_BUCKET = "marketCapBucket"
+PARAM_EXACT = "exact"
 
 # Error Messages
 ERROR_METHOD_NOT_ALLOWED = "Method not allowed"
@@ -430,10 +446,6 @@ QUERY_PARAM_SYMBOL = "symbol"
 QUERY_PARAM_SYMBOLS = "symbols"
 QUERY_PARAM_PERIOD = "period"
 
-# Response Format
-RESPONSE_FORMAT_SUCCESS_RATE = "{:.1f}%"
-RESPONSE_FORMAT_NA = "N/A"
-
 # Delimiters
 DELIMITER_COMMA = ","
 DELIMITER_COLON = ":"
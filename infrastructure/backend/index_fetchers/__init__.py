@@ -6,13 +6,17 @@ from various indices (S&P 500, Russell 3000, JSE, etc.).
 """
 
 from .base import IndexFetcher
+from .models import Stock
 from .sp500_fetcher import SP500Fetcher
 from .russell_fetcher import Russell3000Fetcher
 from .jse_fetcher import JSEFetcher
+from .dispatcher import fetch_all_constituents
 
 __all__ = [
     "IndexFetcher",
+    "Stock",
     "SP500Fetcher",
     "Russell3000Fetcher",
     "JSEFetcher",
+    "fetch_all_constituents",
 ]
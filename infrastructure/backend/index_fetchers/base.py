@@ -7,11 +7,27 @@ Implement specific logic for each data source (Wikipedia, ETF holdings, official
 
 from abc import ABC, abstractmethod
 import logging
+import time
+import requests
+from requests.adapters import HTTPAdapter
 import yfinance as yf
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeout in seconds for fetcher HTTP requests
+HTTP_TIMEOUT = (3, 10)
+HTTP_MAX_ATTEMPTS = 3  # Backoff of 1s, 2s between attempts
+
+
+def _build_session() -> requests.Session:
+    """Create the keep-alive HTTP session shared by all fetchers"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class IndexFetcher(ABC):
     """
@@ -23,6 +39,9 @@ class IndexFetcher(ABC):
     - apply_fx_conversion(): Convert market cap to USD if needed
     """
 
+    # Shared across fetchers so repeated requests reuse pooled connections
+    _SESSION = _build_session()
+
     def __init__(self, config: dict):
         """
         Initialize fetcher with index configuration
@@ -40,6 +59,32 @@ class IndexFetcher(ABC):
         self.data_source = config["dataSource"]
         self.url = config["url"]
 
+    def http_get(self, url: str, headers: dict = None) -> requests.Response:
+        """
+        GET a URL over the shared session, retrying transient failures
+
+        Timeouts and connection errors are retried with exponential backoff
+        up to HTTP_MAX_ATTEMPTS times; HTTP error statuses are raised at once.
+
+        Args:
+            url: URL to fetch
+            headers: Optional request headers
+
+        Returns:
+            Successful response
+        """
+        for attempt in range(HTTP_MAX_ATTEMPTS):
+            try:
+                response = self._SESSION.get(url, headers=headers, timeout=HTTP_TIMEOUT)
+                response.raise_for_status()
+                return response
+            except (requests.Timeout, requests.ConnectionError) as err:
+                if attempt == HTTP_MAX_ATTEMPTS - 1:
+                    raise
+                delay = 2**attempt
+                logger.warning(f"Retrying {url} in {delay}s after error: {err}")
+                time.sleep(delay)
+
     @abstractmethod
     def fetch_constituents(self) -> list:
         """
@@ -80,6 +125,27 @@ class IndexFetcher(ABC):
 
         return symbol
 
+    def normalize_symbols(self, symbols):
+        """
+        Vectorized normalize_symbol for a pandas Series of raw symbols
+
+        Args:
+            symbols: Series of raw stock symbols
+
+        Returns:
+            Series of normalized symbols
+        """
+        if self.region == "US" and self.exchange_suffix == "":
+            return symbols.str.replace(".", "-", regex=False)
+
+        if self.exchange_suffix:
+            return symbols.where(
+                symbols.str.endswith(self.exchange_suffix),
+                symbols + self.exchange_suffix,
+            )
+
+        return symbols
+
     def apply_fx_conversion(
         self, amount: float, fx_rate: Optional[float] = None
     ) -> float:
@@ -87,7 +153,7 @@ class IndexFetcher(ABC):
         Convert amount to USD if needed
 
         Args:
-            amount: Amount in local currency
+            amount: Amount in local currency (scalar, NumPy array or Series)
             fx_rate: Exchange rate (local currency per 1 USD)
                     If None, will fetch live rate from yfinance
 
@@ -0,0 +1,29 @@
+"""
+Index Fetcher Dispatcher
+
+Runs several index fetchers concurrently. Fetching constituents is
+dominated by network waits, so a thread pool overlaps them.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_FETCH_WORKERS = 16
+
+
+def fetch_all_constituents(fetchers: list) -> dict:
+    """
+    Fetch constituents for every fetcher in parallel
+
+    Args:
+        fetchers: IndexFetcher instances
+
+    Returns:
+        Dict mapping index id -> list of stock dicts
+    """
+    if not fetchers:
+        return {}
+
+    workers = min(MAX_FETCH_WORKERS, len(fetchers))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda fetcher: fetcher.fetch_constituents(), fetchers)
+        return dict(zip([fetcher.id for fetcher in fetchers], results))
@@ -6,12 +6,100 @@ and ZAR to USD FX rate conversion.
 """
 
 import logging
+import re
+import time
+from io import StringIO
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from lxml import html as lxml_html
 from .base import IndexFetcher
+from .models import Stock
 
 logger = logging.getLogger(__name__)
 
+# Parsed Wikipedia constituents by URL: {url: (fetched_at, tuple of Stock)}
+_WIKI_CACHE = {}
+_WIKI_CACHE_TTL = 3600  # 1 hour
+
+# Live FX rates by symbol: {fx_symbol: (fetched_at, rate)}
+_FX_RATE_CACHE = {}
+_FX_RATE_CACHE_TTL = 300  # 5 minutes
+
+# Constituents table column headers, matched case-insensitively
+_SYMBOL_COL_RE = re.compile(r"^(Symbol|Ticker|Code)$", re.IGNORECASE)
+_NAME_COL_RE = re.compile(r"^(Company|Name)$", re.IGNORECASE)
+_SECTOR_COL_RE = re.compile(r"^Sector$", re.IGNORECASE)
+
+# The constituents wikitable is the one with a symbol column header
+_HEADER_TEXT = (
+    "translate(normalize-space(.), "
+    "'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+)
+_CONSTITUENTS_TABLE_XPATH = (
+    "//table[contains(@class, 'wikitable')]"
+    f"[.//th[{_HEADER_TEXT} = 'symbol' or {_HEADER_TEXT} = 'ticker'"
+    f" or {_HEADER_TEXT} = 'code']]"
+)
+
+# Popular JSE stocks from various sectors: (symbol, name, sector)
+_FALLBACK_STOCKS = (
+    # Financials
+    ("ABG", "Absa Group Ltd", "Financials"),
+    ("FSR", "FirstRand Ltd", "Financials"),
+    ("NED", "Nedbank Ltd", "Financials"),
+    ("SBK", "Standard Bank Group Ltd", "Financials"),
+    ("CPI", "Capitec Bank Holdings Ltd", "Financials"),
+    ("SPP", "Sanlam Ltd", "Financials"),
+    ("MTN", "MTN Group Ltd", "Communication Services"),
+    ("VOD", "Vodacom Group Ltd", "Communication Services"),
+    # Mining & Resources
+    ("AGL", "Anglo American plc", "Materials"),
+    ("ANG", "AngloGold Ashanti Ltd", "Materials"),
+    ("GLN", "Gold Fields Ltd", "Materials"),
+    ("HAR", "Harmony Gold Mining Co Ltd", "Materials"),
+    ("SOL", "Sibanye Stillwater Ltd", "Materials"),
+    ("IMP", "Impala Platinum Holdings Ltd", "Materials"),
+    ("AMS", "African Rainbow Minerals Ltd", "Materials"),
+    ("KIO", "Kumba Iron Ore Ltd", "Materials"),
+    ("EXX", "Exxaro Resources Ltd", "Materials"),
+    # Industrial & Retail
+    ("BID", "Bid Corporation Ltd", "Consumer Discretionary"),
+    ("NPN", "Naspers Ltd", "Communication Services"),
+    ("PRX", "Prosus N.V.", "Consumer Discretionary"),
+    ("TKG", "The Foschini Group Ltd", "Consumer Discretionary"),
+    ("WHL", "Woolworths Holdings Ltd", "Consumer Staples"),
+    ("SHP", "Shoprite Holdings Ltd", "Consumer Staples"),
+    ("TFG", "The Foschini Group Ltd", "Consumer Discretionary"),
+    ("RCL", "RCL Foods Ltd", "Consumer Staples"),
+    ("TRU", "Tiger Brands Ltd", "Consumer Staples"),
+    # Technology & Healthcare
+    ("DTC", "Netcare Ltd", "Health Care"),
+    ("DDT", "Discovery Ltd", "Health Care"),
+    ("APN", "Aspen Pharmacare Holdings Ltd", "Health Care"),
+    ("MCG", "Mediclinic International Ltd", "Health Care"),
+    # Energy
+    ("SHP", "Sasol Ltd", "Energy"),
+    ("OMN", "Omura Holdings Ltd", "Energy"),
+    # Industrial
+    ("TCS", "Truworths International Ltd", "Consumer Discretionary"),
+    ("CFR", "Crossroads Distribution Ltd", "Industrials"),
+    ("DSY", "Dis-Chem Pharmacies Ltd", "Consumer Staples"),
+    ("GRW", "Growthpoint Properties Ltd", "Real Estate"),
+    ("AEC", "AECI Ltd", "Materials"),
+)
+
+
+def _find_column(columns, pattern):
+    """Return the first column whose header matches pattern, or None"""
+    return next((col for col in columns if pattern.match(str(col))), None)
+
+
+def clear_caches():
+    """Drop cached Wikipedia constituents and FX rates"""
+    _WIKI_CACHE.clear()
+    _FX_RATE_CACHE.clear()
+
 
 class JSEFetcher(IndexFetcher):
     """Fetch JSE (Johannesburg Stock Exchange) constituents with ZAR FX conversion"""
@@ -20,9 +108,18 @@ class JSEFetcher(IndexFetcher):
         """
         Fetch JSE All Share or Top 40 constituents
 
+        Indices configured with dataSource "fallback" return the static list
+        directly. Successful Wikipedia parses are cached per URL (see
+        _fetch_from_wikipedia); the fallback list is never cached, so the
+        next call retries Wikipedia.
+
         Returns:
             List of stock dicts with .JO suffix, ZAR currency, etc.
         """
+        # Fallback-configured indices never hit Wikipedia
+        if self.data_source == "fallback":
+            return self._get_fallback()
+
         # Try Wikipedia first
         stocks = self._fetch_from_wikipedia()
 
@@ -37,48 +134,75 @@ class JSEFetcher(IndexFetcher):
         """
         Parse JSE Top 40 Wikipedia page
 
+        Successful parses are cached per URL for _WIKI_CACHE_TTL seconds.
+
         Returns:
             List of stock dicts or empty list if failed
         """
         url = self.url
+
+        cached = _WIKI_CACHE.get(url)
+        if cached and time.monotonic() - cached[0] < _WIKI_CACHE_TTL:
+            logger.info(f"Using cached Wikipedia constituents for {self.name}")
+            return [stock.to_dict() for stock in cached[1]]
+
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
 
         try:
-            tables = pd.read_html(url, storage_options=headers)
-
-            # The JSE Top 40 page has the constituents table
-            jse_table = tables[0]
-
-            stocks = []
-            for _, row in jse_table.iterrows():
-                # Table structure varies; try common column names
-                if "Symbol" in row:
-                    symbol = str(row["Symbol"])
-                elif "Ticker" in row:
-                    symbol = str(row["Ticker"])
-                else:
-                    continue
-
-                if "Company" in row:
-                    name = str(row["Company"])
-                elif "Name" in row:
-                    name = str(row["Name"])
-                else:
-                    continue
-
-                # Get sector if available
-                sector = str(row.get("Sector", "Unknown"))
-                if sector == "nan":
-                    sector = "Unknown"
-
-                stock = self.format_stock(symbol=symbol, name=name, sector=sector)
-
-                stocks.append(stock)
+            response = self.http_get(url, headers=headers)
+
+            # Locate the constituents table with XPath so pandas only parses
+            # that one table, and never falls back to BeautifulSoup
+            doc = lxml_html.fromstring(response.content)
+            matches = doc.xpath(_CONSTITUENTS_TABLE_XPATH)
+            if not matches:
+                logger.warning("JSE Wikipedia page has no constituents table")
+                return []
+
+            table_html = lxml_html.tostring(matches[0], encoding="unicode")
+            jse_table = pd.read_html(StringIO(table_html), flavor="lxml")[0]
+
+            # Table structure varies; try common column names
+            symbol_col = _find_column(jse_table.columns, _SYMBOL_COL_RE)
+            name_col = _find_column(jse_table.columns, _NAME_COL_RE)
+            sector_col = _find_column(jse_table.columns, _SECTOR_COL_RE)
+            if symbol_col is None or name_col is None:
+                logger.warning("JSE Wikipedia table has no symbol or name column")
+                return []
+
+            # Build every stock column at once instead of row by row
+            if sector_col is not None:
+                sectors = (
+                    jse_table[sector_col]
+                    .fillna("Unknown")
+                    .astype(str)
+                    .replace("nan", "Unknown")
+                )
+            else:
+                sectors = "Unknown"
+
+            frame = pd.DataFrame(
+                {
+                    "symbol": self.normalize_symbols(jse_table[symbol_col].astype(str)),
+                    "name": jse_table[name_col].astype(str),
+                    "sector": sectors,
+                    "subSector": "",
+                    "region": self.region,
+                    "currency": self.currency,
+                    "exchange": self.exchange,
+                }
+            )
+            # Columns are in Stock field order; frozen rows are safe to cache
+            stocks = tuple(
+                Stock(*row) for row in frame.itertuples(index=False, name=None)
+            )
 
             logger.info(f"Fetched {len(stocks)} stocks from Wikipedia")
-            return stocks
+            if stocks:
+                _WIKI_CACHE[url] = (time.monotonic(), stocks)
+            return [stock.to_dict() for stock in stocks]
 
         except Exception as err:
             logger.warning(f"Error fetching JSE stocks from Wikipedia: {err}")
@@ -93,58 +217,11 @@ class JSEFetcher(IndexFetcher):
         """
         logger.info("Using fallback JSE stock list...")
 
-        # Popular JSE stocks from various sectors
-        fallback_stocks = [
-            # Financials
-            ("ABG", "Absa Group Ltd", "Financials"),
-            ("FSR", "FirstRand Ltd", "Financials"),
-            ("NED", "Nedbank Ltd", "Financials"),
-            ("SBK", "Standard Bank Group Ltd", "Financials"),
-            ("CPI", "Capitec Bank Holdings Ltd", "Financials"),
-            ("SPP", "Sanlam Ltd", "Financials"),
-            ("MTN", "MTN Group Ltd", "Communication Services"),
-            ("VOD", "Vodacom Group Ltd", "Communication Services"),
-            # Mining & Resources
-            ("AGL", "Anglo American plc", "Materials"),
-            ("ANG", "AngloGold Ashanti Ltd", "Materials"),
-            ("GLN", "Gold Fields Ltd", "Materials"),
-            ("HAR", "Harmony Gold Mining Co Ltd", "Materials"),
-            ("SOL", "Sibanye Stillwater Ltd", "Materials"),
-            ("IMP", "Impala Platinum Holdings Ltd", "Materials"),
-            ("AMS", "African Rainbow Minerals Ltd", "Materials"),
-            ("KIO", "Kumba Iron Ore Ltd", "Materials"),
-            ("EXX", "Exxaro Resources Ltd", "Materials"),
-            # Industrial & Retail
-            ("BID", "Bid Corporation Ltd", "Consumer Discretionary"),
-            ("NPN", "Naspers Ltd", "Communication Services"),
-            ("PRX", "Prosus N.V.", "Consumer Discretionary"),
-            ("TKG", "The Foschini Group Ltd", "Consumer Discretionary"),
-            ("WHL", "Woolworths Holdings Ltd", "Consumer Staples"),
-            ("SHP", "Shoprite Holdings Ltd", "Consumer Staples"),
-            ("TFG", "The Foschini Group Ltd", "Consumer Discretionary"),
-            ("RCL", "RCL Foods Ltd", "Consumer Staples"),
-            ("TRU", "Tiger Brands Ltd", "Consumer Staples"),
-            # Technology & Healthcare
-            ("DTC", "Netcare Ltd", "Health Care"),
-            ("DDT", "Discovery Ltd", "Health Care"),
-            ("APN", "Aspen Pharmacare Holdings Ltd", "Health Care"),
-            ("MCG", "Mediclinic International Ltd", "Health Care"),
-            # Energy
-            ("SHP", "Sasol Ltd", "Energy"),
-            ("OMN", "Omura Holdings Ltd", "Energy"),
-            # Industrial
-            ("TCS", "Truworths International Ltd", "Consumer Discretionary"),
-            ("CFR", "Crossroads Distribution Ltd", "Industrials"),
-            ("DSY", "Dis-Chem Pharmacies Ltd", "Consumer Staples"),
-            ("GRW", "Growthpoint Properties Ltd", "Real Estate"),
-            ("AEC", "AECI Ltd", "Materials"),
+        stocks = [
+            self.format_stock(symbol, name, sector)
+            for symbol, name, sector in _FALLBACK_STOCKS
         ]
 
-        stocks = []
-        for symbol, name, sector in fallback_stocks:
-            stock = self.format_stock(symbol, name, sector)
-            stocks.append(stock)
-
         logger.info(f"Fallback list contains {len(stocks)} stocks")
         return stocks
 
@@ -152,11 +229,18 @@ class JSEFetcher(IndexFetcher):
         """
         Get current ZAR/USD exchange rate from yfinance
 
+        Live rates are cached per symbol for _FX_RATE_CACHE_TTL seconds; the
+        fallback rate is not cached so the next call retries.
+
         Returns:
             Exchange rate (ZAR per 1 USD) - e.g., 18.5 means 18.5 ZAR = 1 USD
         """
         fx_symbol = self.config.get("fxRate", {}).get("symbol", "ZAR=X")
 
+        cached = _FX_RATE_CACHE.get(fx_symbol)
+        if cached and time.monotonic() - cached[0] < _FX_RATE_CACHE_TTL:
+            return cached[1]
+
         try:
             ticker = yf.Ticker(fx_symbol)
             info = ticker.info
@@ -166,6 +250,7 @@ class JSEFetcher(IndexFetcher):
 
             if rate and rate > 0:
                 logger.info(f"FX Rate: {rate:.2f} ZAR = 1 USD")
+                _FX_RATE_CACHE[fx_symbol] = (time.monotonic(), float(rate))
                 return float(rate)
 
         except Exception as err:
@@ -179,6 +264,9 @@ class JSEFetcher(IndexFetcher):
         """
         Convert ZAR amount to USD
 
+        Accepts a scalar or a NumPy array / pandas Series of amounts; arrays
+        are converted with a single vectorized divide.
+
         Args:
             amount: Amount in ZAR
             fx_rate: Exchange rate (ZAR per 1 USD)
@@ -186,7 +274,7 @@ class JSEFetcher(IndexFetcher):
         Returns:
             Amount converted to USD
         """
-        if amount == 0:
+        if np.ndim(amount) == 0 and amount == 0:
             return 0.0
 
         return super().apply_fx_conversion(amount, fx_rate)
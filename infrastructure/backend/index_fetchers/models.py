@@ -0,0 +1,29 @@
+"""
+Index Fetcher Models
+
+Compact row types shared by index fetchers.
+"""
+
+from dataclasses import asdict, dataclass
+
+
+@dataclass(slots=True, frozen=True)
+class Stock:
+    """
+    One index constituent
+
+    Field names match the stock dicts returned by fetch_constituents();
+    convert with to_dict() at the API boundary.
+    """
+
+    symbol: str
+    name: str
+    sector: str
+    subSector: str
+    region: str
+    currency: str
+    exchange: str
+
+    def to_dict(self) -> dict:
+        """Return the stock as a plain dict"""
+        return asdict(self)
@@ -387,9 +387,9 @@ def search_stocks():
 
     # Try to use DynamoDB-based stock universe manager
     try:
-        from stock_universe_api import StockUniverseManager
+        from stock_universe_api import get_stock_universe_manager
 
-        manager = StockUniverseManager()
+        manager = get_stock_universe_manager()
         result = manager.search_stocks(query, limit)
         if result:
             return jsonify(result)
@@ -427,9 +427,9 @@ def get_popular_stocks():
 
     # Try to use DynamoDB-based stock universe manager
     try:
-        from stock_universe_api import StockUniverseManager
+        from stock_universe_api import get_stock_universe_manager
 
-        manager = StockUniverseManager()
+        manager = get_stock_universe_manager()
         result = manager.get_popular_stocks(limit)
         if result:
             return jsonify(result)
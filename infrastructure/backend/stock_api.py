@@ -76,8 +76,6 @@ from constants import (
     REQUEST_KEY_HTTP_METHOD,
     REQUEST_KEY_PATH,
     REQUEST_KEY_QUERY_STRING_PARAMS,
-    RESPONSE_FORMAT_NA,
-    RESPONSE_FORMAT_SUCCESS_RATE,
     RESPONSE_KEY_CIRCUIT_BREAKER,
     RESPONSE_KEY_METRICS,
     RESPONSE_KEY_STATUS,
@@ -99,6 +97,11 @@ def decimal_default(obj):
     raise TypeError
 
 
+def _success_ratio(successes: int, total: int) -> Optional[float]:
+    """Success ratio (0.0 to 1.0), or None before any request is recorded"""
+    return successes / total if total > 0 else None
+
+
 class APIMetrics:
     """Track API performance metrics"""
 
@@ -181,13 +184,7 @@ class APIMetrics:
         total_requests = self.metrics[METRICS_KEY_REQUESTS][METRICS_KEY_TOTAL]
         success_requests = self.metrics[METRICS_KEY_REQUESTS][METRICS_KEY_SUCCESS]
 
-        if total_requests > 0:
-            success_rate = RESPONSE_FORMAT_SUCCESS_RATE.format(
-                (success_requests / total_requests) * 100
-            )
-        else:
-            success_rate = RESPONSE_FORMAT_NA
-
+        success_rate = _success_ratio(success_requests, total_requests)
         return {**self.metrics, METRICS_KEY_SUCCESS_RATE: success_rate}
 
     def get_source_stats(self, source: str) -> Dict:
@@ -198,13 +195,7 @@ class APIMetrics:
         source_data = self.metrics[METRICS_KEY_SOURCES][source]
         total_calls = source_data[METRICS_KEY_CALLS]
 
-        if total_calls > 0:
-            success_rate = RESPONSE_FORMAT_SUCCESS_RATE.format(
-                (source_data[METRICS_KEY_SUCCESS] / total_calls) * 100
-            )
-        else:
-            success_rate = RESPONSE_FORMAT_NA
-
+        success_rate = _success_ratio(source_data[METRICS_KEY_SUCCESS], total_calls)
         return {**source_data, METRICS_KEY_SUCCESS_RATE: success_rate}
 
 
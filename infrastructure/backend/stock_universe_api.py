@@ -1,12 +1,24 @@
+import heapq
 import json
 import logging
 import os
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+from operator import itemgetter
+from typing import Iterable
 
 import boto3
 from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.transform import TransformationInjector
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
 
 from constants import (
+    BATCH_GET_MAX_KEYS,
+    CACHE_KEY_DATA,
+    CACHE_KEY_TIMESTAMP,
     CORS_ALLOW_HEADERS,
     CORS_ALLOW_METHODS_GET,
     CORS_ALLOW_ORIGIN,
@@ -25,6 +37,7 @@ from constants import (
     ERROR_QUERY_REQUIRED,
     GSI_CURRENCY,
     GSI_INDEX_ID,
+    GSI_MISSING_ERROR_CODES,
     GSI_REGION,
     GSI_SECTOR,
     HTTP_METHOD_GET,
@@ -32,22 +45,31 @@ from constants import (
     HTTP_OK,
     HTTP_METHOD_NOT_ALLOWED,
     HTTP_SERVER_ERROR,
+    KEY_BODY,
     KEY_COUNT,
     KEY_CURRENCY,
     KEY_ERROR,
     KEY_INDEX_ID,
     KEY_INDEX_IDS,
     KEY_ITEMS,
+    KEY_KEYS,
     KEY_LAST_UPDATED,
     KEY_MARKET_CAP,
     KEY_MARKET_CAP_BUCKET,
     KEY_MARKET_CAP_USD,
     KEY_MESSAGE,
     KEY_NAME,
+    KEY_NAME_LOWER,
     KEY_REGION,
+    KEY_RESPONSES,
     KEY_SECTOR,
+    KEY_SECTOR_COUNT,
+    KEY_STATUS_CODE,
     KEY_SYMBOL,
+    KEY_UNPROCESSED_KEYS,
+    MAX_RETRIES,
     PARAM_CURRENCY,
+    PARAM_EXACT,
     PARAM_INDEX_ID,
     PARAM_LIMIT,
     PARAM_MARKET_CAP_BUCKET,
@@ -61,22 +83,79 @@ from constants import (
     PATH_POPULAR,
     PATH_SEARCH,
     PATH_SECTORS,
+    PATH_STOCKS,
     PATH_SYMBOL,
+    RETRY_DELAY,
+    SCAN_TOTAL_SEGMENTS,
     SORT_PRIORITY_CONTAINS,
     SORT_PRIORITY_EXACT_MATCH,
     SORT_PRIORITY_STARTS_WITH,
+    STOCK_UNIVERSE_CACHE_MAX_ENTRIES,
+    STOCK_UNIVERSE_CACHE_TIMEOUT,
 )
 from index_config import get_default_config
 
+try:
+    import orjson
+except ImportError:
+    # orjson is an optional speedup; fall back to the stdlib encoder
+    orjson = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+class DecimalEncoder(json.JSONEncoder):
+    """JSON encoder that serializes DynamoDB Decimal values as floats"""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+_DECIMAL_ENCODER = DecimalEncoder()
+
+
 def decimal_default(obj):
     """JSON serializer for Decimal objects"""
-    if isinstance(obj, Decimal):
-        return float(obj)
-    raise TypeError
+    return _DECIMAL_ENCODER.default(obj)
+
+
+def encode_response(response_body) -> str:
+    """Serialize a response body to JSON, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(response_body, default=decimal_default).decode()
+    return json.dumps(response_body, cls=DecimalEncoder)
+
+
+class NumberDeserializer(TypeDeserializer):
+    """DynamoDB deserializer returning int/float for numbers instead of Decimal"""
+
+    def _deserialize_n(self, value):
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+
+
+def _use_number_deserializer(client):
+    """
+    Make a resource's client return numbers as int/float
+
+    Replaces boto3's response transformation hook so numbers are converted
+    once while unmarshalling rather than by every reader. Items read this
+    way hold floats, which cannot be written back without converting them
+    to Decimal.
+    """
+    injector = TransformationInjector(deserializer=NumberDeserializer())
+    events = client.meta.events
+    events.unregister("after-call.dynamodb", unique_id="dynamodb-attr-value-output")
+    events.register(
+        "after-call.dynamodb",
+        injector.inject_attribute_value_output,
+        unique_id="dynamodb-attr-value-output",
+    )
 
 
 class StockUniverseManager:
@@ -84,55 +163,227 @@ class StockUniverseManager:
 
     def __init__(self):
         self.dynamodb = boto3.resource("dynamodb")
-        table_name = os.environ.get(ENV_STOCK_UNIVERSE_TABLE, DEFAULT_TABLE_NAME)
-        self.table = self.dynamodb.Table(table_name)
+        self.table_name = os.environ.get(ENV_STOCK_UNIVERSE_TABLE, DEFAULT_TABLE_NAME)
+        self.table = self.dynamodb.Table(self.table_name)
+        # Read paths page through the low-level client sharing this session
+        self.client = self.dynamodb.meta.client
+        _use_number_deserializer(self.client)
         self.index_config = get_default_config()
 
+        # LRU cache for read-mostly aggregates (sectors, popular, filters).
+        # Filter keys come from request parameters, so the entry count is capped.
+        self.cache = OrderedDict()
+        self.cache_timeout = STOCK_UNIVERSE_CACHE_TIMEOUT
+        self.cache_max_entries = STOCK_UNIVERSE_CACHE_MAX_ENTRIES
+
+    def _get_cache_key(self, prefix: str, *args) -> str:
+        """Generate cache key"""
+        return f"{prefix}:{args!r}"
+
+    def _is_expired(self, cached: dict, now: float) -> bool:
+        """Check whether a cache entry is older than the cache timeout"""
+        return now - cached[CACHE_KEY_TIMESTAMP] >= self.cache_timeout
+
+    def _get_from_cache(self, cache_key: str):
+        """
+        Get a fresh list copy of cached data if it has not expired
+
+        Callers may mutate the returned list without affecting later hits.
+        """
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        if self._is_expired(cached, time.monotonic()):
+            del self.cache[cache_key]
+            return None
+        self.cache.move_to_end(cache_key)
+        return list(cached[CACHE_KEY_DATA])
+
+    def _set_cache(self, cache_key: str, data):
+        """
+        Store a snapshot of data in cache
+
+        Expired entries are purged on every write, and the least recently
+        used entries are evicted beyond cache_max_entries.
+        """
+        now = time.monotonic()
+        for expired_key in [
+            key for key, cached in self.cache.items() if self._is_expired(cached, now)
+        ]:
+            del self.cache[expired_key]
+
+        self.cache[cache_key] = {
+            CACHE_KEY_DATA: tuple(data),
+            CACHE_KEY_TIMESTAMP: now,
+        }
+        self.cache.move_to_end(cache_key)
+        while len(self.cache) > self.cache_max_entries:
+            self.cache.popitem(last=False)
+
+    def clear_cache(self):
+        """Drop all cached results"""
+        self.cache.clear()
+
+    def _paginate(self, operation_name: str, **kwargs):
+        """
+        Yield every response page of a table query or scan
+
+        Uses the native paginator of the resource's low-level client, which
+        follows LastEvaluatedKey and still accepts conditions from
+        boto3.dynamodb.conditions and returns deserialized items.
+        """
+        paginator = self.client.get_paginator(operation_name)
+        yield from paginator.paginate(TableName=self.table_name, **kwargs)
+
+    def _iter_scan(self, **kwargs):
+        """Stream items from a table scan across all result pages"""
+        for page in self._paginate("scan", **kwargs):
+            yield from page.get(KEY_ITEMS, [])
+
+    def _iter_query(self, **kwargs):
+        """Stream items from a table query across all result pages"""
+        for page in self._paginate("query", **kwargs):
+            yield from page.get(KEY_ITEMS, [])
+
+    def _parallel_scan(
+        self, reduce_segment, total_segments: int = SCAN_TOTAL_SEGMENTS, **kwargs
+    ) -> list:
+        """
+        Scan the table as parallel segments, one worker thread per segment
+
+        Each worker streams its segment through reduce_segment so only the
+        reduced result is kept; the caller merges the per-segment results.
+        The low-level client is thread-safe; each worker gets its own paginator.
+        """
+
+        def scan_segment(segment: int):
+            return reduce_segment(
+                self._iter_scan(Segment=segment, TotalSegments=total_segments, **kwargs)
+            )
+
+        with ThreadPoolExecutor(max_workers=total_segments) as executor:
+            return list(executor.map(scan_segment, range(total_segments)))
+
+    def _build_search_condition(self, query_upper: str, query_lower: str):
+        """
+        Build a server-side condition mirroring _matches_search_query
+
+        Items seeded before nameLower existed are let through so they can
+        still be matched client-side. Only usable on scans: symbol is the
+        range key of every GSI, so a query filter cannot reference it.
+        """
+        return (
+            Attr(KEY_SYMBOL).contains(query_upper)
+            | Attr(KEY_NAME_LOWER).contains(query_lower)
+            | Attr(KEY_NAME_LOWER).not_exists()
+        )
+
+    def _build_filter_expression(
+        self, region: str = None, index_id: str = None, currency: str = None
+    ):
+        """Build a server-side FilterExpression mirroring _matches_filters"""
+        conditions = []
+        if region:
+            conditions.append(Attr(KEY_REGION).eq(region))
+        if index_id:
+            conditions.append(Attr(KEY_INDEX_IDS).contains(index_id))
+        if currency:
+            conditions.append(Attr(KEY_CURRENCY).eq(currency))
+
+        if not conditions:
+            return None
+
+        filter_expression = conditions[0]
+        for condition in conditions[1:]:
+            filter_expression = filter_expression & condition
+        return filter_expression
+
     def _query_with_gsi_fallback(
-        self, gsi_name: str, key_name: str, key_value: str
-    ) -> dict:
-        """Query using GSI with fallback to scan if GSI doesn't exist"""
+        self, gsi_name: str, key_name: str, key_value: str, filter_expression=None
+    ) -> list:
+        """
+        Query using GSI with fallback to scan if GSI doesn't exist
+
+        filter_expression must not reference the GSI hash or range key;
+        DynamoDB rejects key attributes in a query filter. Only a missing
+        index falls back to a scan, which filters on the key as well.
+        """
+        filter_kwargs = {}
+        if filter_expression is not None:
+            filter_kwargs["FilterExpression"] = filter_expression
+
         try:
-            response = self.table.query(
-                IndexName=gsi_name,
-                KeyConditionExpression=Key(key_name).eq(key_value),
+            return list(
+                self._iter_query(
+                    IndexName=gsi_name,
+                    KeyConditionExpression=Key(key_name).eq(key_value),
+                    **filter_kwargs,
+                )
             )
-            return response
-        except Exception:
-            return self.table.scan()
+        except ClientError as query_error:
+            if query_error.response["Error"]["Code"] not in GSI_MISSING_ERROR_CODES:
+                raise
+            logger.warning(
+                "GSI %s unavailable, falling back to scan: %s", gsi_name, query_error
+            )
+            scan_filter = Attr(key_name).eq(key_value)
+            if filter_expression is not None:
+                scan_filter = scan_filter & filter_expression
+            return list(self._iter_scan(FilterExpression=scan_filter))
 
     def _get_items_by_filter(
-        self, index_id: str = None, region: str = None, currency: str = None
-    ) -> list:
-        """Get items using most efficient query strategy based on filters"""
+        self,
+        index_id: str = None,
+        region: str = None,
+        currency: str = None,
+        search_condition=None,
+        sector: str = None,
+    ) -> Iterable[dict]:
+        """
+        Get items using most efficient query strategy based on filters
+
+        Queries the GSI for the most selective filter and lets DynamoDB apply
+        the remaining filters, so only matching items are returned.
+        search_condition is only pushed down on scans, since it references
+        symbol, the range key of every GSI; callers match it client-side.
+        """
+        if sector:
+            return self._query_with_gsi_fallback(
+                GSI_SECTOR,
+                KEY_SECTOR,
+                sector,
+                self._build_filter_expression(region, index_id, currency),
+            )
         if index_id:
-            response = self._query_with_gsi_fallback(
-                GSI_INDEX_ID, KEY_INDEX_ID, index_id
+            return self._query_with_gsi_fallback(
+                GSI_INDEX_ID,
+                KEY_INDEX_ID,
+                index_id,
+                self._build_filter_expression(region, None, currency),
             )
-        elif region:
-            response = self._query_with_gsi_fallback(GSI_REGION, KEY_REGION, region)
-        elif currency:
-            response = self._query_with_gsi_fallback(
-                GSI_CURRENCY, KEY_CURRENCY, currency
+        if region:
+            return self._query_with_gsi_fallback(
+                GSI_REGION,
+                KEY_REGION,
+                region,
+                self._build_filter_expression(None, None, currency),
             )
-        else:
-            response = self.table.scan()
-
-        return response.get(KEY_ITEMS, [])
+        if currency:
+            return self._query_with_gsi_fallback(GSI_CURRENCY, KEY_CURRENCY, currency)
+        if search_condition is not None:
+            return self._iter_scan(FilterExpression=search_condition)
+        return self._iter_scan()
 
     def _matches_search_query(
-        self, stock_item: dict, query_upper: str, query_lower: str, query_title: str
+        self, stock_item: dict, query_upper: str, query_lower: str
     ) -> bool:
         """Check if stock matches search query (case-insensitive)"""
         stock_symbol = stock_item.get(KEY_SYMBOL, "")
-        stock_name = stock_item.get(KEY_NAME, "")
+        stock_name_lower = stock_item.get(KEY_NAME_LOWER)
+        if stock_name_lower is None:
+            stock_name_lower = stock_item.get(KEY_NAME, "").lower()
 
-        return (
-            query_upper in stock_symbol.upper()
-            or query_lower in stock_name.lower()
-            or query_upper in stock_name.upper()
-            or query_title in stock_name
-        )
+        return query_upper in stock_symbol.upper() or query_lower in stock_name_lower
 
     def _matches_filters(
         self,
@@ -150,15 +401,24 @@ class StockUniverseManager:
             return False
         return True
 
-    def _calculate_sort_priority(self, stock_item: dict, query_upper: str) -> tuple:
-        """Calculate sort priority for search relevance"""
-        stock_symbol = stock_item[KEY_SYMBOL]
+    def _relevance_key(self, query_upper: str):
+        """
+        Build the search relevance sort key for one query
+
+        The query is bound once so scoring a candidate is only the symbol
+        comparisons (symbols are stored upper-case).
+        """
+        get_symbol = itemgetter(KEY_SYMBOL)
+
+        def sort_priority(stock_item: dict) -> tuple:
+            stock_symbol = get_symbol(stock_item)
+            if stock_symbol == query_upper:
+                return (SORT_PRIORITY_EXACT_MATCH, stock_symbol)
+            if stock_symbol.startswith(query_upper):
+                return (SORT_PRIORITY_STARTS_WITH, stock_symbol)
+            return (SORT_PRIORITY_CONTAINS, stock_symbol)
 
-        if stock_symbol == query_upper:
-            return (SORT_PRIORITY_EXACT_MATCH, stock_symbol)
-        if stock_symbol.startswith(query_upper):
-            return (SORT_PRIORITY_STARTS_WITH, stock_symbol)
-        return (SORT_PRIORITY_CONTAINS, stock_symbol)
+        return sort_priority
 
     def search_stocks(
         self,
@@ -167,6 +427,7 @@ class StockUniverseManager:
         region: str = None,
         index_id: str = None,
         currency: str = None,
+        exact: bool = False,
     ) -> list:
         """
         Search stocks by symbol or company name with optional filters
@@ -177,30 +438,41 @@ class StockUniverseManager:
             region: Filter by region (e.g., 'US', 'ZA')
             index_id: Filter by index (e.g., 'SP500', 'JSE_ALSI')
             currency: Filter by currency (e.g., 'USD', 'ZAR')
+            exact: Treat query as a full symbol and fetch it with GetItem
         """
         try:
+            if exact:
+                stock_item = self.get_stock_by_symbol(query)
+                if stock_item and self._matches_filters(
+                    stock_item, region, index_id, currency
+                ):
+                    return [stock_item]
+                return []
+
             query_upper = query.upper()
             query_lower = query.lower()
-            query_title = query.title()
 
-            stock_items = self._get_items_by_filter(index_id, region, currency)
+            stock_items = self._get_items_by_filter(
+                index_id,
+                region,
+                currency,
+                self._build_search_condition(query_upper, query_lower),
+            )
 
-            # Filter by symbol or name (case-insensitive)
-            filtered_stocks = [
+            # Filter by symbol or name (case-insensitive). Matches are streamed
+            # into the top-N selection so only `limit` items are held at once.
+            filtered_stocks = (
                 stock_item
                 for stock_item in stock_items
-                if self._matches_search_query(
-                    stock_item, query_upper, query_lower, query_title
-                )
+                if self._matches_search_query(stock_item, query_upper, query_lower)
                 and self._matches_filters(stock_item, region, index_id, currency)
-            ]
-
-            # Sort by relevance (exact match first, then starts with, then alphabetically)
-            filtered_stocks.sort(
-                key=lambda item: self._calculate_sort_priority(item, query_upper)
             )
 
-            return filtered_stocks[:limit]
+            # Top results by relevance (exact match first, then starts with,
+            # then alphabetically)
+            return heapq.nsmallest(
+                limit, filtered_stocks, key=self._relevance_key(query_upper)
+            )
         except Exception as search_error:
             logger.error("Error searching stocks: %s", str(search_error))
             return []
@@ -210,17 +482,35 @@ class StockUniverseManager:
         Get most popular/traded stocks
         Returns stocks sorted by market cap (largest first)
         """
-        try:
-            response = self.table.scan()
-            stock_items = response.get(KEY_ITEMS, [])
 
-            # Sort by market cap descending
-            stock_items.sort(
-                key=lambda item: float(item.get(KEY_MARKET_CAP, DEFAULT_MARKET_CAP)),
-                reverse=True,
+        def market_cap(stock_item: dict) -> int:
+            # Market caps are whole currency units; int compares faster than
+            # Decimal and a null value ranks last instead of failing the call
+            return int(stock_item.get(KEY_MARKET_CAP) or DEFAULT_MARKET_CAP)
+
+        def top_by_market_cap(stock_items) -> list:
+            # O(n log limit), holding at most `limit` items at a time
+            return heapq.nlargest(limit, stock_items, key=market_cap)
+
+        cache_key = self._get_cache_key("popular", limit)
+        cached = self._get_from_cache(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            # Keep the top `limit` of each segment, then of the merged tops.
+            # Only the attributes the popular stocks view renders are read.
+            segment_tops = self._parallel_scan(
+                top_by_market_cap,
+                ProjectionExpression=f"{KEY_SYMBOL}, #nm, {KEY_SECTOR}, {KEY_MARKET_CAP}",
+                ExpressionAttributeNames={"#nm": KEY_NAME},
+            )
+            popular_stocks = top_by_market_cap(
+                stock_item for segment_top in segment_tops for stock_item in segment_top
             )
 
-            return stock_items[:limit]
+            self._set_cache(cache_key, popular_stocks)
+            return popular_stocks
         except Exception as fetch_error:
             logger.error("Error getting popular stocks: %s", str(fetch_error))
             return []
@@ -230,24 +520,33 @@ class StockUniverseManager:
         Get all sectors with stock counts
         Returns: [{sector: str, count: int}, ...]
         """
-        try:
-            response = self.table.scan(ProjectionExpression=KEY_SECTOR)
-            stock_items = response.get(KEY_ITEMS, [])
 
-            # Count stocks per sector
-            sector_counts = {}
-            for stock_item in stock_items:
-                sector_name = stock_item.get(KEY_SECTOR, DEFAULT_SECTOR)
-                sector_counts[sector_name] = sector_counts.get(sector_name, 0) + 1
+        def count_sectors(stock_items) -> Counter:
+            return Counter(
+                stock_item.get(KEY_SECTOR) or DEFAULT_SECTOR
+                for stock_item in stock_items
+            )
+
+        cache_key = self._get_cache_key("sectors")
+        cached = self._get_from_cache(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            # Count stocks per sector in each segment, then merge the counts
+            sector_counts = Counter()
+            for counts in self._parallel_scan(
+                count_sectors, ProjectionExpression=KEY_SECTOR
+            ):
+                sector_counts.update(counts)
 
             # Sort by count descending
             sorted_sectors = [
-                {KEY_SECTOR: sector_name, KEY_COUNT: count}
-                for sector_name, count in sorted(
-                    sector_counts.items(), key=lambda x: x[1], reverse=True
-                )
+                {KEY_SECTOR: sector_name, KEY_SECTOR_COUNT: count}
+                for sector_name, count in sector_counts.most_common()
             ]
 
+            self._set_cache(cache_key, sorted_sectors)
             return sorted_sectors
         except Exception as fetch_error:
             logger.error("Error getting sectors: %s", str(fetch_error))
@@ -306,17 +605,26 @@ class StockUniverseManager:
             index_id: Filter by index (e.g., 'SP500', 'JSE_ALSI')
             currency: Filter by currency (e.g., 'USD', 'ZAR')
         """
+        cache_key = self._get_cache_key(
+            "filter",
+            sector,
+            min_cap,
+            max_cap,
+            market_cap_bucket,
+            region,
+            index_id,
+            currency,
+        )
+        cached = self._get_from_cache(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            # Filter by sector using GSI if available
-            if sector:
-                response = self.table.query(
-                    IndexName=GSI_SECTOR,
-                    KeyConditionExpression=Key(KEY_SECTOR).eq(sector),
-                )
-                stock_items = response.get(KEY_ITEMS, [])
-            else:
-                response = self.table.scan()
-                stock_items = response.get(KEY_ITEMS, [])
+            # Query the sector (or region/index/currency) GSI and let
+            # DynamoDB apply the remaining region, index, currency filters
+            stock_items = self._get_items_by_filter(
+                index_id, region, currency, sector=sector
+            )
 
             # Apply region, index, currency filters
             if region or index_id or currency:
@@ -339,7 +647,9 @@ class StockUniverseManager:
                     )
                 ]
 
-            return stock_items
+            filtered_stocks = list(stock_items)
+            self._set_cache(cache_key, filtered_stocks)
+            return filtered_stocks
         except Exception as filter_error:
             logger.error("Error filtering stocks: %s", str(filter_error))
             return []
@@ -353,21 +663,81 @@ class StockUniverseManager:
             logger.error("Error getting stock %s: %s", symbol, str(fetch_error))
             return {}
 
+    def batch_get_items(self, symbols: list) -> list:
+        """
+        Get many stocks by symbol with BatchGetItem
+
+        Symbols are requested in chunks of BATCH_GET_MAX_KEYS; unprocessed
+        keys are retried with exponential backoff up to MAX_RETRIES times.
+        Returned items are not ordered.
+        """
+        unique_symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        stock_items = []
+
+        for start in range(0, len(unique_symbols), BATCH_GET_MAX_KEYS):
+            chunk = unique_symbols[start : start + BATCH_GET_MAX_KEYS]
+            request_items = {
+                self.table_name: {KEY_KEYS: [{KEY_SYMBOL: symbol} for symbol in chunk]}
+            }
+
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    response = self.dynamodb.batch_get_item(RequestItems=request_items)
+                except Exception as fetch_error:
+                    logger.error("Error batch getting stocks: %s", str(fetch_error))
+                    break
+
+                stock_items.extend(
+                    response.get(KEY_RESPONSES, {}).get(self.table_name, [])
+                )
+                request_items = response.get(KEY_UNPROCESSED_KEYS)
+                if not request_items:
+                    break
+                if attempt < MAX_RETRIES:
+                    time.sleep(RETRY_DELAY * (2**attempt))
+            else:
+                logger.warning(
+                    "Gave up on %d unprocessed keys after %d retries",
+                    len(request_items[self.table_name][KEY_KEYS]),
+                    MAX_RETRIES,
+                )
+
+        return stock_items
+
+    def batch_write_items(self, stock_items: list) -> int:
+        """
+        Write many stocks with the table's batch writer
+
+        The batch writer sends BatchWriteItem requests of up to 25 items and
+        resends unprocessed items; duplicate symbols keep the last item.
+        Returns the number of items written.
+        """
+        with self.table.batch_writer(overwrite_by_pkeys=[KEY_SYMBOL]) as batch:
+            for stock_item in stock_items:
+                batch.put_item(Item=stock_item)
+
+        # Cached aggregates may no longer reflect the table
+        self.clear_cache()
+        return len(stock_items)
+
     def _count_index_stocks(self, index_id: str) -> int:
         """Count stocks in a specific index using GSI with fallback"""
         try:
-            response = self.table.query(
+            pages = self._paginate(
+                "query",
                 IndexName=GSI_INDEX_ID,
                 KeyConditionExpression=Key(KEY_INDEX_ID).eq(index_id),
                 Select="COUNT",
             )
-            return response.get(KEY_COUNT, 0)
+            return sum(page.get(KEY_COUNT, 0) for page in pages)
         except Exception:
             # GSI might not exist, use scan with filter
-            response = self.table.scan(
-                FilterExpression=Attr(KEY_INDEX_ID).eq(index_id), Select="COUNT"
+            pages = self._paginate(
+                "scan",
+                FilterExpression=Attr(KEY_INDEX_ID).eq(index_id),
+                Select="COUNT",
             )
-            return response.get(KEY_COUNT, 0)
+            return sum(page.get(KEY_COUNT, 0) for page in pages)
 
     def _get_index_last_updated(self, index_id: str) -> str:
         """Get last updated timestamp for an index"""
@@ -472,7 +842,7 @@ def _create_response(status_code: int, response_body: dict) -> dict:
     return {
         KEY_STATUS_CODE: status_code,
         "headers": _create_cors_headers(),
-        KEY_BODY: json.dumps(response_body, default=decimal_default),
+        KEY_BODY: encode_response(response_body),
     }
 
 
@@ -499,8 +869,9 @@ def _handle_search_request(manager: StockUniverseManager, query_params: dict) ->
     region = query_params.get(PARAM_REGION)
     index_id = query_params.get(PARAM_INDEX_ID)
     currency = query_params.get(PARAM_CURRENCY)
+    exact = query_params.get(PARAM_EXACT, "").lower() == "true"
 
-    return manager.search_stocks(query_string, limit, region, index_id, currency)
+    return manager.search_stocks(query_string, limit, region, index_id, currency, exact)
 
 
 def _handle_popular_request(manager: StockUniverseManager, query_params: dict) -> dict:
@@ -583,6 +954,18 @@ def _route_request(
     return {KEY_ERROR: ERROR_INVALID_ENDPOINT}
 
 
+# Reused across warm Lambda invocations so the manager's cache survives
+_stock_universe_manager = None
+
+
+def get_stock_universe_manager() -> StockUniverseManager:
+    """Get or create the shared stock universe manager"""
+    global _stock_universe_manager
+    if _stock_universe_manager is None:
+        _stock_universe_manager = StockUniverseManager()
+    return _stock_universe_manager
+
+
 def lambda_handler(event, context):
     """Handler for stock universe API endpoints"""
 
@@ -594,7 +977,7 @@ def lambda_handler(event, context):
     http_method = event.get("httpMethod", HTTP_METHOD_GET)
     query_params = event.get("queryStringParameters") or {}
 
-    manager = StockUniverseManager()
+    manager = get_stock_universe_manager()
 
     try:
         if http_method != HTTP_METHOD_GET:
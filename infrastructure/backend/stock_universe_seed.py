@@ -252,10 +252,12 @@ class StockUniverseSeeder:
         market_cap_bucket = self._get_market_cap_bucket_from_thresholds(
             market_cap_usd, index_config
         )
+        now = datetime.utcnow().isoformat()
 
         item = {
             "symbol": symbol,
             "name": stock["name"],
+            "nameLower": stock["name"].lower(),
             "sector": stock.get("sector", "Unknown"),
             "subSector": stock.get("subSector", ""),
             "industry": md.get("industry", ""),
@@ -270,8 +272,8 @@ class StockUniverseSeeder:
                 Decimal(str(market_cap_usd)) if market_cap_usd else Decimal("0")
             ),
             "marketCapBucket": market_cap_bucket,
-            "lastUpdated": datetime.utcnow().isoformat(),
-            "lastValidated": datetime.utcnow().isoformat(),
+            "lastUpdated": now,
+            "lastValidated": now,
             "isActive": (
                 "true" if md.get("isActive") not in [False, "false"] else "false"
             ),
@@ -323,6 +325,17 @@ class StockUniverseSeeder:
         logger.info("Seeding complete: %d succeeded, %d failed", seeded, failed)
         return {"seeded": seeded, "failed": failed, "total": len(stocks)}
 
+    def _iter_scan(self, **scan_kwargs):
+        """Stream items from a table scan, following LastEvaluatedKey across pages"""
+        while True:
+            response = self.table.scan(**scan_kwargs)
+            yield from response.get("Items", [])
+
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            if not last_evaluated_key:
+                return
+            scan_kwargs = {**scan_kwargs, "ExclusiveStartKey": last_evaluated_key}
+
     def _merge_index_memberships(self):
         """
         Merge stocks that belong to multiple indices
@@ -333,13 +346,13 @@ class StockUniverseSeeder:
         logger.info("Merging index memberships...")
 
         # Scan all stocks and group by symbol
-        response = self.table.scan(
+        items = self._iter_scan(
             ProjectionExpression="symbol, indexIds, #nm, sector",
             ExpressionAttributeNames={"#nm": "name"},
         )
 
         stocks_by_symbol = {}
-        for item in response.get("Items", []):
+        for item in items:
             symbol = item["symbol"]
             if symbol not in stocks_by_symbol:
                 stocks_by_symbol[symbol] = item
@@ -391,8 +404,7 @@ class StockUniverseSeeder:
                 scan_kwargs["FilterExpression"] = "contains(indexIds, :idxId)"
                 scan_kwargs["ExpressionAttributeValues"] = {":idxId": index_id}
 
-            response = self.table.scan(**scan_kwargs)
-            symbols_data = response.get("Items", [])
+            symbols_data = list(self._iter_scan(**scan_kwargs))
             symbols = [item["symbol"] for item in symbols_data]
         else:
             # Fetch existing data for provided symbols
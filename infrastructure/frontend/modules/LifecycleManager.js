@@ -11,6 +11,30 @@
  * and provides memory leak detection and state management.
  */
 
+// Lifecycle step -> verb used in error logs
+const LIFECYCLE_STEP_VERBS = {
+    Init: 'initializing',
+    Show: 'showing',
+    Hide: 'hiding',
+    Destroy: 'destroying'
+};
+
+// Tab name -> module shown when that tab is selected
+const TAB_TO_MODULE = new Map([
+    ['popular-stocks', 'stockManager'],
+    ['metrics', 'metricsManager'],
+    ['financials', 'financialsManager'],
+    ['factors', 'factorsManager'],
+    ['analyst-estimates', 'estimatesManager'],
+    ['news', 'newsManager'],
+    ['stock-analyser', 'stockAnalyserManager'],
+    ['watchlist', 'watchlistManager'],
+    ['model-portfolio', 'portfolioManager']
+]);
+
+// Minimum gap between two snapshots of the same module phase
+const MEMORY_SNAPSHOT_INTERVAL_MS = 1000;
+
 class LifecycleManager {
     constructor(eventBus) {
         this.eventBus = eventBus;
@@ -19,6 +43,10 @@ class LifecycleManager {
         this.visibilityState = 'visible';
         this.memorySnapshots = new Map();
         this.lifecycleTimeouts = new Map();
+        // Drops modules whose instance was garbage collected without cleanup
+        this.instanceRegistry = new FinalizationRegistry(moduleName => {
+            this.handleInstanceCollected(moduleName);
+        });
         
         this.setupVisibilityTracking();
         this.setupEventListeners();
@@ -38,7 +66,11 @@ class LifecycleManager {
 
         const moduleInfo = {
             name: moduleName,
-            instance: moduleInstance,
+            // Held weakly so a destroyed module can be reclaimed even if cleanup is skipped
+            instanceRef: new WeakRef(moduleInstance),
+            get instance() {
+                return this.instanceRef.deref();
+            },
             hooks: {
                 onInit: hooks.onInit || this.defaultHook('onInit', moduleName),
                 onShow: hooks.onShow || this.defaultHook('onShow', moduleName),
@@ -51,13 +83,14 @@ class LifecycleManager {
             hideCount: 0,
             memoryUsage: 0,
             subscriptions: [],
-            intervals: [],
-            timeouts: [],
+            intervals: new Set(),
+            timeouts: new Set(),
             charts: [],
             stateData: {}
         };
 
         this.modules.set(moduleName, moduleInfo);
+        this.instanceRegistry.register(moduleInstance, moduleName, moduleInfo);
         
         // Track subscriptions if eventBus has tracking
         if (moduleInstance._eventSubscriptions) {
@@ -88,6 +121,7 @@ class LifecycleManager {
             this.destroyModule(moduleName);
         }
 
+        this.instanceRegistry.unregister(moduleInfo);
         this.modules.delete(moduleName);
         
         console.log(`[LifecycleManager] Unregistered module: ${moduleName}`);
@@ -116,8 +150,8 @@ class LifecycleManager {
 
         console.log(`[LifecycleManager] Initializing module: ${moduleName}`);
         
-        try {
-            await this.executeHook(moduleName, 'onInit');
+        await this.runLifecycleStep(moduleInfo, 'Init', async () => {
+            await this.executeHook(moduleInfo, 'onInit');
             moduleInfo.initCalled = true;
             moduleInfo.state = 'initialized';
             
@@ -125,14 +159,7 @@ class LifecycleManager {
                 moduleName,
                 timestamp: Date.now()
             });
-        } catch (error) {
-            console.error(`[LifecycleManager] Error initializing ${moduleName}:`, error);
-            this.eventBus.emit('lifecycle:moduleInitError', {
-                moduleName,
-                error,
-                timestamp: Date.now()
-            });
-        }
+        });
     }
 
     /**
@@ -159,16 +186,16 @@ class LifecycleManager {
         }
         this.activeModule = moduleName;
 
-        try {
+        await this.runLifecycleStep(moduleInfo, 'Show', async () => {
             // Take memory snapshot before showing
             this.takeMemorySnapshot(moduleName, 'beforeShow');
             
-            await this.executeHook(moduleName, 'onShow');
+            await this.executeHook(moduleInfo, 'onShow');
             moduleInfo.state = 'visible';
             moduleInfo.showCount++;
             
             // Resume any paused operations
-            this.resumeModuleOperations(moduleName);
+            this.resumeModuleOperations(moduleInfo);
             
             this.eventBus.emit('lifecycle:moduleShown', {
                 moduleName,
@@ -181,14 +208,7 @@ class LifecycleManager {
                 this.takeMemorySnapshot(moduleName, 'afterShow');
             }, 100);
             
-        } catch (error) {
-            console.error(`[LifecycleManager] Error showing ${moduleName}:`, error);
-            this.eventBus.emit('lifecycle:moduleShowError', {
-                moduleName,
-                error,
-                timestamp: Date.now()
-            });
-        }
+        });
     }
 
     /**
@@ -208,19 +228,19 @@ class LifecycleManager {
 
         console.log(`[LifecycleManager] Hiding module: ${moduleName}`);
         
-        try {
+        await this.runLifecycleStep(moduleInfo, 'Hide', async () => {
             // Take memory snapshot before hiding
             this.takeMemorySnapshot(moduleName, 'beforeHide');
             
             // Pause operations before calling onHide
-            this.pauseModuleOperations(moduleName);
+            this.pauseModuleOperations(moduleName, moduleInfo);
             
-            await this.executeHook(moduleName, 'onHide');
+            await this.executeHook(moduleInfo, 'onHide');
             moduleInfo.state = 'hidden';
             moduleInfo.hideCount++;
             
             // Save module state
-            this.saveModuleState(moduleName);
+            this.saveModuleState(moduleName, moduleInfo);
             
             this.eventBus.emit('lifecycle:moduleHidden', {
                 moduleName,
@@ -228,20 +248,13 @@ class LifecycleManager {
                 timestamp: Date.now()
             });
             
-            // Check for memory leaks
+            // Check for memory leaks once the browser is idle
             setTimeout(() => {
                 this.takeMemorySnapshot(moduleName, 'afterHide');
-                this.detectMemoryLeak(moduleName);
+                this.runWhenIdle(() => this.detectMemoryLeak(moduleName, moduleInfo));
             }, 100);
             
-        } catch (error) {
-            console.error(`[LifecycleManager] Error hiding ${moduleName}:`, error);
-            this.eventBus.emit('lifecycle:moduleHideError', {
-                moduleName,
-                error,
-                timestamp: Date.now()
-            });
-        }
+        });
     }
 
     /**
@@ -260,16 +273,16 @@ class LifecycleManager {
 
         console.log(`[LifecycleManager] Destroying module: ${moduleName}`);
         
-        try {
+        await this.runLifecycleStep(moduleInfo, 'Destroy', async () => {
             // Ensure module is hidden first
             if (moduleInfo.state === 'visible') {
                 await this.hideModule(moduleName);
             }
             
             // Clear all tracked resources
-            this.clearModuleResources(moduleName);
+            this.clearModuleResources(moduleName, moduleInfo);
             
-            await this.executeHook(moduleName, 'onDestroy');
+            await this.executeHook(moduleInfo, 'onDestroy');
             moduleInfo.state = 'destroyed';
             
             this.eventBus.emit('lifecycle:moduleDestroyed', {
@@ -277,10 +290,25 @@ class LifecycleManager {
                 timestamp: Date.now()
             });
             
+        });
+    }
+
+    /**
+     * Run a lifecycle step, reporting any failure as lifecycle:module<Step>Error
+     * @param {Object} moduleInfo - Registered module info
+     * @param {string} step - One of Init, Show, Hide, Destroy
+     * @param {Function} body - Async step body
+     */
+    async runLifecycleStep(moduleInfo, step, body) {
+        try {
+            await body();
         } catch (error) {
-            console.error(`[LifecycleManager] Error destroying ${moduleName}:`, error);
-            this.eventBus.emit('lifecycle:moduleDestroyError', {
-                moduleName,
+            console.error(
+                `[LifecycleManager] Error ${LIFECYCLE_STEP_VERBS[step]} ${moduleInfo.name}:`,
+                error
+            );
+            this.eventBus.emit(`lifecycle:module${step}Error`, {
+                moduleName: moduleInfo.name,
                 error,
                 timestamp: Date.now()
             });
@@ -288,14 +316,29 @@ class LifecycleManager {
     }
 
     /**
-     * Execute a lifecycle hook
-     * @param {string} moduleName - Module name
-     * @param {string} hookName - Hook to execute
+     * Forget a module whose instance was garbage collected
+     * Hooks are not run since there is no instance left to run them on.
      */
-    async executeHook(moduleName, hookName) {
+    handleInstanceCollected(moduleName) {
         const moduleInfo = this.modules.get(moduleName);
-        if (!moduleInfo) return;
+        if (!moduleInfo || moduleInfo.instance) return;
+
+        this.clearModuleResources(moduleName, moduleInfo);
+        moduleInfo.state = 'destroyed';
+        this.modules.delete(moduleName);
+        if (this.activeModule === moduleName) {
+            this.activeModule = null;
+        }
 
+        console.warn(`[LifecycleManager] Module ${moduleName} was collected without cleanup`);
+    }
+
+    /**
+     * Execute a lifecycle hook
+     * @param {Object} moduleInfo - Registered module info
+     * @param {string} hookName - Hook to execute
+     */
+    async executeHook(moduleInfo, hookName) {
         const hook = moduleInfo.hooks[hookName];
         if (typeof hook === 'function') {
             await hook.call(moduleInfo.instance);
@@ -313,9 +356,9 @@ class LifecycleManager {
 
     /**
      * Pause module operations (intervals, animations, etc.)
+     * Callers that already hold the module info pass it to skip the lookup.
      */
-    pauseModuleOperations(moduleName) {
-        const moduleInfo = this.modules.get(moduleName);
+    pauseModuleOperations(moduleName, moduleInfo = this.modules.get(moduleName)) {
         if (!moduleInfo) return;
 
         // Pause intervals
@@ -340,33 +383,30 @@ class LifecycleManager {
 
     /**
      * Resume module operations
+     * @param {Object} moduleInfo - Registered module info
      */
-    resumeModuleOperations(moduleName) {
-        const moduleInfo = this.modules.get(moduleName);
-        if (!moduleInfo) return;
-
+    resumeModuleOperations(moduleInfo) {
         // Charts are typically recreated on show, so no need to resume
-        console.log(`[LifecycleManager] Resumed operations for ${moduleName}`);
+        console.log(`[LifecycleManager] Resumed operations for ${moduleInfo.name}`);
     }
 
     /**
      * Clear all tracked resources for a module
      */
-    clearModuleResources(moduleName) {
-        const moduleInfo = this.modules.get(moduleName);
+    clearModuleResources(moduleName, moduleInfo = this.modules.get(moduleName)) {
         if (!moduleInfo) return;
 
         // Clear intervals
-        moduleInfo.intervals.forEach(interval => {
+        for (const interval of moduleInfo.intervals) {
             clearInterval(interval);
-        });
-        moduleInfo.intervals = [];
+        }
+        moduleInfo.intervals.clear();
 
         // Clear timeouts
-        moduleInfo.timeouts.forEach(timeout => {
+        for (const timeout of moduleInfo.timeouts) {
             clearTimeout(timeout);
-        });
-        moduleInfo.timeouts = [];
+        }
+        moduleInfo.timeouts.clear();
 
         // Destroy charts
         moduleInfo.charts.forEach(chart => {
@@ -390,8 +430,7 @@ class LifecycleManager {
     /**
      * Save module state
      */
-    saveModuleState(moduleName) {
-        const moduleInfo = this.modules.get(moduleName);
+    saveModuleState(moduleName, moduleInfo = this.modules.get(moduleName)) {
         if (!moduleInfo || !moduleInfo.instance) return;
 
         // Try to get state from module
@@ -416,30 +455,48 @@ class LifecycleManager {
 
     /**
      * Take memory snapshot
+     * Throttled to one per module phase every MEMORY_SNAPSHOT_INTERVAL_MS,
+     * so rapid tab switching does not re-read performance.memory each time.
      */
     takeMemorySnapshot(moduleName, phase) {
         if (!performance.memory) return;
 
         const key = `${moduleName}_${phase}`;
+        const now = Date.now();
+        const previous = this.memorySnapshots.get(key);
+        if (previous && now - previous.timestamp < MEMORY_SNAPSHOT_INTERVAL_MS) return;
+
         this.memorySnapshots.set(key, {
             usedJSHeapSize: performance.memory.usedJSHeapSize,
             totalJSHeapSize: performance.memory.totalJSHeapSize,
             jsHeapSizeLimit: performance.memory.jsHeapSizeLimit,
-            timestamp: Date.now()
+            timestamp: now
         });
     }
 
+    /**
+     * Run diagnostic work when the browser is idle
+     */
+    runWhenIdle(callback) {
+        if (typeof window.requestIdleCallback === 'function') {
+            window.requestIdleCallback(callback, { timeout: 500 });
+        } else {
+            setTimeout(callback, 0);
+        }
+    }
+
     /**
      * Detect memory leaks
      */
-    detectMemoryLeak(moduleName) {
+    detectMemoryLeak(moduleName, moduleInfo = this.modules.get(moduleName)) {
         const beforeKey = `${moduleName}_beforeHide`;
         const afterKey = `${moduleName}_afterHide`;
         
         const before = this.memorySnapshots.get(beforeKey);
         const after = this.memorySnapshots.get(afterKey);
         
-        if (!before || !after) return;
+        // A throttled afterHide snapshot can predate the latest beforeHide
+        if (!before || !after || after.timestamp < before.timestamp) return;
 
         const increase = after.usedJSHeapSize - before.usedJSHeapSize;
         const increaseMB = increase / (1024 * 1024);
@@ -457,7 +514,6 @@ class LifecycleManager {
         }
 
         // Store memory usage in module info
-        const moduleInfo = this.modules.get(moduleName);
         if (moduleInfo) {
             moduleInfo.memoryUsage = after.usedJSHeapSize;
         }
@@ -500,20 +556,7 @@ class LifecycleManager {
      * Handle tab switch
      */
     async handleTabSwitch(tabName) {
-        // Map tab names to module names
-        const tabToModule = {
-            'popular-stocks': 'stockManager',
-            'metrics': 'metricsManager',
-            'financials': 'financialsManager',
-            'factors': 'factorsManager',
-            'analyst-estimates': 'estimatesManager',
-            'news': 'newsManager',
-            'stock-analyser': 'stockAnalyserManager',
-            'watchlist': 'watchlistManager',
-            'model-portfolio': 'portfolioManager'
-        };
-
-        const moduleName = tabToModule[tabName];
+        const moduleName = TAB_TO_MODULE.get(tabName);
         if (!moduleName) return;
 
         // Show new module
@@ -529,6 +572,25 @@ class LifecycleManager {
         const moduleInfo = this.modules.get(moduleName);
         if (!moduleInfo) return null;
 
+        return this.buildModuleStatus(moduleInfo);
+    }
+
+    /**
+     * Get all module statuses
+     */
+    getAllModuleStatuses() {
+        const statuses = {};
+        for (const [name, moduleInfo] of this.modules) {
+            statuses[name] = this.buildModuleStatus(moduleInfo);
+        }
+        return statuses;
+    }
+
+    /**
+     * Build the status summary for a registered module
+     * @param {Object} moduleInfo - Registered module info
+     */
+    buildModuleStatus(moduleInfo) {
         return {
             name: moduleInfo.name,
             state: moduleInfo.state,
@@ -538,24 +600,13 @@ class LifecycleManager {
             memoryUsage: moduleInfo.memoryUsage,
             resourceCounts: {
                 subscriptions: moduleInfo.subscriptions.length,
-                intervals: moduleInfo.intervals.length,
-                timeouts: moduleInfo.timeouts.length,
+                intervals: moduleInfo.intervals.size,
+                timeouts: moduleInfo.timeouts.size,
                 charts: moduleInfo.charts.length
             }
         };
     }
 
-    /**
-     * Get all module statuses
-     */
-    getAllModuleStatuses() {
-        const statuses = {};
-        for (const [name] of this.modules) {
-            statuses[name] = this.getModuleStatus(name);
-        }
-        return statuses;
-    }
-
     /**
      * Cleanup all modules
      */
@@ -0,0 +1,209 @@
+/**
+ * Frontend Lifecycle Manager Tests
+ * Tests for infrastructure/frontend/modules/LifecycleManager.js
+ */
+
+const LifecycleManager = require('../../infrastructure/frontend/modules/LifecycleManager.js');
+
+// Mock event bus for testing
+const createMockEventBus = () => ({
+    emit: jest.fn(),
+    on: jest.fn(),
+    off: jest.fn()
+});
+
+// Stand-in for Chrome's non-standard performance.memory
+const createMockMemory = (usedJSHeapSize = 0) => ({
+    usedJSHeapSize,
+    totalJSHeapSize: 0,
+    jsHeapSizeLimit: 0
+});
+
+describe('LifecycleManager', () => {
+    let eventBus;
+    let manager;
+    let memory;
+
+    beforeEach(() => {
+        jest.useFakeTimers();
+        // The manager wires visibility and unload listeners on construction
+        global.document = { visibilityState: 'visible', addEventListener: jest.fn() };
+        global.window = { addEventListener: jest.fn() };
+        memory = createMockMemory();
+        Object.defineProperty(performance, 'memory', { value: memory, configurable: true });
+        jest.spyOn(console, 'log').mockImplementation(() => {});
+        jest.spyOn(console, 'warn').mockImplementation(() => {});
+
+        eventBus = createMockEventBus();
+        manager = new LifecycleManager(eventBus);
+    });
+
+    afterEach(() => {
+        delete performance.memory;
+        delete global.document;
+        delete global.window;
+        jest.restoreAllMocks();
+        jest.useRealTimers();
+    });
+
+    describe('takeMemorySnapshot', () => {
+        test('should keep the first snapshot of a phase taken within 1s', () => {
+            memory.usedJSHeapSize = 1000000;
+            manager.takeMemorySnapshot('testModule', 'beforeShow');
+            memory.usedJSHeapSize = 2000000;
+            jest.advanceTimersByTime(999);
+            manager.takeMemorySnapshot('testModule', 'beforeShow');
+
+            expect(manager.memorySnapshots.size).toBe(1);
+            expect(manager.memorySnapshots.get('testModule_beforeShow').usedJSHeapSize).toBe(1000000);
+        });
+
+        test('should take a fresh snapshot once 1s has passed', () => {
+            memory.usedJSHeapSize = 1000000;
+            manager.takeMemorySnapshot('testModule', 'beforeShow');
+            memory.usedJSHeapSize = 2000000;
+            jest.advanceTimersByTime(1000);
+            manager.takeMemorySnapshot('testModule', 'beforeShow');
+
+            expect(manager.memorySnapshots.get('testModule_beforeShow').usedJSHeapSize).toBe(2000000);
+        });
+
+        test('should throttle each phase separately', () => {
+            manager.takeMemorySnapshot('testModule', 'beforeHide');
+            manager.takeMemorySnapshot('testModule', 'afterHide');
+
+            expect([...manager.memorySnapshots.keys()]).toEqual([
+                'testModule_beforeHide',
+                'testModule_afterHide'
+            ]);
+        });
+    });
+
+    describe('detectMemoryLeak', () => {
+        const MB = 1024 * 1024;
+
+        const leakEvents = () => eventBus.emit.mock.calls
+            .filter(([event]) => event === 'lifecycle:memoryLeakDetected');
+
+        test('should report heap growth over 10MB across a hide', () => {
+            memory.usedJSHeapSize = 10 * MB;
+            manager.takeMemorySnapshot('testModule', 'beforeHide');
+            memory.usedJSHeapSize = 25 * MB;
+            manager.takeMemorySnapshot('testModule', 'afterHide');
+
+            manager.detectMemoryLeak('testModule');
+
+            expect(leakEvents()).toHaveLength(1);
+            expect(leakEvents()[0][1].increaseMB).toBe(15);
+        });
+
+        test('should ignore an afterHide snapshot older than the latest beforeHide', () => {
+            // afterHide from an earlier hide, kept by the throttle
+            manager.memorySnapshots.set('testModule_afterHide', {
+                ...createMockMemory(25 * MB),
+                timestamp: Date.now()
+            });
+            jest.advanceTimersByTime(500);
+            memory.usedJSHeapSize = 10 * MB;
+            manager.takeMemorySnapshot('testModule', 'beforeHide');
+
+            manager.detectMemoryLeak('testModule');
+
+            expect(leakEvents()).toHaveLength(0);
+        });
+    });
+
+    describe('Weakly held module instances', () => {
+        test('should hold the instance through a WeakRef watched by the registry', () => {
+            const register = jest.spyOn(manager.instanceRegistry, 'register');
+            const instance = {};
+
+            manager.registerModule('testModule', instance);
+            const moduleInfo = manager.modules.get('testModule');
+
+            // instance is a getter over the WeakRef, not a stored reference
+            expect(Object.getOwnPropertyDescriptor(moduleInfo, 'instance').value).toBeUndefined();
+            expect(moduleInfo.instanceRef).toBeInstanceOf(WeakRef);
+            expect(moduleInfo.instance).toBe(instance);
+            expect(register).toHaveBeenCalledWith(instance, 'testModule', moduleInfo);
+        });
+
+        test('should drop the registry entry when the module is unregistered', () => {
+            const unregister = jest.spyOn(manager.instanceRegistry, 'unregister');
+            manager.registerModule('testModule', {});
+            const moduleInfo = manager.modules.get('testModule');
+
+            manager.unregisterModule('testModule');
+
+            expect(unregister).toHaveBeenCalledWith(moduleInfo);
+        });
+
+        test('should clear timers of a collected instance without running hooks', () => {
+            const onDestroy = jest.fn();
+            const tick = jest.fn();
+            manager.registerModule('testModule', {}, { onDestroy });
+            const moduleInfo = manager.modules.get('testModule');
+            moduleInfo.intervals.add(setInterval(tick, 100));
+            moduleInfo.timeouts.add(setTimeout(tick, 100));
+            manager.activeModule = 'testModule';
+            // Simulate the garbage collector having reclaimed the instance
+            moduleInfo.instanceRef = { deref: () => undefined };
+
+            manager.handleInstanceCollected('testModule');
+            jest.advanceTimersByTime(1000);
+
+            expect(tick).not.toHaveBeenCalled();
+            expect(moduleInfo.intervals.size).toBe(0);
+            expect(moduleInfo.timeouts.size).toBe(0);
+            expect(manager.modules.has('testModule')).toBe(false);
+            expect(manager.activeModule).toBe(null);
+            expect(onDestroy).not.toHaveBeenCalled();
+        });
+
+        test('should ignore a collection callback for a live instance', () => {
+            manager.registerModule('testModule', {});
+
+            manager.handleInstanceCollected('testModule');
+
+            expect(manager.modules.has('testModule')).toBe(true);
+        });
+    });
+
+    describe('handleTabSwitch', () => {
+        test.each([
+            ['popular-stocks', 'stockManager'],
+            ['metrics', 'metricsManager'],
+            ['financials', 'financialsManager'],
+            ['factors', 'factorsManager'],
+            ['analyst-estimates', 'estimatesManager'],
+            ['news', 'newsManager'],
+            ['stock-analyser', 'stockAnalyserManager'],
+            ['watchlist', 'watchlistManager'],
+            ['model-portfolio', 'portfolioManager']
+        ])('should show the module for the %s tab (%s)', async (tabName, moduleName) => {
+            manager.registerModule(moduleName, {});
+            const showModule = jest.spyOn(manager, 'showModule').mockResolvedValue();
+
+            await manager.handleTabSwitch(tabName);
+
+            expect(showModule).toHaveBeenCalledTimes(1);
+            expect(showModule).toHaveBeenCalledWith(moduleName);
+        });
+
+        test('should ignore an unknown tab', async () => {
+            const showModule = jest.spyOn(manager, 'showModule').mockResolvedValue();
+
+            await manager.handleTabSwitch('unknown-tab');
+
+            expect(showModule).not.toHaveBeenCalled();
+        });
+
+        test('should ignore a known tab whose module is not registered', async () => {
+            const showModule = jest.spyOn(manager, 'showModule').mockResolvedValue();
+
+            await manager.handleTabSwitch('watchlist');
+
+            expect(showModule).not.toHaveBeenCalled();
+        });
+    });
+});
@@ -0,0 +1,108 @@
+"""
+Shared fixtures for backend unit tests
+"""
+
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+from boto3.dynamodb.table import BatchWriter
+
+
+class FakePaginator:
+    """Paginator stand-in that pages through a mocked Table operation"""
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def paginate(self, TableName, **kwargs):
+        while True:
+            page = self.operation(**kwargs)
+            yield page
+
+            last_evaluated_key = page.get("LastEvaluatedKey")
+            if not last_evaluated_key:
+                return
+            kwargs = {**kwargs, "ExclusiveStartKey": last_evaluated_key}
+
+
+@pytest.fixture
+def mock_table():
+    """Mock DynamoDB Table handed out by the patched boto3 resource"""
+    return Mock()
+
+
+@pytest.fixture
+def mock_dynamodb(mock_table):
+    """
+    Mock DynamoDB service resource whose Table() returns mock_table
+
+    Paginated reads through meta.client are served by mock_table's scan and
+    query mocks, so tests only need to stub the Table.
+    """
+    dynamodb = Mock()
+    dynamodb.Table.return_value = mock_table
+    dynamodb.meta.client.get_paginator.side_effect = lambda operation_name: (
+        FakePaginator(getattr(mock_table, operation_name))
+    )
+    return dynamodb
+
+
+@pytest.fixture
+def patched_boto3(monkeypatch, mock_dynamodb):
+    """Patch boto3.resource to return mock_dynamodb for the test's duration"""
+    mock_resource = Mock(return_value=mock_dynamodb)
+    monkeypatch.setattr("boto3.resource", mock_resource)
+    return mock_resource
+
+
+@pytest.fixture
+def mock_batch_writer(mock_table):
+    """Batch writer context manager handed out by mock_table.batch_writer()
+
+    Specced on boto3's BatchWriter, so only its real methods and context
+    manager protocol exist on the mock.
+    """
+    batch_writer = MagicMock(spec=BatchWriter)
+    batch_writer.__enter__.return_value = batch_writer
+    mock_table.batch_writer.return_value = batch_writer
+    return batch_writer
+
+
+@pytest.fixture
+def written_items(mock_batch_writer):
+    """Items passed to mock_batch_writer.put_item, in write order"""
+    captured = []
+    mock_batch_writer.put_item.side_effect = lambda **kwargs: captured.append(
+        kwargs["Item"]
+    )
+    return captured
+
+
+@pytest.fixture
+def clear_jse_caches():
+    """Start and end the test with empty JSE Wikipedia and FX rate caches"""
+    from index_fetchers import jse_fetcher
+
+    jse_fetcher.clear_caches()
+    yield
+    jse_fetcher.clear_caches()
+
+
+@pytest.fixture
+def mock_http_session():
+    """Patch the fetchers' shared requests session; get() returns a page with
+    one constituents wikitable"""
+    from index_fetchers.base import IndexFetcher
+
+    page = (
+        "<html><body>"
+        '<table class="infobox"><tr><th>Exchange</th><td>JSE</td></tr></table>'
+        '<table class="wikitable">'
+        "<tr><th>Symbol</th><th>Company</th></tr>"
+        "<tr><td>AGL</td><td>Anglo American</td></tr>"
+        "</table>"
+        "</body></html>"
+    )
+    with patch.object(IndexFetcher._SESSION, "get") as mock_get:
+        mock_get.return_value = Mock(text=page, content=page.encode(), status_code=200)
+        yield mock_get
@@ -11,15 +11,11 @@ Tests the API endpoints for stock data including:
 Uses mocked Lambda handler and DynamoDB to avoid AWS dependencies.
 """
 
-import sys
 import pytest
 import json
 from unittest.mock import Mock, patch, MagicMock
 from decimal import Decimal
 
-# Add backend path for imports
-sys.path.insert(0, "/home/ubuntupunk/Projects/stock-analyzer/infrastructure/backend")
-
 
 class TestAPIEndpointsCORS:
     """Test CORS headers and preflight requests"""
@@ -3,31 +3,59 @@ Unit Tests for Circuit Breaker Module
 Tests the circuit breaker pattern implementation for API resilience
 """
 
-import sys
-import time
 import pytest
 
-# Add backend path for imports
-sys.path.insert(0, "/home/ubuntupunk/Projects/stock-analyzer/infrastructure/backend")
-
+import circuit_breaker
 from circuit_breaker import (
     CircuitState,
     CircuitBreakerConfig,
     APIEndpoint,
     CircuitBreakerManager,
     get_circuit_breaker,
+    circuit_breaker_decorator,
     CircuitOpenError,
 )
 
+# Shared read-only default config; tests needing custom values build their own
+_DEFAULT_CFG = CircuitBreakerConfig()
+
+STATS_KEYS = {"total_endpoints", "total_calls", "total_errors", "open_circuits"}
+HEALTH_REPORT_KEYS = {"healthy", "degraded", "unhealthy", "health_score"}
+
+
+class FakeClock:
+    """Manually advanced clock injected into CircuitBreakerManager"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def tick(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_clock():
+    """Provide a fake clock so timeout transitions never sleep"""
+    return FakeClock()
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breaker_singleton(monkeypatch):
+    """Give every test a fresh module-level circuit breaker singleton"""
+    monkeypatch.setattr(circuit_breaker, "_circuit_breaker_manager", None)
+
 
 class TestCircuitState:
     """Test CircuitState enum values"""
 
     def test_circuit_states_exist(self):
         """Verify all circuit states are defined"""
-        assert CircuitState.CLOSED.value == "closed"
-        assert CircuitState.OPEN.value == "open"
-        assert CircuitState.HALF_OPEN.value == "half_open"
+        assert CircuitState("closed") is CircuitState.CLOSED
+        assert CircuitState("open") is CircuitState.OPEN
+        assert CircuitState("half_open") is CircuitState.HALF_OPEN
 
 
 class TestAPIEndpoint:
@@ -37,39 +65,42 @@ class TestAPIEndpoint:
         """Test default endpoint initialization"""
         endpoint = APIEndpoint(name="test_api")
 
-        assert endpoint.name == "test_api"
-        assert endpoint.failures == 0
-        assert endpoint.successes == 0
-        assert endpoint.total_calls == 0
-        assert endpoint.state == CircuitState.CLOSED
-        assert endpoint.rate_limit_hits == 0
-
-    def test_record_success(self):
-        """Test recording successful API calls"""
-        endpoint = APIEndpoint(name="test_api")
-        endpoint.record_success(latency_ms=100.0)
-
-        assert endpoint.successes == 1
-        assert endpoint.total_calls == 1
-        assert endpoint.total_latency_ms == 100.0
-
-    def test_record_failure(self):
-        """Test recording failed API calls"""
+        expected = {
+            "name": "test_api",
+            "failures": 0,
+            "successes": 0,
+            "total_calls": 0,
+            "state": CircuitState.CLOSED,
+            "rate_limit_hits": 0,
+        }
+        assert {key: getattr(endpoint, key) for key in expected} == expected
+
+    @pytest.mark.parametrize(
+        "action,args,expected",
+        [
+            (
+                "record_success",
+                {"latency_ms": 100.0},
+                {"successes": 1, "total_calls": 1, "total_latency_ms": 100.0},
+            ),
+            (
+                "record_failure",
+                {"error_type": "ConnectionError"},
+                {"failures": 1, "total_calls": 1, "total_errors": 1},
+            ),
+            (
+                "record_rate_limit",
+                {},
+                {"rate_limit_hits": 1, "failures": 1, "total_calls": 1},
+            ),
+        ],
+    )
+    def test_record_call(self, action, args, expected):
+        """Test recording successes, failures and rate limit hits"""
         endpoint = APIEndpoint(name="test_api")
-        endpoint.record_failure("ConnectionError")
+        getattr(endpoint, action)(**args)
 
-        assert endpoint.failures == 1
-        assert endpoint.total_calls == 1
-        assert endpoint.total_errors == 1
-
-    def test_record_rate_limit(self):
-        """Test recording rate limit hits"""
-        endpoint = APIEndpoint(name="test_api")
-        endpoint.record_rate_limit()
-
-        assert endpoint.rate_limit_hits == 1
-        assert endpoint.failures == 1
-        assert endpoint.total_calls == 1
+        assert {key: getattr(endpoint, key) for key in expected} == expected
 
     def test_get_success_rate_empty(self):
         """Test success rate calculation with no calls"""
@@ -86,7 +117,7 @@ class TestAPIEndpoint:
         endpoint.record_failure()
 
         rate = endpoint.get_success_rate()
-        assert rate == 2.0 / 3.0
+        assert rate == pytest.approx(2 / 3, rel=1e-9)
 
     def test_get_average_latency_empty(self):
         """Test average latency calculation with no calls"""
@@ -110,7 +141,7 @@ class TestCircuitBreakerConfig:
 
     def test_default_config(self):
         """Test default configuration values"""
-        config = CircuitBreakerConfig()
+        config = _DEFAULT_CFG
 
         assert config.failure_threshold == 5
         assert config.success_threshold == 2
@@ -132,16 +163,6 @@ class TestCircuitBreakerConfig:
 class TestCircuitBreakerManager:
     """Test CircuitBreakerManager class"""
 
-    def setup_method(self):
-        """Reset circuit breaker and singleton before each test"""
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
-
-    def teardown_method(self):
-        """Clean up after each test"""
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
-
     def test_manager_creation(self):
         """Test manager initialization"""
         manager = CircuitBreakerManager()
@@ -172,50 +193,55 @@ class TestCircuitBreakerManager:
         state = manager.get_state("yahoo_finance")
         assert state["successes"] >= 1
 
-    def test_record_failure_opens_circuit(self):
-        """Test circuit opens after threshold failures"""
-        # Create fresh manager
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
-
+    @pytest.mark.parametrize(
+        "action,args",
+        [
+            ("record_failure", ("test_endpoint", "ConnectionError")),
+            ("record_rate_limit", ("test_endpoint",)),
+        ],
+    )
+    def test_action_opens_circuit(self, action, args):
+        """Test failures and rate limits open the circuit and block calls"""
         manager = CircuitBreakerManager(
-            config=CircuitBreakerConfig(failure_threshold=3)
+            config=CircuitBreakerConfig(failure_threshold=1)
         )
 
-        # Record 3 failures on a new endpoint
-        for i in range(3):
-            manager.record_failure("test_endpoint", "ConnectionError")
+        getattr(manager, action)(*args)
 
         state = manager.get_state("test_endpoint")
         assert state["state"] == "open"
+        assert manager.can_call("test_endpoint") is False
 
-    def test_can_call_open_circuit_returns_false(self):
-        """Test can_call returns False when circuit is open"""
-        # Create fresh manager
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
+    def test_force_open_without_failures_half_opens_on_next_call(self):
+        """Test a forced-open circuit with no failure time half-opens at once"""
+        manager = CircuitBreakerManager()
 
+        manager.force_open("test_endpoint")
+        assert manager.get_state("test_endpoint")["state"] == "open"
+
+        # force_open records no failure timestamp, so the OPEN timeout counts
+        # as already elapsed and the next can_call admits a probe
+        assert manager.can_call("test_endpoint") is True
+        assert manager.get_state("test_endpoint")["state"] == "half_open"
+
+    def test_record_failure_below_threshold_stays_closed(self):
+        """Test circuit stays closed until the failure threshold is reached"""
         manager = CircuitBreakerManager(
-            config=CircuitBreakerConfig(failure_threshold=1)
+            config=CircuitBreakerConfig(failure_threshold=3)
         )
 
-        # Force a failure to open circuit on a new endpoint
-        manager.record_failure("test_endpoint", "ConnectionError")
-
-        # Verify state is open
-        state = manager.get_state("test_endpoint")
-        assert state["state"] == "open"
+        for _ in range(2):
+            manager.record_failure("test_endpoint", "ConnectionError")
+        assert manager.get_state("test_endpoint")["state"] == "closed"
 
-        # can_call should return False
-        result = manager.can_call("test_endpoint")
-        assert result is False
+        manager.record_failure("test_endpoint", "ConnectionError")
+        assert manager.get_state("test_endpoint")["state"] == "open"
 
-    def test_circuit_transition_open_to_half_open(self):
+    def test_circuit_transition_open_to_half_open(self, fake_clock):
         """Test circuit transitions from OPEN to HALF_OPEN after timeout"""
         # Create a standalone manager with very short timeout
-        # NOT using the singleton
         config = CircuitBreakerConfig(timeout_seconds=0.01, failure_threshold=3)
-        manager = CircuitBreakerManager(config=config)
+        manager = CircuitBreakerManager(config=config, clock=fake_clock.tick)
 
         endpoint_name = "test_transition_unique"
 
@@ -226,8 +252,11 @@ class TestCircuitBreakerManager:
         state = manager.get_state(endpoint_name)
         assert state["state"] == "open", f"Expected OPEN, got {state['state']}"
 
-        # Wait for timeout to expire
-        time.sleep(0.05)
+        # Still blocked until the timeout has elapsed
+        assert manager.can_call(endpoint_name) is False
+
+        # Let the timeout expire
+        fake_clock.advance(0.05)
 
         # can_call should return True and transition to half_open
         result = manager.can_call(endpoint_name)
@@ -236,44 +265,20 @@ class TestCircuitBreakerManager:
         state = manager.get_state(endpoint_name)
         assert state["state"] == "half_open"
 
-    def test_get_health_report(self):
-        """Test health report generation"""
-        # Create a standalone manager
-        config = CircuitBreakerConfig()
-        manager = CircuitBreakerManager(config=config)
-
-        # Make one endpoint unhealthy
-        manager.force_open("unhealthy_api")
-
-        report = manager.get_health_report()
-
-        assert "healthy" in report
-        assert "degraded" in report
-        assert "unhealthy" in report
-        assert "health_score" in report
-        # Check that unhealthy_api is in unhealthy list
-        unhealthy_count = len(report["unhealthy"])
-        assert (
-            unhealthy_count >= 1
-        ), f"Expected at least 1 unhealthy API, got {unhealthy_count}"
-
-    def test_record_success_half_open_closes_circuit(self):
+    def test_record_success_half_open_closes_circuit(self, fake_clock):
         """Test circuit closes after successes in HALF_OPEN"""
-        # Create fresh manager
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
-
         manager = CircuitBreakerManager(
             config=CircuitBreakerConfig(
                 failure_threshold=1, success_threshold=2, timeout_seconds=0.01
-            )
+            ),
+            clock=fake_clock.tick,
         )
 
         # Open the circuit
         manager.record_failure("test_endpoint", "ConnectionError")
 
-        # Wait for timeout
-        time.sleep(0.05)
+        # Let the timeout expire
+        fake_clock.advance(0.05)
 
         # Transition to half_open
         result = manager.can_call("test_endpoint")
@@ -290,23 +295,20 @@ class TestCircuitBreakerManager:
         assert state["state"] == "closed"
         assert state["failures"] == 0  # Failures reset on close
 
-    def test_record_failure_half_open_reopens(self):
+    def test_record_failure_half_open_reopens(self, fake_clock):
         """Test circuit reopens on failure in HALF_OPEN"""
-        # Create fresh manager
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
-
         manager = CircuitBreakerManager(
             config=CircuitBreakerConfig(
                 failure_threshold=1, success_threshold=3, timeout_seconds=0.01
-            )
+            ),
+            clock=fake_clock.tick,
         )
 
         # Open the circuit
         manager.record_failure("test_endpoint", "ConnectionError")
 
-        # Wait for timeout
-        time.sleep(0.05)
+        # Let the timeout expire
+        fake_clock.advance(0.05)
 
         # Transition to half_open
         manager.can_call("test_endpoint")
@@ -317,43 +319,8 @@ class TestCircuitBreakerManager:
         state = manager.get_state("test_endpoint")
         assert state["state"] == "open"
 
-    def test_record_rate_limit_opens_circuit(self):
-        """Test rate limit immediately opens circuit"""
-        # Create fresh manager
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
-
-        manager = CircuitBreakerManager()
-
-        manager.record_rate_limit("test_endpoint")
-
-        state = manager.get_state("test_endpoint")
-        assert state["state"] == "open"
-
-    def test_force_open(self):
-        """Test manually forcing circuit open"""
-        # Create fresh manager
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
-        manager = CircuitBreakerManager()
-
-        # Force open
-        manager.force_open("test_endpoint")
-
-        state = manager.get_state("test_endpoint")
-        assert state["state"] == "open"
-
-        # can_call should return False (no timeout passed yet)
-        result = manager.can_call("test_endpoint")
-        # After waiting, it transitions to half_open
-        state = manager.get_state("test_endpoint")
-        assert state["state"] in ["open", "half_open"]
-
     def test_force_close(self):
         """Test manually forcing circuit closed"""
-        # Create fresh manager
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
         manager = CircuitBreakerManager()
 
         manager.force_open("test_endpoint")
@@ -367,9 +334,6 @@ class TestCircuitBreakerManager:
 
     def test_reset_single_endpoint(self):
         """Test resetting a single endpoint"""
-        # Create fresh manager
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
         manager = CircuitBreakerManager()
 
         manager.record_failure("test_endpoint", "ConnectionError")
@@ -381,9 +345,6 @@ class TestCircuitBreakerManager:
 
     def test_reset_all_endpoints(self):
         """Test resetting all endpoints"""
-        # Create fresh manager
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
         manager = CircuitBreakerManager()
 
         manager.record_failure("yahoo_finance", "ConnectionError")
@@ -408,9 +369,6 @@ class TestCircuitBreakerManager:
 
     def test_get_stats(self):
         """Test getting comprehensive statistics"""
-        # Create fresh manager
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
         manager = CircuitBreakerManager()
 
         manager.record_success("test_endpoint", 100.0)
@@ -418,26 +376,19 @@ class TestCircuitBreakerManager:
 
         stats = manager.get_stats()
 
-        assert "total_endpoints" in stats
-        assert "total_calls" in stats
-        assert "total_errors" in stats
-        assert "open_circuits" in stats
+        assert STATS_KEYS <= stats.keys()
 
     def test_get_health_report(self):
         """Test health report generation"""
         # Create a standalone manager
-        config = CircuitBreakerConfig()
-        manager = CircuitBreakerManager(config=config)
+        manager = CircuitBreakerManager(config=_DEFAULT_CFG)
 
         # Make one endpoint unhealthy
         manager.force_open("unhealthy_api")
 
         report = manager.get_health_report()
 
-        assert "healthy" in report
-        assert "degraded" in report
-        assert "unhealthy" in report
-        assert "health_score" in report
+        assert HEALTH_REPORT_KEYS <= report.keys()
         # Check that unhealthy list has at least 1 entry
         unhealthy_count = len(report["unhealthy"])
         assert (
@@ -445,25 +396,65 @@ class TestCircuitBreakerManager:
         ), f"Expected at least 1 unhealthy API, got {unhealthy_count}"
 
 
+@pytest.mark.xdist_group("singleton")
 class TestGetCircuitBreaker:
     """Test get_circuit_breaker singleton function"""
 
-    def setup_method(self):
-        """Reset singleton before each test"""
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
-
     def test_singleton_creation(self):
         """Test singleton is created on first call"""
-        global _circuit_breaker_manager
-        _circuit_breaker_manager = None
-
         cb1 = get_circuit_breaker()
         cb2 = get_circuit_breaker()
 
         assert cb1 is cb2
 
 
+@pytest.mark.xdist_group("singleton")
+class TestCircuitBreakerDecorator:
+    """Test circuit_breaker_decorator against the singleton manager"""
+
+    def test_records_latency_on_success(self, monkeypatch, fake_clock):
+        """Test decorator times the call with the manager's clock"""
+        monkeypatch.setattr(
+            circuit_breaker,
+            "_circuit_breaker_manager",
+            CircuitBreakerManager(clock=fake_clock.tick),
+        )
+
+        @circuit_breaker_decorator("decorated_api")
+        def call_api():
+            fake_clock.advance(0.25)
+            return "ok"
+
+        assert call_api() == "ok"
+
+        state = get_circuit_breaker().get_state("decorated_api")
+        assert state["successes"] == 1
+        assert state["avg_latency_ms"] == "250.0"
+
+    def test_records_failure_and_reraises(self):
+        """Test decorator records the error type and re-raises"""
+
+        @circuit_breaker_decorator("decorated_api")
+        def call_api():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            call_api()
+
+        assert get_circuit_breaker().get_state("decorated_api")["failures"] == 1
+
+    def test_open_circuit_raises(self):
+        """Test decorator fails fast when the circuit is open"""
+        get_circuit_breaker().record_rate_limit("decorated_api")
+
+        @circuit_breaker_decorator("decorated_api")
+        def call_api():
+            return "ok"
+
+        with pytest.raises(CircuitOpenError):
+            call_api()
+
+
 class TestCircuitOpenError:
     """Test CircuitOpenError exception"""
 
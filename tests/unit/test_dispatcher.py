@@ -0,0 +1,69 @@
+"""
+Unit Tests for the Index Fetcher Dispatcher
+
+Tests fetch_all_constituents with fake fetchers standing in for the real ones
+"""
+
+import threading
+
+import pytest
+from unittest.mock import Mock
+
+from index_fetchers import fetch_all_constituents
+
+
+def make_fetcher(index_id, fetch):
+    """Fake fetcher whose fetch_constituents calls fetch"""
+    fetcher = Mock(id=index_id)
+    fetcher.fetch_constituents.side_effect = fetch
+    return fetcher
+
+
+class TestFetchAllConstituents:
+    """Test fetching several indices concurrently"""
+
+    def test_fetch_all_constituents_runs_concurrently(self):
+        """Test all four fetches are in flight at the same time"""
+        # Each fetch blocks until all four have started; run serially, the
+        # first wait times out and raises BrokenBarrierError
+        barrier = threading.Barrier(4, timeout=1)
+
+        def fetch():
+            barrier.wait()
+            return [{"symbol": "AGL.JO", "name": "Anglo", "sector": "Materials"}]
+
+        fetchers = [make_fetcher(f"jse{i}", fetch) for i in range(4)]
+
+        results = fetch_all_constituents(fetchers)
+
+        assert list(results) == ["jse0", "jse1", "jse2", "jse3"]
+        assert all(stocks[0]["symbol"] == "AGL.JO" for stocks in results.values())
+
+    def test_fetch_all_constituents_keeps_fetcher_order(self):
+        """Test results are keyed by index id in fetcher order"""
+        fetchers = [
+            make_fetcher(index_id, lambda index_id=index_id: [{"symbol": index_id}])
+            for index_id in ("sp500", "russell3000", "jse_top40")
+        ]
+
+        results = fetch_all_constituents(fetchers)
+
+        assert results == {
+            "sp500": [{"symbol": "sp500"}],
+            "russell3000": [{"symbol": "russell3000"}],
+            "jse_top40": [{"symbol": "jse_top40"}],
+        }
+
+    def test_fetch_all_constituents_empty(self):
+        """Test no fetchers yields no results"""
+        assert fetch_all_constituents([]) == {}
+
+    def test_fetch_all_constituents_propagates_errors(self):
+        """Test a failing fetcher surfaces its exception"""
+        fetchers = [
+            make_fetcher("sp500", lambda: []),
+            make_fetcher("jse_top40", Mock(side_effect=ValueError("no table"))),
+        ]
+
+        with pytest.raises(ValueError, match="no table"):
+            fetch_all_constituents(fetchers)
@@ -5,46 +5,66 @@ Tests the stock-universe DynamoDB table structure, GSIs, and query patterns.
 Uses mocked boto3 DynamoDB client to avoid AWS dependencies.
 """
 
-import sys
+import boto3
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
 import json
+import math
 from decimal import Decimal
 
-# Add backend path for imports
-sys.path.insert(0, "/home/ubuntupunk/Projects/stock-analyzer/infrastructure/backend")
+from boto3.dynamodb.conditions import Attr, ConditionExpressionBuilder, Key
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+
+import stock_universe_api
+from stock_universe_api import (
+    DecimalEncoder,
+    NumberDeserializer,
+    StockUniverseManager,
+    decimal_default,
+    encode_response,
+)
+
+pytestmark = pytest.mark.usefixtures("patched_boto3")
+
+# Captured before patched_boto3 replaces it, for tests needing a real client
+REAL_BOTO3_RESOURCE = boto3.resource
+
+
+def client_error(code):
+    """ClientError as raised by DynamoDB for the given error code"""
+    return ClientError({"Error": {"Code": code, "Message": code}}, "Query")
+
+
+def filter_attribute_names(condition):
+    """Attribute names referenced by a boto3 condition"""
+    expression = ConditionExpressionBuilder().build_expression(condition)
+    return set(expression.attribute_name_placeholders.values())
+
+
+def first_segment_scan(items):
+    """Scan side_effect serving items to parallel segment 0 only"""
+
+    def scan(**kwargs):
+        return {"Items": [] if kwargs.get("Segment", 0) else items}
+
+    return scan
 
 
 class TestDynamoDBTableStructure:
     """Test DynamoDB table structure and configuration"""
 
-    @patch("boto3.resource")
-    def test_table_initialization(self, mock_boto3_resource):
+    def test_table_initialization(self, mock_dynamodb):
         """Test StockUniverseManager initializes DynamoDB table"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
 
         assert manager.table is not None
         mock_dynamodb.Table.assert_called_once_with("stock-universe")
 
-    @patch("boto3.resource")
-    def test_table_uses_environment_variable(self, mock_boto3_resource):
+    def test_table_uses_environment_variable(self, mock_dynamodb):
         """Test table name from environment variable"""
-        from stock_universe_api import StockUniverseManager
-
         with patch.dict("os.environ", {"STOCK_UNIVERSE_TABLE": "test-stock-table"}):
-            mock_table = Mock()
-            mock_dynamodb = Mock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto3_resource.return_value = mock_dynamodb
-
             manager = StockUniverseManager()
 
             mock_dynamodb.Table.assert_called_once_with("test-stock-table")
@@ -85,18 +105,10 @@ class TestDynamoDBGSIQueries:
             },
         ]
 
-    @patch("boto3.resource")
-    def test_query_by_index_id_gsi(self, mock_boto3_resource):
+    def test_query_by_index_id_gsi(self, mock_table):
         """Test querying by index ID using GSI"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
         mock_table.query.return_value = {"Items": self.sample_stocks[:2]}
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.search_stocks("A", index_id="SP500")
 
@@ -105,56 +117,32 @@ class TestDynamoDBGSIQueries:
         call_args = mock_table.query.call_args
         assert "IndexName" in call_args.kwargs
 
-    @patch("boto3.resource")
-    def test_query_by_region_gsi(self, mock_boto3_resource):
+    def test_query_by_region_gsi(self, mock_table):
         """Test querying by region using GSI"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
         mock_table.query.return_value = {"Items": [self.sample_stocks[2]]}
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.search_stocks("A", region="ZA")
 
         # Should attempt region GSI query
         mock_table.query.assert_called()
 
-    @patch("boto3.resource")
-    def test_query_by_currency_gsi(self, mock_boto3_resource):
+    def test_query_by_currency_gsi(self, mock_table):
         """Test querying by currency using GSI"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
         mock_table.query.return_value = {"Items": [self.sample_stocks[2]]}
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.search_stocks("A", currency="ZAR")
 
         # Should attempt currency GSI query
         mock_table.query.assert_called()
 
-    @patch("boto3.resource")
-    def test_gsi_fallback_to_scan(self, mock_boto3_resource):
+    def test_gsi_fallback_to_scan(self, mock_table):
         """Test fallback to scan when GSI doesn't exist"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
-        # First call raises exception (GSI doesn't exist), second succeeds
-        mock_table.query.side_effect = Exception("GSI not found")
+        # Querying a GSI the table lacks is rejected as a ValidationException
+        mock_table.query.side_effect = client_error("ValidationException")
         mock_table.scan.return_value = {"Items": self.sample_stocks}
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.search_stocks("AAPL", index_id="SP500")
 
@@ -162,6 +150,97 @@ class TestDynamoDBGSIQueries:
         mock_table.scan.assert_called_once()
         assert len(results) > 0
 
+    def test_gsi_query_pushes_remaining_filters(self, mock_table):
+        """Test filters not used as the GSI key are applied by DynamoDB"""
+        mock_table.query.return_value = {"Items": self.sample_stocks[:2]}
+
+        manager = StockUniverseManager()
+        manager.search_stocks("A", index_id="SP500", region="US")
+
+        call_args = mock_table.query.call_args
+        assert call_args.kwargs["IndexName"] == "index-id-index"
+        assert "FilterExpression" in call_args.kwargs
+
+    def test_gsi_fallback_scan_is_filtered(self, mock_table):
+        """Test scan fallback carries the filters instead of reading every item"""
+        mock_table.query.side_effect = client_error("ResourceNotFoundException")
+        mock_table.scan.return_value = {"Items": [self.sample_stocks[2]]}
+
+        manager = StockUniverseManager()
+        results = manager.search_stocks("AGL", region="ZA")
+
+        assert "FilterExpression" in mock_table.scan.call_args.kwargs
+        assert [r["symbol"] for r in results] == ["AGL.JO"]
+
+    def test_gsi_query_errors_do_not_fall_back_to_scan(self, mock_table):
+        """Test only a missing index triggers the full-table scan fallback"""
+        mock_table.query.side_effect = client_error(
+            "ProvisionedThroughputExceededException"
+        )
+
+        manager = StockUniverseManager()
+        results = manager.search_stocks("AAPL", index_id="SP500")
+
+        assert results == []
+        mock_table.scan.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "run, index_name, hash_key",
+        [
+            (
+                lambda manager: manager.search_stocks(
+                    "AAPL", index_id="SP500", region="US", currency="USD"
+                ),
+                "index-id-index",
+                "indexId",
+            ),
+            (
+                lambda manager: manager.search_stocks(
+                    "AAPL", region="US", currency="USD"
+                ),
+                "region-index",
+                "region",
+            ),
+            (
+                lambda manager: manager.search_stocks("AAPL", currency="USD"),
+                "currency-index",
+                "currency",
+            ),
+            (
+                lambda manager: manager.filter_stocks(
+                    sector="Technology", region="US", index_id="SP500", currency="USD"
+                ),
+                "sector-index",
+                "sector",
+            ),
+        ],
+        ids=["index_id", "region", "currency", "sector"],
+    )
+    def test_gsi_query_filter_skips_key_attributes(
+        self, mock_table, run, index_name, hash_key
+    ):
+        """Test query filters never name the GSI hash key or the symbol range key"""
+        mock_table.query.return_value = {"Items": self.sample_stocks[:2]}
+
+        run(StockUniverseManager())
+
+        mock_table.query.assert_called_once()
+        query_kwargs = mock_table.query.call_args.kwargs
+        assert query_kwargs["IndexName"] == index_name
+        if "FilterExpression" in query_kwargs:
+            referenced = filter_attribute_names(query_kwargs["FilterExpression"])
+            assert not referenced & {"symbol", hash_key}
+        mock_table.scan.assert_not_called()
+
+    def test_gsi_search_matches_symbol_client_side(self, mock_table):
+        """Test a symbol-only match still comes back from a GSI query"""
+        mock_table.query.return_value = {"Items": self.sample_stocks[:2]}
+
+        manager = StockUniverseManager()
+        results = manager.search_stocks("MSFT", index_id="SP500")
+
+        assert [r["symbol"] for r in results] == ["MSFT"]
+
 
 class TestDynamoDBDataOperations:
     """Test data insertion, retrieval, and formatting"""
@@ -184,23 +263,15 @@ class TestDynamoDBDataOperations:
             }
         ]
 
-    @patch("boto3.resource")
-    def test_get_popular_stocks_sorts_by_market_cap(self, mock_boto3_resource):
+    def test_get_popular_stocks_sorts_by_market_cap(self, mock_table):
         """Test popular stocks sorted by market cap"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
-        mock_table.scan.return_value = {
-            "Items": [
+        mock_table.scan.side_effect = first_segment_scan(
+            [
                 {"symbol": "SMALL", "marketCap": Decimal("1000000")},
                 {"symbol": "LARGE", "marketCap": Decimal("3000000000")},
                 {"symbol": "MEDIUM", "marketCap": Decimal("1000000000")},
             ]
-        }
-
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
+        )
 
         manager = StockUniverseManager()
         results = manager.get_popular_stocks(limit=3)
@@ -210,24 +281,37 @@ class TestDynamoDBDataOperations:
         assert results[1]["symbol"] == "MEDIUM"
         assert results[2]["symbol"] == "SMALL"
 
-    @patch("boto3.resource")
-    def test_get_sectors_counts_by_sector(self, mock_boto3_resource):
-        """Test sector counting"""
-        from stock_universe_api import StockUniverseManager
+        # Only the rendered attributes are read from DynamoDB
+        scan_kwargs = mock_table.scan.call_args.kwargs
+        assert scan_kwargs["ProjectionExpression"] == "symbol, #nm, sector, marketCap"
+        assert scan_kwargs["ExpressionAttributeNames"] == {"#nm": "name"}
+
+    def test_get_popular_stocks_ranks_missing_market_cap_last(self, mock_table):
+        """Test null or missing market caps rank last instead of failing"""
+        mock_table.scan.side_effect = first_segment_scan(
+            [
+                {"symbol": "NULL", "marketCap": None},
+                {"symbol": "NONE"},
+                {"symbol": "LARGE", "marketCap": Decimal("3000000000")},
+            ]
+        )
 
-        mock_table = Mock()
-        mock_table.scan.return_value = {
-            "Items": [
+        manager = StockUniverseManager()
+        results = manager.get_popular_stocks(limit=2)
+
+        assert results[0] == {"symbol": "LARGE", "marketCap": Decimal("3000000000")}
+        assert len(results) == 2
+
+    def test_get_sectors_counts_by_sector(self, mock_table):
+        """Test sector counting"""
+        mock_table.scan.side_effect = first_segment_scan(
+            [
                 {"sector": "Technology"},
                 {"sector": "Technology"},
                 {"sector": "Financials"},
                 {"sector": None},
             ]
-        }
-
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
+        )
 
         manager = StockUniverseManager()
         sectors = manager.get_sectors()
@@ -236,13 +320,49 @@ class TestDynamoDBDataOperations:
         sector_dict = {item["sector"]: item["count"] for item in sectors}
         assert sector_dict.get("Technology") == 2
         assert sector_dict.get("Financials") == 1
+        assert sector_dict.get("Unknown") == 1
+        counts = [item["count"] for item in sectors]
+        assert counts == sorted(counts, reverse=True)
+        assert mock_table.scan.call_args.kwargs["ProjectionExpression"] == "sector"
+
+    def test_scan_reads_every_page_from_client_paginator(self, mock_dynamodb):
+        """Test scans page through the client paginator instead of one 1MB page"""
+        pages = [
+            {"Items": [{"symbol": "SMALL", "marketCap": Decimal("1000000")}]},
+            {"Items": [{"symbol": "LARGE", "marketCap": Decimal("3000000000")}]},
+        ]
+        mock_dynamodb.meta.client.get_paginator.side_effect = None
+        paginator = mock_dynamodb.meta.client.get_paginator.return_value
+        paginator.paginate.side_effect = lambda **kwargs: (
+            [{"Items": []}] if kwargs["Segment"] else pages
+        )
 
-    @patch("boto3.resource")
-    def test_filter_stocks_by_sector(self, mock_boto3_resource):
-        """Test filtering stocks by sector"""
-        from stock_universe_api import StockUniverseManager
+        manager = StockUniverseManager()
+        results = manager.get_popular_stocks(limit=2)
+
+        assert [r["symbol"] for r in results] == ["LARGE", "SMALL"]
+        mock_dynamodb.meta.client.get_paginator.assert_called_with("scan")
+        for call in paginator.paginate.call_args_list:
+            assert call.kwargs["TableName"] == "stock-universe"
+
+    def test_get_sectors_uses_parallel_scan(self, mock_table):
+        """Test sector aggregation scans the table as parallel segments"""
+        mock_table.scan.side_effect = lambda **kwargs: {
+            "Items": [{"sector": "Technology"}]
+        }
+
+        manager = StockUniverseManager()
+        manager.get_sectors()
+
+        scan_calls = [call.kwargs for call in mock_table.scan.call_args_list]
+        total_segments = scan_calls[0]["TotalSegments"]
+        assert total_segments > 1
+        assert sorted(kwargs["Segment"] for kwargs in scan_calls) == list(
+            range(total_segments)
+        )
 
-        mock_table = Mock()
+    def test_filter_stocks_by_sector(self, mock_table):
+        """Test filtering stocks by sector"""
         # Mock query for GSI
         mock_table.query.return_value = {
             "Items": [
@@ -251,10 +371,6 @@ class TestDynamoDBDataOperations:
             ]
         }
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.filter_stocks(sector="Technology")
 
@@ -263,6 +379,27 @@ class TestDynamoDBDataOperations:
         assert "AAPL" in symbols
         assert "MSFT" in symbols
 
+        call_args = mock_table.query.call_args
+        assert call_args.kwargs["IndexName"] == "sector-index"
+        assert call_args.kwargs["KeyConditionExpression"] == Key("sector").eq(
+            "Technology"
+        )
+        mock_table.scan.assert_not_called()
+
+    def test_filter_stocks_by_sector_pushes_region_filter(self, mock_table):
+        """Test non-key filters go to DynamoDB without the GSI key attribute"""
+        mock_table.query.return_value = {
+            "Items": [{"symbol": "AAPL", "sector": "Technology", "region": "US"}]
+        }
+
+        manager = StockUniverseManager()
+        results = manager.filter_stocks(sector="Technology", region="US")
+
+        assert [r["symbol"] for r in results] == ["AAPL"]
+        call_args = mock_table.query.call_args
+        assert call_args.kwargs["IndexName"] == "sector-index"
+        assert call_args.kwargs["FilterExpression"] == Attr("region").eq("US")
+
 
 class TestDynamoDBSearchFunctionality:
     """Test search functionality with various patterns"""
@@ -275,35 +412,41 @@ class TestDynamoDBSearchFunctionality:
             {"symbol": "MSFT", "name": "Microsoft Corporation"},
         ]
 
-    @patch("boto3.resource")
-    def test_search_by_symbol_exact_match(self, mock_boto3_resource):
+    def test_search_by_symbol_exact_match(self, mock_table):
         """Test exact symbol match"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
         mock_table.scan.return_value = {"Items": self.search_items}
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.search_stocks("AAPL")
 
         assert len(results) == 1
         assert results[0]["symbol"] == "AAPL"
 
-    @patch("boto3.resource")
-    def test_search_by_symbol_prefix(self, mock_boto3_resource):
-        """Test symbol prefix search"""
-        from stock_universe_api import StockUniverseManager
+    def test_exact_search_uses_get_item(self, mock_table):
+        """Test exact symbol search is a GetItem, not a scan"""
+        mock_table.get_item.return_value = {"Item": self.search_items[0]}
 
-        mock_table = Mock()
-        mock_table.scan.return_value = {"Items": self.search_items}
+        manager = StockUniverseManager()
+        results = manager.search_stocks("aapl", exact=True)
+
+        assert results == [self.search_items[0]]
+        mock_table.get_item.assert_called_once_with(Key={"symbol": "AAPL"})
+        mock_table.scan.assert_not_called()
+
+    def test_exact_search_applies_filters(self, mock_table):
+        """Test exact symbol search still honours the region filter"""
+        mock_table.get_item.return_value = {
+            "Item": {"symbol": "AAPL", "name": "Apple Inc.", "region": "US"}
+        }
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
+        manager = StockUniverseManager()
+
+        assert manager.search_stocks("AAPL", region="ZA", exact=True) == []
+        assert len(manager.search_stocks("AAPL", region="US", exact=True)) == 1
+
+    def test_search_by_symbol_prefix(self, mock_table):
+        """Test symbol prefix search"""
+        mock_table.scan.return_value = {"Items": self.search_items}
 
         manager = StockUniverseManager()
         results = manager.search_stocks("A")
@@ -314,31 +457,34 @@ class TestDynamoDBSearchFunctionality:
         assert "AAPL" in symbols
         assert "AMZN" in symbols
 
-    @patch("boto3.resource")
-    def test_search_by_name(self, mock_boto3_resource):
+    def test_search_by_name(self, mock_table):
         """Test name search"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
         mock_table.scan.return_value = {"Items": self.search_items}
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.search_stocks("micro")
 
         # Should find Microsoft
         assert len(results) == 1
         assert results[0]["symbol"] == "MSFT"
+        assert "FilterExpression" in mock_table.scan.call_args.kwargs
 
-    @patch("boto3.resource")
-    def test_search_sorts_by_relevance(self, mock_boto3_resource):
-        """Test results sorted by relevance"""
-        from stock_universe_api import StockUniverseManager
+    def test_search_uses_precomputed_lowercase_name(self, mock_table):
+        """Test nameLower is preferred over recomputing name.lower()"""
+        mock_table.scan.return_value = {
+            "Items": [
+                {"symbol": "MSFT", "name": "Microsoft", "nameLower": "microsoft"},
+                {"symbol": "XYZ", "name": "Micro Labs", "nameLower": "xyz labs"},
+            ]
+        }
+
+        manager = StockUniverseManager()
+        results = manager.search_stocks("micro")
 
-        mock_table = Mock()
+        assert [r["symbol"] for r in results] == ["MSFT"]
+
+    def test_search_sorts_by_relevance(self, mock_table):
+        """Test results sorted by relevance"""
         mock_table.scan.return_value = {
             "Items": [
                 {"symbol": "AAPL", "name": "Apple Inc."},
@@ -347,87 +493,105 @@ class TestDynamoDBSearchFunctionality:
             ]
         }
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.search_stocks("AAPL")
 
         # Exact match should be first
         assert results[0]["symbol"] == "AAPL"
 
+    def test_search_limit_keeps_most_relevant(self, mock_table):
+        """Test limit returns the best-ranked results, not the first scanned"""
+        mock_table.scan.return_value = {
+            "Items": [
+                {"symbol": "BA", "name": "Boeing"},
+                {"symbol": "AAPL", "name": "Apple Inc."},
+                {"symbol": "MA", "name": "Mastercard"},
+                {"symbol": "A", "name": "Agilent"},
+            ]
+        }
+
+        manager = StockUniverseManager()
+        results = manager.search_stocks("A", limit=2)
+
+        assert [r["symbol"] for r in results] == ["A", "AAPL"]
+
 
 class TestDynamoDBBatchOperations:
     """Test batch operations"""
 
-    @patch("boto3.resource")
-    def test_batch_get_items(self, mock_boto3_resource):
-        """Test batch get operation"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
-        mock_table.batch_get_item.return_value = {
+    def test_batch_get_items(self, mock_dynamodb):
+        """Test batch get chunks keys to the 100-key BatchGetItem limit"""
+        mock_dynamodb.batch_get_item.side_effect = lambda RequestItems: {
             "Responses": {
                 "stock-universe": [
-                    {"symbol": "AAPL", "name": "Apple"},
-                    {"symbol": "MSFT", "name": "Microsoft"},
+                    {"symbol": key["symbol"]}
+                    for key in RequestItems["stock-universe"]["Keys"]
                 ]
             }
         }
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
+        manager = StockUniverseManager()
+        symbols = [f"SYM{i}" for i in range(250)]
+        results = manager.batch_get_items(symbols + ["sym0"])
+
+        assert len(results) == 250
+        assert mock_dynamodb.batch_get_item.call_count == math.ceil(len(symbols) / 100)
+        for call in mock_dynamodb.batch_get_item.call_args_list:
+            assert len(call.kwargs["RequestItems"]["stock-universe"]["Keys"]) <= 100
+
+    def test_batch_get_items_retries_unprocessed_keys(self, mock_dynamodb, monkeypatch):
+        """Test unprocessed keys are re-requested after a backoff"""
+        sleeps = []
+        monkeypatch.setattr(stock_universe_api.time, "sleep", sleeps.append)
+        unprocessed = {"stock-universe": {"Keys": [{"symbol": "MSFT"}]}}
+        mock_dynamodb.batch_get_item.side_effect = [
+            {
+                "Responses": {"stock-universe": [{"symbol": "AAPL"}]},
+                "UnprocessedKeys": unprocessed,
+            },
+            {"Responses": {"stock-universe": [{"symbol": "MSFT"}]}},
+        ]
 
         manager = StockUniverseManager()
-        keys = [{"PK": "STOCK#AAPL"}, {"PK": "STOCK#MSFT"}]
-        # Note: batch_get_items would need to be implemented in StockUniverseManager
+        results = manager.batch_get_items(["AAPL", "MSFT"])
 
-    @patch("boto3.resource")
-    def test_batch_write_items(self, mock_boto3_resource):
-        """Test batch write operation"""
-        from stock_universe_api import StockUniverseManager
+        assert [r["symbol"] for r in results] == ["AAPL", "MSFT"]
+        second_call = mock_dynamodb.batch_get_item.call_args_list[1]
+        assert second_call.kwargs["RequestItems"] == unprocessed
+        assert len(sleeps) == 1
 
-        mock_table = Mock()
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
+    def test_batch_write_items(self, mock_table):
+        """Test batch write operation"""
+        mock_table.batch_writer.return_value = MagicMock()
 
         manager = StockUniverseManager()
+        manager.cache["stale"] = {"data": [], "timestamp": 0}
         items = [
             {"symbol": "AAPL", "name": "Apple"},
             {"symbol": "MSFT", "name": "Microsoft"},
         ]
-        # Note: batch_write would need to be implemented
+
+        assert manager.batch_write_items(items) == 2
+        mock_table.batch_writer.assert_called_once_with(overwrite_by_pkeys=["symbol"])
+        batch = mock_table.batch_writer.return_value.__enter__.return_value
+        assert batch.put_item.call_count == 2
+        assert manager.cache == {}
 
 
 class TestDynamoDBErrorHandling:
     """Test error handling and edge cases"""
 
-    @patch("boto3.resource")
-    def test_empty_table_returns_empty_list(self, mock_boto3_resource):
+    def test_empty_table_returns_empty_list(self, mock_table):
         """Test empty table handling"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
         mock_table.scan.return_value = {"Items": []}
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.search_stocks("AAPL")
 
         assert results == []
 
-    @patch("boto3.resource")
-    def test_missing_attributes_handled(self, mock_boto3_resource):
+    def test_missing_attributes_handled(self, mock_table):
         """Test handling of items with missing attributes"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
         mock_table.scan.return_value = {
             "Items": [
                 {"symbol": "AAPL"},  # Missing name
@@ -436,28 +600,16 @@ class TestDynamoDBErrorHandling:
             ]
         }
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.search_stocks("AAPL")
 
         # Should handle missing attributes gracefully
         assert len(results) >= 0
 
-    @patch("boto3.resource")
-    def test_dynamodb_error_returns_empty(self, mock_boto3_resource):
+    def test_dynamodb_error_returns_empty(self, mock_table):
         """Test error returns empty list"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
         mock_table.scan.side_effect = Exception("DynamoDB error")
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
         results = manager.search_stocks("AAPL")
 
@@ -469,8 +621,6 @@ class TestDynamoDBDecimalHandling:
 
     def test_decimal_serialization(self):
         """Test Decimal JSON serialization"""
-        from stock_universe_api import decimal_default
-
         value = Decimal("123.45")
         result = decimal_default(value)
 
@@ -479,8 +629,6 @@ class TestDynamoDBDecimalHandling:
 
     def test_decimal_serialization_integer(self):
         """Test Decimal serialization for integers"""
-        from stock_universe_api import decimal_default
-
         value = Decimal("1000000")
         result = decimal_default(value)
 
@@ -488,21 +636,72 @@ class TestDynamoDBDecimalHandling:
 
     def test_decimal_serialization_raises_on_invalid(self):
         """Test Decimal serialization raises error for invalid types"""
-        from stock_universe_api import decimal_default
-
         with pytest.raises(TypeError):
             decimal_default("string")
 
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_encode_response_serializes_decimals(self, use_orjson, monkeypatch):
+        """Test response encoding handles Decimals with and without orjson"""
+        if not use_orjson:
+            monkeypatch.setattr(stock_universe_api, "orjson", None)
+
+        body = {"symbol": "AAPL", "marketCap": Decimal("3000000000000.5")}
+        assert json.loads(encode_response(body)) == {
+            "symbol": "AAPL",
+            "marketCap": 3000000000000.5,
+        }
+
+    def test_decimal_encoder_rejects_unknown_types(self):
+        """Test DecimalEncoder still refuses non-JSON types"""
+        with pytest.raises(TypeError):
+            json.dumps({"value": object()}, cls=DecimalEncoder)
+
+    @pytest.mark.parametrize(
+        "number, expected",
+        [("3000000000000", 3000000000000), ("12.5", 12.5), ("1E+3", 1000.0)],
+    )
+    def test_number_deserializer_returns_native_numbers(self, number, expected):
+        """Test DynamoDB numbers unmarshal to int/float, not Decimal"""
+        value = NumberDeserializer().deserialize({"N": number})
+
+        assert value == expected
+        assert type(value) is type(expected)
+
+    def test_manager_reads_numbers_as_int_and_float(self, monkeypatch):
+        """Test items read through a real, stubbed client hold int/float"""
+        monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+        monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+        monkeypatch.setattr(
+            "boto3.resource",
+            lambda service: REAL_BOTO3_RESOURCE(service, region_name="us-east-1"),
+        )
+        manager = StockUniverseManager()
+
+        with Stubber(manager.client) as stubber:
+            stubber.add_response(
+                "get_item",
+                {
+                    "Item": {
+                        "symbol": {"S": "AAPL"},
+                        "marketCap": {"N": "3"},
+                        "peRatio": {"N": "1.5"},
+                    }
+                },
+                {"TableName": "stock-universe", "Key": {"symbol": "AAPL"}},
+            )
+            item = manager.get_stock_by_symbol("aapl")
+            stubber.assert_no_pending_responses()
+
+        assert item == {"symbol": "AAPL", "marketCap": 3, "peRatio": 1.5}
+        assert type(item["marketCap"]) is int
+        assert type(item["peRatio"]) is float
+
 
 class TestDynamoDBIntegration:
     """Integration-style tests"""
 
-    @patch("boto3.resource")
-    def test_end_to_end_workflow(self, mock_boto3_resource):
+    def test_end_to_end_workflow(self, mock_table):
         """Test complete workflow: search, filter, get popular"""
-        from stock_universe_api import StockUniverseManager
-
-        mock_table = Mock()
         all_items = [
             {
                 "symbol": "AAPL",
@@ -526,15 +725,11 @@ class TestDynamoDBIntegration:
                 "region": "US",
             },
         ]
-        mock_table.scan.return_value = {"Items": all_items}
+        mock_table.scan.side_effect = first_segment_scan(all_items)
         mock_table.query.return_value = {
             "Items": [all_items[0], all_items[1]]  # Technology stocks
         }
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
         manager = StockUniverseManager()
 
         # Search
@@ -555,6 +750,76 @@ class TestDynamoDBIntegration:
         assert "Technology" in sector_names
         assert "Financials" in sector_names
 
+        # Repeated aggregate reads are served from the manager's cache
+        scan_calls = mock_table.scan.call_count
+        query_calls = mock_table.query.call_count
+        assert manager.get_popular_stocks() == popular
+        assert manager.get_sectors() == sectors
+        assert manager.filter_stocks(sector="Technology") == tech_stocks
+        assert mock_table.scan.call_count == scan_calls
+        assert mock_table.query.call_count == query_calls
+
+    def test_cached_aggregates_expire(self, mock_table, monkeypatch):
+        """Test cached results are refreshed once the cache timeout passes"""
+        now = [1000.0]
+        monkeypatch.setattr(stock_universe_api.time, "monotonic", lambda: now[0])
+
+        mock_table.scan.side_effect = first_segment_scan([{"sector": "Technology"}])
+
+        manager = StockUniverseManager()
+        manager.get_sectors()
+        scan_calls = mock_table.scan.call_count
+
+        now[0] += manager.cache_timeout - 1
+        manager.get_sectors()
+        assert mock_table.scan.call_count == scan_calls
+
+        now[0] += 1
+        manager.get_sectors()
+        assert mock_table.scan.call_count == 2 * scan_calls
+
+    def test_cache_evicts_least_recently_used(self, mock_table):
+        """Test the cache holds at most cache_max_entries filter results"""
+        mock_table.query.return_value = {"Items": [{"symbol": "AAPL"}]}
+
+        manager = StockUniverseManager()
+        manager.cache_max_entries = 2
+        manager.filter_stocks(sector="Technology")
+        manager.filter_stocks(sector="Energy")
+        manager.filter_stocks(sector="Technology")
+        manager.filter_stocks(sector="Utilities")
+        assert len(manager.cache) == 2
+        assert mock_table.query.call_count == 3
+
+        # Energy was least recently used, so it is fetched again
+        manager.filter_stocks(sector="Technology")
+        manager.filter_stocks(sector="Energy")
+        assert mock_table.query.call_count == 4
+
+    def test_cache_purges_expired_entries_on_write(self, mock_table, monkeypatch):
+        """Test expired entries are dropped even if their key is never read"""
+        now = [1000.0]
+        monkeypatch.setattr(stock_universe_api.time, "monotonic", lambda: now[0])
+        mock_table.query.return_value = {"Items": []}
+
+        manager = StockUniverseManager()
+        manager.filter_stocks(sector="Technology")
+        now[0] += manager.cache_timeout
+        manager.filter_stocks(sector="Energy")
+
+        assert len(manager.cache) == 1
+
+    def test_cached_results_are_copies(self, mock_table):
+        """Test mutating a returned list does not corrupt later cache hits"""
+        mock_table.query.return_value = {"Items": [{"symbol": "AAPL"}]}
+
+        manager = StockUniverseManager()
+        manager.filter_stocks(sector="Technology").clear()
+        manager.filter_stocks(sector="Technology").append({"symbol": "EVIL"})
+
+        assert manager.filter_stocks(sector="Technology") == [{"symbol": "AAPL"}]
+        assert mock_table.query.call_count == 1
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -4,13 +4,12 @@ Unit Tests for JSE (Johannesburg Stock Exchange) Index Fetcher
 Tests the JSEFetcher class with mocked HTTP responses and ZAR/USD FX conversion
 """
 
-import sys
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+import numpy as np
 import pandas as pd
 
-# Add backend path for imports
-sys.path.insert(0, "/home/ubuntupunk/Projects/stock-analyzer/infrastructure/backend")
+pytestmark = pytest.mark.usefixtures("clear_jse_caches", "mock_http_session")
 
 
 class TestJSEFetcherInitialization:
@@ -104,6 +103,36 @@ class TestJSEFetcherFetchConstituents:
         mock_wiki.assert_called_once()
         mock_fallback.assert_called_once()
 
+    @patch("index_fetchers.jse_fetcher.JSEFetcher._fetch_from_wikipedia")
+    def test_fetch_constituents_skips_wiki_when_fallback_source(self, mock_wiki):
+        """Test a fallback-configured index goes straight to the static list"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        config = dict(self.test_config, dataSource="fallback")
+
+        stocks = JSEFetcher(config).fetch_constituents()
+
+        mock_wiki.assert_not_called()
+        assert stocks == JSEFetcher(config)._get_fallback()
+
+    @patch("index_fetchers.jse_fetcher.JSEFetcher._fetch_from_wikipedia")
+    def test_fetch_constituents_retries_wikipedia_after_fallback(self, mock_wiki):
+        """Test a fallback result is not reused once Wikipedia recovers"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        wiki_stocks = [
+            {"symbol": "AGL.JO", "name": "Anglo American", "sector": "Materials"}
+        ]
+        mock_wiki.side_effect = [[], wiki_stocks]
+
+        fetcher = JSEFetcher(self.test_config)
+        first = fetcher.fetch_constituents()
+        second = fetcher.fetch_constituents()
+
+        assert first == fetcher._get_fallback()
+        assert second == wiki_stocks
+        assert mock_wiki.call_count == 2
+
 
 class TestJSEFetcherFetchFromWikipedia:
     """Test _fetch_from_wikipedia method"""
@@ -145,6 +174,64 @@ class TestJSEFetcherFetchFromWikipedia:
         assert stocks[0]["region"] == "ZA"
         assert stocks[0]["currency"] == "ZAR"
 
+    @patch("pandas.read_html")
+    def test_fetch_from_wikipedia_parses_only_symbol_tables(self, mock_read_html):
+        """Test read_html gets only the constituents wikitable, parsed with lxml"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        mock_read_html.return_value = [
+            pd.DataFrame({"Symbol": ["AGL"], "Company": ["Anglo American"]})
+        ]
+
+        JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        assert mock_read_html.call_args.kwargs["flavor"] == "lxml"
+        html = mock_read_html.call_args.args[0].read()
+        assert html.startswith('<table class="wikitable">')
+        assert "infobox" not in html
+
+    def test_fetch_from_wikipedia_parses_canned_page(self):
+        """Test the XPath extractor and read_html parse a real page end to end"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        stocks = JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        assert [(s["symbol"], s["name"]) for s in stocks] == [
+            ("AGL.JO", "Anglo American")
+        ]
+
+    @patch("pandas.read_html")
+    def test_fetch_from_wikipedia_no_constituents_table(
+        self, mock_read_html, mock_http_session
+    ):
+        """Test a page without a symbol wikitable is not handed to pandas"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        mock_http_session.return_value.content = b"<html><table></table></html>"
+
+        stocks = JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        assert stocks == []
+        mock_read_html.assert_not_called()
+
+    @patch("pandas.read_html")
+    def test_fetch_from_wikipedia_uses_shared_session(
+        self, mock_read_html, mock_http_session
+    ):
+        """Test the page is downloaded over the shared keep-alive session"""
+        from index_fetchers.base import HTTP_TIMEOUT
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        mock_read_html.return_value = [
+            pd.DataFrame({"Symbol": ["AGL"], "Company": ["Anglo American"]})
+        ]
+
+        JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        assert mock_http_session.call_args.args == (self.test_config["url"],)
+        assert mock_http_session.call_args.kwargs["timeout"] == HTTP_TIMEOUT
+        mock_read_html.assert_called_once()
+
     @patch("pandas.read_html")
     def test_fetch_from_wikipedia_alternative_columns(self, mock_read_html):
         """Test Wikipedia fetch with alternative column names"""
@@ -164,6 +251,63 @@ class TestJSEFetcherFetchFromWikipedia:
         assert len(stocks) == 2
         assert stocks[0]["symbol"] == "NPN.JO"
 
+    @patch("pandas.read_html")
+    def test_fetch_from_wikipedia_case_insensitive_columns(self, mock_read_html):
+        """Test column headers are matched regardless of case"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        mock_df = pd.DataFrame(
+            {
+                "CODE": ["NPN"],
+                "company": ["Naspers"],
+                "SECTOR": ["Communication Services"],
+            }
+        )
+        mock_read_html.return_value = [mock_df]
+
+        stocks = JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        assert stocks[0]["symbol"] == "NPN.JO"
+        assert stocks[0]["name"] == "Naspers"
+        assert stocks[0]["sector"] == "Communication Services"
+
+    def test_fetch_from_wikipedia_finds_lowercase_header_table(self, mock_http_session):
+        """Test the constituents table is found when its headers change case"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        mock_http_session.return_value.content = (
+            b'<html><table class="wikitable">'
+            b"<tr><th>ticker</th><th>Name</th></tr>"
+            b"<tr><td>MTN</td><td>MTN Group</td></tr>"
+            b"</table></html>"
+        )
+
+        stocks = JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        assert [s["symbol"] for s in stocks] == ["MTN.JO"]
+
+    @patch("pandas.read_html")
+    def test_fetch_from_wikipedia_normalizes_columns(self, mock_read_html):
+        """Test missing sectors and already-suffixed symbols are normalized"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        mock_df = pd.DataFrame(
+            {
+                "Symbol": ["AGL.JO", "MTN"],
+                "Company": ["Anglo American", "MTN Group"],
+                "Sector": [float("nan"), "Communication"],
+            }
+        )
+        mock_read_html.return_value = [mock_df]
+
+        stocks = JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        assert [s["symbol"] for s in stocks] == ["AGL.JO", "MTN.JO"]
+        assert [s["sector"] for s in stocks] == ["Unknown", "Communication"]
+        assert stocks[1] == JSEFetcher(self.test_config).format_stock(
+            "MTN", "MTN Group", "Communication"
+        )
+
     @patch("pandas.read_html")
     def test_fetch_from_wikipedia_missing_symbol_column(self, mock_read_html):
         """Test handling when no symbol column found"""
@@ -194,6 +338,49 @@ class TestJSEFetcherFetchFromWikipedia:
 
         assert stocks == []
 
+    @patch("pandas.read_html")
+    def test_fetch_from_wikipedia_retries_then_succeeds(
+        self, mock_read_html, mock_http_session, monkeypatch
+    ):
+        """Test a transient connection error is retried before falling back"""
+        import requests
+        from index_fetchers import base
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        sleeps = []
+        monkeypatch.setattr(base.time, "sleep", sleeps.append)
+        mock_http_session.side_effect = [
+            requests.ConnectionError("reset"),
+            mock_http_session.return_value,
+        ]
+        mock_read_html.return_value = [
+            pd.DataFrame({"Symbol": ["AGL"], "Company": ["Anglo American"]})
+        ]
+
+        stocks = JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        assert [s["symbol"] for s in stocks] == ["AGL.JO"]
+        assert mock_http_session.call_count == 2
+        assert sleeps == [1]
+
+    def test_fetch_from_wikipedia_gives_up_after_retries(
+        self, mock_http_session, monkeypatch
+    ):
+        """Test persistent timeouts stop after HTTP_MAX_ATTEMPTS"""
+        import requests
+        from index_fetchers import base
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        sleeps = []
+        monkeypatch.setattr(base.time, "sleep", sleeps.append)
+        mock_http_session.side_effect = requests.Timeout("slow")
+
+        stocks = JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        assert stocks == []
+        assert mock_http_session.call_count == base.HTTP_MAX_ATTEMPTS
+        assert sleeps == [1, 2]
+
     @patch("pandas.read_html")
     def test_fetch_from_wikipedia_adds_jo_suffix(self, mock_read_html):
         """Test that .JO suffix is added to symbols"""
@@ -214,6 +401,58 @@ class TestJSEFetcherFetchFromWikipedia:
         for stock in stocks:
             assert stock["symbol"].endswith(".JO")
 
+    @patch("pandas.read_html")
+    def test_fetch_from_wikipedia_cached(self, mock_read_html):
+        """Test repeated fetches within the TTL reuse the parsed table"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        mock_read_html.return_value = [
+            pd.DataFrame({"Symbol": ["AGL"], "Company": ["Anglo"]})
+        ]
+
+        first = JSEFetcher(self.test_config)._fetch_from_wikipedia()
+        first[0]["name"] = "Mutated by caller"
+        second = JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        assert mock_read_html.call_count == 1
+        assert second[0]["symbol"] == "AGL.JO"
+        assert second[0]["name"] == "Anglo"
+
+    @patch("pandas.read_html")
+    def test_fetch_from_wikipedia_caches_compact_rows(self, mock_read_html):
+        """Test the cache holds frozen Stock rows and callers still get dicts"""
+        from index_fetchers import jse_fetcher
+        from index_fetchers.models import Stock
+
+        mock_read_html.return_value = [
+            pd.DataFrame({"Symbol": ["AGL"], "Company": ["Anglo"]})
+        ]
+
+        stocks = jse_fetcher.JSEFetcher(self.test_config)._fetch_from_wikipedia()
+
+        cached = jse_fetcher._WIKI_CACHE[self.test_config["url"]][1]
+        assert cached == (Stock("AGL.JO", "Anglo", "Unknown", "", "ZA", "ZAR", "JSE"),)
+        assert not hasattr(cached[0], "__dict__")
+        assert stocks == [cached[0].to_dict()]
+
+    @patch("pandas.read_html")
+    def test_fetch_from_wikipedia_cache_expires(self, mock_read_html, monkeypatch):
+        """Test the cached table is refetched after the TTL"""
+        from index_fetchers import jse_fetcher
+
+        now = [1000.0]
+        monkeypatch.setattr(jse_fetcher.time, "monotonic", lambda: now[0])
+        mock_read_html.return_value = [
+            pd.DataFrame({"Symbol": ["AGL"], "Company": ["Anglo"]})
+        ]
+
+        fetcher = jse_fetcher.JSEFetcher(self.test_config)
+        fetcher._fetch_from_wikipedia()
+        now[0] += jse_fetcher._WIKI_CACHE_TTL
+        fetcher._fetch_from_wikipedia()
+
+        assert mock_read_html.call_count == 2
+
 
 class TestJSEFetcherFallback:
     """Test fallback functionality"""
@@ -279,6 +518,20 @@ class TestJSEFetcherFallback:
         assert "Financials" in sectors
         assert "Materials" in sectors
 
+    @patch("pandas.read_html")
+    def test_fallback_is_static(self, mock_read_html):
+        """Test fallback stocks come from the module-level list, not the network"""
+        from index_fetchers import jse_fetcher
+
+        fetcher = jse_fetcher.JSEFetcher(self.test_config)
+        first = fetcher._get_fallback()
+        first[0]["name"] = "Mutated by caller"
+        second = fetcher._get_fallback()
+
+        assert len(second) == len(jse_fetcher._FALLBACK_STOCKS)
+        assert second[0]["name"] == jse_fetcher._FALLBACK_STOCKS[0][1]
+        mock_read_html.assert_not_called()
+
 
 class TestJSEFetcherFXConversion:
     """Test FX rate and currency conversion"""
@@ -325,6 +578,34 @@ class TestJSEFetcherFXConversion:
 
         assert rate == 18.60
 
+    @patch("yfinance.Ticker")
+    def test_get_fx_rate_cached(self, mock_ticker_class):
+        """Test the live rate is reused instead of refetching ticker info"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        mock_ticker_class.return_value = Mock(info={"regularMarketPrice": 18.75})
+
+        fetcher = JSEFetcher(self.test_config)
+        rates = [fetcher.get_fx_rate(), JSEFetcher(self.test_config).get_fx_rate()]
+
+        assert rates == [18.75, 18.75]
+        mock_ticker_class.assert_called_once_with("ZAR=X")
+
+    @patch("yfinance.Ticker")
+    def test_get_fx_rate_fallback_not_cached(self, mock_ticker_class):
+        """Test a failed lookup is retried on the next call"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        mock_ticker_class.side_effect = [
+            Exception("Network error"),
+            Mock(info={"regularMarketPrice": 18.75}),
+        ]
+
+        fetcher = JSEFetcher(self.test_config)
+
+        assert fetcher.get_fx_rate() == 18.50
+        assert fetcher.get_fx_rate() == 18.75
+
     @patch("yfinance.Ticker")
     def test_get_fx_rate_error_returns_default(self, mock_ticker_class):
         """Test that errors return default rate"""
@@ -356,6 +637,18 @@ class TestJSEFetcherFXConversion:
         usd = fetcher.apply_fx_conversion(0.0, 18.50)
         assert usd == 0.0
 
+    def test_apply_fx_conversion_vectorized(self):
+        """Test arrays and Series of ZAR amounts convert in one call"""
+        from index_fetchers.jse_fetcher import JSEFetcher
+
+        fetcher = JSEFetcher(self.test_config)
+
+        usd = fetcher.apply_fx_conversion(np.array([1850.0, 3700.0, 0.0]), 18.50)
+        assert np.allclose(usd, [100.0, 200.0, 0.0])
+
+        usd = fetcher.apply_fx_conversion(pd.Series([1850.0, 3700.0]), 18.50)
+        assert usd.tolist() == [100.0, 200.0]
+
 
 class TestJSEFetcherIntegration:
     """Integration-style tests"""
@@ -193,8 +193,8 @@ class TestResourceManagement:
         moduleInfo = self.manager.modules.get("testModule")
 
         # Add some mock resources
-        moduleInfo.intervals = [1, 2, 3]
-        moduleInfo.timeouts = [4, 5]
+        moduleInfo.intervals = {1, 2, 3}
+        moduleInfo.timeouts = {4, 5}
 
         with (
             patch("clearInterval") as mock_clear_interval,
@@ -204,15 +204,15 @@ class TestResourceManagement:
 
             assert mock_clear_interval.call_count == 3
             assert mock_clear_timeout.call_count == 2
-            assert moduleInfo.intervals == []
-            assert moduleInfo.timeouts == []
+            assert moduleInfo.intervals == set()
+            assert moduleInfo.timeouts == set()
 
     def test_pause_module_operations(self):
         """Test pausing module operations"""
         self.manager.registerModule("testModule", Mock())
         moduleInfo = self.manager.modules.get("testModule")
-        moduleInfo.intervals = [1, 2]
-        moduleInfo.timeouts = [3]
+        moduleInfo.intervals = {1, 2}
+        moduleInfo.timeouts = {3}
 
         with patch("clearInterval"), patch("clearTimeout"):
             self.manager.pauseModuleOperations("testModule")
@@ -4,22 +4,27 @@ Unit Tests for Russell 3000 Index Fetcher
 Tests the Russell3000Fetcher class with mocked HTTP responses and edge cases
 """
 
-import sys
 import pytest
-from unittest.mock import Mock, patch, MagicMock, mock_open
+from unittest.mock import Mock
 import pandas as pd
-import io
+from types import MappingProxyType, SimpleNamespace
 
-# Add backend path for imports
-sys.path.insert(0, "/home/ubuntupunk/Projects/stock-analyzer/infrastructure/backend")
+from index_fetchers.base import IndexFetcher
+from index_fetchers.russell_fetcher import Russell3000Fetcher
 
+# pandas.read_excel is always mocked, so the downloaded bytes are never parsed
+MOCK_EXCEL_BYTES = b"fake excel content"
 
-class TestRussell3000FetcherInitialization:
-    """Test Russell3000Fetcher initialization and configuration"""
+REQUIRED_STOCK_FIELDS = frozenset(
+    {"symbol", "name", "sector", "region", "currency", "exchange"}
+)
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.test_config = {
+
+@pytest.fixture(scope="module")
+def russell_config():
+    """Read-only Russell 3000 index config shared by every test"""
+    return MappingProxyType(
+        {
             "id": "russell3000",
             "name": "Russell 3000",
             "region": "US",
@@ -31,12 +36,41 @@ class TestRussell3000FetcherInitialization:
             "etfSymbol": "IWV",
             "fallbackUrl": "https://example.com/russell3000.xlsx",
         }
+    )
+
+
+@pytest.fixture(scope="class")
+def fallback_stocks(russell_config):
+    """Fallback stock list, built once per test class"""
+    return Russell3000Fetcher(russell_config)._get_fallback()
+
+
+@pytest.fixture
+def source_mocks(monkeypatch):
+    """Replace the three constituent sources with Mocks returning no stocks"""
+    mocks = SimpleNamespace(
+        ishares=Mock(return_value=[]),
+        excel=Mock(return_value=[]),
+        fallback=Mock(return_value=[]),
+    )
+    monkeypatch.setattr(Russell3000Fetcher, "_fetch_ishares_holdings", mocks.ishares)
+    monkeypatch.setattr(Russell3000Fetcher, "_fetch_from_excel", mocks.excel)
+    monkeypatch.setattr(Russell3000Fetcher, "_get_fallback", mocks.fallback)
+    return mocks
 
-    def test_initialization_with_valid_config(self):
-        """Test Russell3000Fetcher initializes correctly with valid config"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
 
-        fetcher = Russell3000Fetcher(self.test_config)
+@pytest.fixture(scope="class")
+def fallback_symbols(fallback_stocks):
+    """Symbols in the fallback list, for O(1) membership checks"""
+    return frozenset(stock["symbol"] for stock in fallback_stocks)
+
+
+class TestRussell3000FetcherInitialization:
+    """Test Russell3000Fetcher initialization and configuration"""
+
+    def test_initialization_with_valid_config(self, russell_config):
+        """Test Russell3000Fetcher initializes correctly with valid config"""
+        fetcher = Russell3000Fetcher(russell_config)
 
         assert fetcher.id == "russell3000"
         assert fetcher.name == "Russell 3000"
@@ -44,12 +78,9 @@ class TestRussell3000FetcherInitialization:
         assert fetcher.currency == "USD"
         assert fetcher.exchange == "NYSE"
 
-    def test_initialization_inherits_from_base(self):
+    def test_initialization_inherits_from_base(self, russell_config):
         """Test Russell3000Fetcher inherits from IndexFetcher"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-        from index_fetchers.base import IndexFetcher
-
-        fetcher = Russell3000Fetcher(self.test_config)
+        fetcher = Russell3000Fetcher(russell_config)
 
         assert isinstance(fetcher, IndexFetcher)
 
@@ -57,106 +88,39 @@ class TestRussell3000FetcherInitialization:
 class TestRussell3000FetcherFetchConstituents:
     """Test fetch_constituents method"""
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.test_config = {
-            "id": "russell3000",
-            "name": "Russell 3000",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NYSE",
-            "exchangeSuffix": "",
-            "dataSource": "ishares",
-            "url": "https://www.ishares.com/us/products/239724/ishares-russell-3000-etf",
-            "etfSymbol": "IWV",
-            "fallbackUrl": "https://example.com/russell3000.xlsx",
-        }
-
-    @patch("index_fetchers.russell_fetcher.Russell3000Fetcher._fetch_ishares_holdings")
-    def test_fetch_constituents_prefers_ishares(self, mock_ishares):
-        """Test that iShares is tried first"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        # Setup mock to return data
-        mock_ishares.return_value = [
-            {"symbol": "AAPL", "name": "Apple Inc.", "sector": "Technology"}
-        ]
-
-        fetcher = Russell3000Fetcher(self.test_config)
-        stocks = fetcher.fetch_constituents()
-
-        assert len(stocks) == 1
-        assert stocks[0]["symbol"] == "AAPL"
-        mock_ishares.assert_called_once()
-
-    @patch("index_fetchers.russell_fetcher.Russell3000Fetcher._fetch_ishares_holdings")
-    @patch("index_fetchers.russell_fetcher.Russell3000Fetcher._fetch_from_excel")
-    def test_fetch_constituents_falls_back_to_excel(self, mock_excel, mock_ishares):
-        """Test fallback to Excel when iShares fails"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        # Setup mocks
-        mock_ishares.return_value = []  # iShares fails
-        mock_excel.return_value = [
-            {"symbol": "MSFT", "name": "Microsoft", "sector": "Technology"}
-        ]
-
-        fetcher = Russell3000Fetcher(self.test_config)
-        stocks = fetcher.fetch_constituents()
-
-        assert len(stocks) == 1
-        assert stocks[0]["symbol"] == "MSFT"
-        mock_ishares.assert_called_once()
-        mock_excel.assert_called_once()
-
-    @patch("index_fetchers.russell_fetcher.Russell3000Fetcher._fetch_ishares_holdings")
-    @patch("index_fetchers.russell_fetcher.Russell3000Fetcher._fetch_from_excel")
-    @patch("index_fetchers.russell_fetcher.Russell3000Fetcher._get_fallback")
-    def test_fetch_constituents_falls_back_to_fallback(
-        self, mock_fallback, mock_excel, mock_ishares
+    @pytest.mark.parametrize(
+        "source, symbol, expected_calls",
+        [
+            ("ishares", "AAPL", (1, 0, 0)),  # iShares is tried first
+            ("excel", "MSFT", (1, 1, 0)),  # Excel when iShares fails
+            ("fallback", "GOOGL", (1, 1, 1)),  # Hardcoded list when both fail
+        ],
+    )
+    def test_fetch_constituents_source_order(
+        self, source_mocks, russell_config, source, symbol, expected_calls
     ):
-        """Test fallback to hardcoded list when both sources fail"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        # Setup mocks to fail
-        mock_ishares.return_value = []
-        mock_excel.return_value = []
-        mock_fallback.return_value = [
-            {"symbol": "GOOGL", "name": "Alphabet", "sector": "Communication"}
+        """Test each source is only tried when the ones before it fail"""
+        getattr(source_mocks, source).return_value = [
+            {"symbol": symbol, "name": symbol, "sector": "Technology"}
         ]
 
-        fetcher = Russell3000Fetcher(self.test_config)
-        stocks = fetcher.fetch_constituents()
+        stocks = Russell3000Fetcher(russell_config).fetch_constituents()
 
-        assert len(stocks) == 1
-        assert stocks[0]["symbol"] == "GOOGL"
-        mock_ishares.assert_called_once()
-        mock_excel.assert_called_once()
-        mock_fallback.assert_called_once()
+        assert [s["symbol"] for s in stocks] == [symbol]
+        calls = (
+            source_mocks.ishares.call_count,
+            source_mocks.excel.call_count,
+            source_mocks.fallback.call_count,
+        )
+        assert calls == expected_calls
 
 
 class TestRussell3000FetcherFetchIshares:
     """Test _fetch_ishares_holdings method"""
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.test_config = {
-            "id": "russell3000",
-            "name": "Russell 3000",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NYSE",
-            "exchangeSuffix": "",
-            "dataSource": "ishares",
-            "url": "https://www.ishares.com/us/products/239724/ishares-russell-3000-etf",
-            "etfSymbol": "IWV",
-        }
-
-    def test_fetch_ishares_returns_empty(self):
+    def test_fetch_ishares_returns_empty(self, russell_config):
         """Test that iShares fetcher returns empty (requires JavaScript)"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        fetcher = Russell3000Fetcher(self.test_config)
+        fetcher = Russell3000Fetcher(russell_config)
         stocks = fetcher._fetch_ishares_holdings()
 
         # Currently returns empty list because iShares requires JavaScript
@@ -166,177 +130,76 @@ class TestRussell3000FetcherFetchIshares:
 class TestRussell3000FetcherFetchFromExcel:
     """Test _fetch_from_excel method"""
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.test_config = {
-            "id": "russell3000",
-            "name": "Russell 3000",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NYSE",
-            "exchangeSuffix": "",
-            "dataSource": "excel",
-            "url": "https://example.com/russell3000.xlsx",
-            "fallbackUrl": "https://example.com/russell3000.xlsx",
-        }
-
-    def create_mock_excel_data(self):
-        """Create mock Excel data as bytes"""
-        import pandas as pd
-
-        df = pd.DataFrame(
-            {
-                "Symbol": ["AAPL", "MSFT", "GOOGL", ""],
-                "Name": ["Apple Inc.", "Microsoft Corp.", "Alphabet Inc.", "Header"],
-            }
+    @pytest.fixture
+    def excel_mocks(self, monkeypatch):
+        """Wire requests.get to a canned response and mock pandas.read_excel"""
+        response = SimpleNamespace(
+            content=MOCK_EXCEL_BYTES, raise_for_status=lambda: None
         )
+        mocks = SimpleNamespace(get=Mock(return_value=response), read_excel=Mock())
+        monkeypatch.setattr("requests.get", mocks.get)
+        monkeypatch.setattr("pandas.read_excel", mocks.read_excel)
+        return mocks
 
-        excel_buffer = io.BytesIO()
-        df.to_excel(excel_buffer, index=False)
-        return excel_buffer.getvalue()
-
-    @patch("requests.get")
-    @patch("pandas.read_excel")
-    def test_fetch_from_excel_success(self, mock_read_excel, mock_get):
+    def test_fetch_from_excel_success(self, excel_mocks, russell_config):
         """Test successful Excel download and parsing"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        # Setup mock response
-        mock_response = Mock()
-        mock_response.content = b"fake excel content"
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
-
-        # Setup mock pandas
-        mock_df = pd.DataFrame(
-            {
-                "Symbol": ["AAPL", "MSFT", "GOOGL", ""],
-            }
+        excel_mocks.read_excel.return_value = pd.DataFrame(
+            {"Symbol": ["AAPL", "MSFT", "GOOGL", ""]}
         )
-        mock_read_excel.return_value = mock_df
 
-        fetcher = Russell3000Fetcher(self.test_config)
-        stocks = fetcher._fetch_from_excel()
+        stocks = Russell3000Fetcher(russell_config)._fetch_from_excel()
 
         # Should return stocks (excluding empty symbol)
-        assert len(stocks) == 3
-        symbols = [s["symbol"] for s in stocks]
-        assert "AAPL" in symbols
-        assert "MSFT" in symbols
-        assert "GOOGL" in symbols
-
-    @patch("requests.get")
-    def test_fetch_from_excel_no_url(self, mock_get):
-        """Test returns empty when no fallback URL configured"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
+        assert [s["symbol"] for s in stocks] == ["AAPL", "MSFT", "GOOGL"]
 
+    def test_fetch_from_excel_no_url(self, excel_mocks, russell_config):
+        """Test returns empty when no fallback URL configured"""
         # Config with all required fields but no fallbackUrl
         config_without_fallback_url = {
-            "id": "russell3000",
-            "name": "Russell 3000",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NYSE",
-            "exchangeSuffix": "",
-            "dataSource": "excel",
-            "url": "https://example.com/russell3000",
-            # Note: no fallbackUrl
+            key: value for key, value in russell_config.items() if key != "fallbackUrl"
         }
 
-        fetcher = Russell3000Fetcher(config_without_fallback_url)
-        stocks = fetcher._fetch_from_excel()
+        stocks = Russell3000Fetcher(config_without_fallback_url)._fetch_from_excel()
 
         assert stocks == []
-        mock_get.assert_not_called()
+        excel_mocks.get.assert_not_called()
 
-    @patch("requests.get")
-    def test_fetch_from_excel_network_error(self, mock_get):
+    def test_fetch_from_excel_network_error(self, excel_mocks, russell_config):
         """Test handling of network errors"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        mock_get.side_effect = Exception("Connection timeout")
+        excel_mocks.get.side_effect = Exception("Connection timeout")
 
-        fetcher = Russell3000Fetcher(self.test_config)
-        stocks = fetcher._fetch_from_excel()
+        stocks = Russell3000Fetcher(russell_config)._fetch_from_excel()
 
         assert stocks == []
 
-    @patch("requests.get")
-    @patch("pandas.read_excel")
-    def test_fetch_from_excel_missing_symbol_column(self, mock_read_excel, mock_get):
+    def test_fetch_from_excel_missing_symbol_column(self, excel_mocks, russell_config):
         """Test handling of Excel without Symbol column"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        # Setup mock response
-        mock_response = Mock()
-        mock_response.content = b"fake excel content"
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
-
-        # Setup mock pandas with wrong column
-        mock_df = pd.DataFrame(
-            {
-                "WrongColumn": ["AAPL", "MSFT"],
-            }
+        excel_mocks.read_excel.return_value = pd.DataFrame(
+            {"WrongColumn": ["AAPL", "MSFT"]}
         )
-        mock_read_excel.return_value = mock_df
 
-        fetcher = Russell3000Fetcher(self.test_config)
-        stocks = fetcher._fetch_from_excel()
+        stocks = Russell3000Fetcher(russell_config)._fetch_from_excel()
 
         assert stocks == []
 
-    @patch("requests.get")
-    @patch("pandas.read_excel")
-    def test_fetch_from_excel_skips_header_rows(self, mock_read_excel, mock_get):
+    def test_fetch_from_excel_skips_header_rows(self, excel_mocks, russell_config):
         """Test that header rows are skipped"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        # Setup mock response
-        mock_response = Mock()
-        mock_response.content = b"fake excel content"
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
-
-        # Setup mock pandas with header row
-        mock_df = pd.DataFrame(
-            {
-                "Symbol": ["AAPL", "symbol", "MSFT"],  # 'symbol' is header row
-            }
+        # 'symbol' is a repeated header row
+        excel_mocks.read_excel.return_value = pd.DataFrame(
+            {"Symbol": ["AAPL", "symbol", "MSFT"]}
         )
-        mock_read_excel.return_value = mock_df
 
-        fetcher = Russell3000Fetcher(self.test_config)
-        stocks = fetcher._fetch_from_excel()
+        stocks = Russell3000Fetcher(russell_config)._fetch_from_excel()
 
-        # Should skip the 'symbol' header row
-        symbols = [s["symbol"] for s in stocks]
-        assert "AAPL" in symbols
-        assert "MSFT" in symbols
-        assert "symbol" not in symbols
+        assert [s["symbol"] for s in stocks] == ["AAPL", "MSFT"]
 
 
 class TestRussell3000FetcherFallback:
     """Test fallback functionality"""
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.test_config = {
-            "id": "russell3000",
-            "name": "Russell 3000",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NYSE",
-            "exchangeSuffix": "",
-            "dataSource": "fallback",
-            "url": "https://example.com/fallback",
-        }
-
-    def test_fallback_returns_valid_stocks(self):
+    def test_fallback_returns_valid_stocks(self, russell_config):
         """Test that fallback method returns properly formatted stocks"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        fetcher = Russell3000Fetcher(self.test_config)
+        fetcher = Russell3000Fetcher(russell_config)
         stocks = fetcher._get_fallback()
 
         # Check structure
@@ -354,79 +217,36 @@ class TestRussell3000FetcherFallback:
             assert stock["region"] == "US"
             assert stock["currency"] == "USD"
 
-    def test_fallback_includes_mixed_cap_stocks(self):
-        """Test that fallback includes large, mid, and small cap stocks"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        fetcher = Russell3000Fetcher(self.test_config)
-        stocks = fetcher._get_fallback()
-
-        symbols = [s["symbol"] for s in stocks]
-
-        # Check for mega/large cap
-        assert "AAPL" in symbols
-        assert "MSFT" in symbols
-
-        # Check for mid cap
-        assert "PLTR" in symbols
-        assert "SNOW" in symbols
-
-        # Check for small cap
-        assert "HOOD" in symbols
-        assert "LCID" in symbols
-
-    def test_fallback_stock_count(self):
+    def test_fallback_stock_count(self, fallback_stocks):
         """Test that fallback has reasonable number of stocks"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        fetcher = Russell3000Fetcher(self.test_config)
-        stocks = fetcher._get_fallback()
-
         # Should have at least 20 stocks
-        assert len(stocks) >= 20
-
-    def test_fallback_normalizes_symbols(self):
-        """Test that fallback normalizes symbols correctly"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        fetcher = Russell3000Fetcher(self.test_config)
-        stocks = fetcher._get_fallback()
-
-        symbols = [s["symbol"] for s in stocks]
-
-        # BRK-B should be normalized
-        assert "BRK-B" in symbols
-        assert "BRK.B" not in symbols
+        assert len(fallback_stocks) >= 20
+
+    @pytest.mark.parametrize(
+        "symbol, present",
+        [
+            ("AAPL", True),  # Mega/large cap
+            ("MSFT", True),
+            ("PLTR", True),  # Mid cap
+            ("SNOW", True),
+            ("HOOD", True),  # Small cap
+            ("LCID", True),
+            ("BRK-B", True),  # Normalized to the yfinance form
+            ("BRK.B", False),
+        ],
+    )
+    def test_fallback_symbols(self, fallback_symbols, symbol, present):
+        """Test fallback mixes cap sizes and normalizes symbols"""
+        assert (symbol in fallback_symbols) is present
 
 
 class TestRussell3000FetcherIntegration:
     """Integration-style tests"""
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.test_config = {
-            "id": "russell3000",
-            "name": "Russell 3000",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NYSE",
-            "exchangeSuffix": "",
-            "dataSource": "ishares",
-            "url": "https://www.ishares.com/us/products/239724/ishares-russell-3000-etf",
-            "fallbackUrl": "https://example.com/russell3000.xlsx",
-        }
-
-    @patch("index_fetchers.russell_fetcher.Russell3000Fetcher._fetch_ishares_holdings")
-    @patch("index_fetchers.russell_fetcher.Russell3000Fetcher._fetch_from_excel")
-    @patch("index_fetchers.russell_fetcher.Russell3000Fetcher._get_fallback")
-    def test_full_fallback_chain(self, mock_fallback, mock_excel, mock_ishares):
+    def test_full_fallback_chain(self, source_mocks, russell_config):
         """Test complete fallback chain"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
         # All sources fail
-        mock_ishares.return_value = []
-        mock_excel.return_value = []
-        mock_fallback.return_value = [
+        source_mocks.fallback.return_value = [
             {
                 "symbol": "AAPL",
                 "name": "Apple",
@@ -437,7 +257,7 @@ class TestRussell3000FetcherIntegration:
             },
         ]
 
-        fetcher = Russell3000Fetcher(self.test_config)
+        fetcher = Russell3000Fetcher(russell_config)
         stocks = fetcher.fetch_constituents()
 
         # Should get fallback data
@@ -445,23 +265,20 @@ class TestRussell3000FetcherIntegration:
         assert stocks[0]["symbol"] == "AAPL"
 
         # Verify all methods were called in order
-        mock_ishares.assert_called_once()
-        mock_excel.assert_called_once()
-        mock_fallback.assert_called_once()
+        source_mocks.ishares.assert_called_once()
+        source_mocks.excel.assert_called_once()
+        source_mocks.fallback.assert_called_once()
 
-    def test_stock_structure_consistency(self):
+    def test_stock_structure_consistency(self, fallback_stocks):
         """Test that all stocks have consistent structure regardless of source"""
-        from index_fetchers.russell_fetcher import Russell3000Fetcher
-
-        fetcher = Russell3000Fetcher(self.test_config)
-        fallback_stocks = fetcher._get_fallback()
-
-        required_fields = {"symbol", "name", "sector", "region", "currency", "exchange"}
-
-        for stock in fallback_stocks:
-            assert required_fields.issubset(stock.keys())
-            assert stock["region"] == "US"
-            assert stock["currency"] == "USD"
+        incomplete = [
+            stock for stock in fallback_stocks if REQUIRED_STOCK_FIELDS - stock.keys()
+        ]
+        assert incomplete == []
+        assert all(
+            stock["region"] == "US" and stock["currency"] == "USD"
+            for stock in fallback_stocks
+        )
 
 
 if __name__ == "__main__":
@@ -4,21 +4,24 @@ Unit Tests for SP500 Index Fetcher
 Tests the SP500Fetcher class with mocked HTTP responses and edge cases
 """
 
-import sys
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 import pandas as pd
+from types import MappingProxyType
 
-# Add backend path for imports
-sys.path.insert(0, "/home/ubuntupunk/Projects/stock-analyzer/infrastructure/backend")
+from index_fetchers.base import IndexFetcher
+from index_fetchers.sp500_fetcher import SP500Fetcher
 
+REQUIRED_STOCK_FIELDS = frozenset(
+    {"symbol", "name", "sector", "subSector", "region", "currency", "exchange"}
+)
 
-class TestSP500FetcherInitialization:
-    """Test SP500Fetcher initialization and configuration"""
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.test_config = {
+@pytest.fixture(scope="module")
+def sp500_config():
+    """Read-only S&P 500 index config shared by every test"""
+    return MappingProxyType(
+        {
             "id": "sp500",
             "name": "S&P 500",
             "region": "US",
@@ -28,12 +31,123 @@ class TestSP500FetcherInitialization:
             "dataSource": "wikipedia",
             "url": "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies",
         }
+    )
+
+
+@pytest.fixture(scope="module")
+def sp500_fetcher(sp500_config):
+    """SP500Fetcher shared by tests that only read its fallback data"""
+    return SP500Fetcher(sp500_config)
+
+
+@pytest.fixture
+def mock_read_html():
+    """Patch pandas.read_html, which SP500Fetcher uses to read Wikipedia"""
+    with patch("pandas.read_html") as mock:
+        yield mock
+
+
+@pytest.fixture(scope="session")
+def wiki_df_basic():
+    """Three-row Wikipedia S&P 500 table with every column"""
+    return pd.DataFrame(
+        {
+            "Symbol": ["AAPL", "MSFT", "GOOGL"],
+            "Security": ["Apple Inc.", "Microsoft Corporation", "Alphabet Inc."],
+            "GICS Sector": [
+                "Information Technology",
+                "Information Technology",
+                "Communication Services",
+            ],
+            "GICS Sub-Industry": [
+                "Technology Hardware, Storage & Peripherals",
+                "Software",
+                "Interactive Media & Services",
+            ],
+            "Headquarters Location": [
+                "Cupertino, California",
+                "Redmond, Washington",
+                "Mountain View, California",
+            ],
+            "Date added": ["1982-11-30", "1994-06-01", "2006-04-03"],
+            "CIK": ["0000320193", "0000789019", "0001652044"],
+            "Founded": ["1977", "1975", "1998"],
+        }
+    )
+
+
+@pytest.fixture(scope="session")
+def wiki_df_brk():
+    """Share classes whose dotted symbols need normalizing"""
+    return pd.DataFrame(
+        {
+            "Symbol": ["BRK.B", "BF.B"],
+            "Security": ["Berkshire Hathaway", "Brown-Forman"],
+            "GICS Sector": ["Financials", "Consumer Staples"],
+            "GICS Sub-Industry": ["Insurance", "Beverages"],
+            "Headquarters Location": ["Omaha, Nebraska", "Louisville, Kentucky"],
+        }
+    )
+
+
+@pytest.fixture(scope="session")
+def wiki_df_nan_hq():
+    """Single row with a missing headquarters location"""
+    return pd.DataFrame(
+        {
+            "Symbol": ["AAPL"],
+            "Security": ["Apple Inc."],
+            "GICS Sector": ["Information Technology"],
+            "GICS Sub-Industry": ["Software"],
+            "Headquarters Location": [float("nan")],
+        }
+    )
+
+
+@pytest.fixture(scope="session")
+def wiki_df_empty():
+    """Wikipedia table with headers but no rows"""
+    return pd.DataFrame(
+        {
+            "Symbol": [],
+            "Security": [],
+            "GICS Sector": [],
+            "GICS Sub-Industry": [],
+            "Headquarters Location": [],
+        }
+    )
+
+
+@pytest.fixture(scope="session")
+def wiki_df_missing_cols():
+    """Table lacking the columns the fetcher reads"""
+    return pd.DataFrame({"Symbol": ["AAPL"], "WrongColumn": ["Test"]})
+
+
+@pytest.fixture(scope="session")
+def wiki_df_pipeline():
+    """Realistic table for the end-to-end pipeline test"""
+    return pd.DataFrame(
+        {
+            "Symbol": ["AAPL", "MSFT", "BRK.B"],
+            "Security": ["Apple Inc.", "Microsoft Corp.", "Berkshire Hathaway"],
+            "GICS Sector": [
+                "Information Technology",
+                "Information Technology",
+                "Financials",
+            ],
+            "GICS Sub-Industry": ["Software", "Software", "Insurance"],
+            "Headquarters Location": ["Cupertino, CA", "Redmond, WA", "Omaha, NE"],
+        }
+    )
 
-    def test_initialization_with_valid_config(self):
-        """Test SP500Fetcher initializes correctly with valid config"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
 
-        fetcher = SP500Fetcher(self.test_config)
+class TestSP500FetcherInitialization:
+    """Test SP500Fetcher initialization and configuration"""
+
+    def test_initialization_with_valid_config(self, sp500_config):
+        """Test SP500Fetcher initializes correctly with valid config"""
+        fetcher = SP500Fetcher(sp500_config)
 
         assert fetcher.id == "sp500"
         assert fetcher.name == "S&P 500"
@@ -44,12 +158,9 @@ class TestSP500FetcherInitialization:
             fetcher.url == "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
         )
 
-    def test_initialization_inherits_from_base(self):
+    def test_initialization_inherits_from_base(self, sp500_config):
         """Test SP500Fetcher inherits from IndexFetcher"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-        from index_fetchers.base import IndexFetcher
-
-        fetcher = SP500Fetcher(self.test_config)
+        fetcher = SP500Fetcher(sp500_config)
 
         assert isinstance(fetcher, IndexFetcher)
 
@@ -57,56 +168,13 @@ class TestSP500FetcherInitialization:
 class TestSP500FetcherFetchConstituents:
     """Test fetch_constituents method"""
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.test_config = {
-            "id": "sp500",
-            "name": "S&P 500",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NYSE",
-            "exchangeSuffix": "",
-            "dataSource": "wikipedia",
-            "url": "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies",
-        }
-
-    def create_mock_wikipedia_data(self):
-        """Create mock Wikipedia table data"""
-        return pd.DataFrame(
-            {
-                "Symbol": ["AAPL", "MSFT", "GOOGL"],
-                "Security": ["Apple Inc.", "Microsoft Corporation", "Alphabet Inc."],
-                "GICS Sector": [
-                    "Information Technology",
-                    "Information Technology",
-                    "Communication Services",
-                ],
-                "GICS Sub-Industry": [
-                    "Technology Hardware, Storage & Peripherals",
-                    "Software",
-                    "Interactive Media & Services",
-                ],
-                "Headquarters Location": [
-                    "Cupertino, California",
-                    "Redmond, Washington",
-                    "Mountain View, California",
-                ],
-                "Date added": ["1982-11-30", "1994-06-01", "2006-04-03"],
-                "CIK": ["0000320193", "0000789019", "0001652044"],
-                "Founded": ["1977", "1975", "1998"],
-            }
-        )
-
-    @patch("pandas.read_html")
-    def test_fetch_constituents_success(self, mock_read_html):
+    def test_fetch_constituents_success(
+        self, mock_read_html, sp500_config, wiki_df_basic
+    ):
         """Test successful fetch from Wikipedia"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        # Setup mock
-        mock_df = self.create_mock_wikipedia_data()
-        mock_read_html.return_value = [mock_df]
+        mock_read_html.return_value = [wiki_df_basic]
 
-        fetcher = SP500Fetcher(self.test_config)
+        fetcher = SP500Fetcher(sp500_config)
         stocks = fetcher.fetch_constituents()
 
         # Assertions
@@ -122,202 +190,116 @@ class TestSP500FetcherFetchConstituents:
 
         mock_read_html.assert_called_once()
 
-    @patch("pandas.read_html")
-    def test_fetch_constituents_normalizes_symbols(self, mock_read_html):
+    def test_fetch_constituents_normalizes_symbols(
+        self, mock_read_html, sp500_config, wiki_df_brk
+    ):
         """Test that symbols with dots are normalized to hyphens"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        # Setup mock with BRK.B
-        mock_df = pd.DataFrame(
-            {
-                "Symbol": ["BRK.B", "BF.B"],
-                "Security": ["Berkshire Hathaway", "Brown-Forman"],
-                "GICS Sector": ["Financials", "Consumer Staples"],
-                "GICS Sub-Industry": ["Insurance", "Beverages"],
-                "Headquarters Location": ["Omaha, Nebraska", "Louisville, Kentucky"],
-            }
-        )
-        mock_read_html.return_value = [mock_df]
+        mock_read_html.return_value = [wiki_df_brk]
 
-        fetcher = SP500Fetcher(self.test_config)
+        fetcher = SP500Fetcher(sp500_config)
         stocks = fetcher.fetch_constituents()
 
         # Symbols should have dots replaced with hyphens
         assert stocks[0]["symbol"] == "BRK-B"
         assert stocks[1]["symbol"] == "BF-B"
 
-    @patch("pandas.read_html")
-    def test_fetch_constituents_handles_nan_headquarters(self, mock_read_html):
+    def test_fetch_constituents_handles_nan_headquarters(
+        self, mock_read_html, sp500_config, wiki_df_nan_hq
+    ):
         """Test handling of NaN values in headquarters column"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        # Setup mock with NaN headquarters
-        mock_df = pd.DataFrame(
-            {
-                "Symbol": ["AAPL"],
-                "Security": ["Apple Inc."],
-                "GICS Sector": ["Information Technology"],
-                "GICS Sub-Industry": ["Software"],
-                "Headquarters Location": [float("nan")],
-            }
-        )
-        mock_read_html.return_value = [mock_df]
+        mock_read_html.return_value = [wiki_df_nan_hq]
 
-        fetcher = SP500Fetcher(self.test_config)
+        fetcher = SP500Fetcher(sp500_config)
         stocks = fetcher.fetch_constituents()
 
         # Should not include headquarters key when value is NaN
         assert "headquarters" not in stocks[0]
 
-    @patch("pandas.read_html")
-    def test_fetch_constituents_empty_response(self, mock_read_html):
+    def test_fetch_constituents_empty_response(
+        self, mock_read_html, sp500_config, wiki_df_empty
+    ):
         """Test handling of empty Wikipedia table"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        # Setup mock with empty table
-        mock_df = pd.DataFrame(
-            {
-                "Symbol": [],
-                "Security": [],
-                "GICS Sector": [],
-                "GICS Sub-Industry": [],
-                "Headquarters Location": [],
-            }
-        )
-        mock_read_html.return_value = [mock_df]
+        mock_read_html.return_value = [wiki_df_empty]
 
-        fetcher = SP500Fetcher(self.test_config)
+        fetcher = SP500Fetcher(sp500_config)
         stocks = fetcher.fetch_constituents()
 
         # Should return empty list
         assert stocks == []
 
-    @patch("pandas.read_html")
-    def test_fetch_constituents_network_error(self, mock_read_html):
-        """Test handling of network errors"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        # Setup mock to raise exception
-        mock_read_html.side_effect = Exception("Connection timeout")
-
-        fetcher = SP500Fetcher(self.test_config)
+    @pytest.mark.parametrize(
+        "failure",
+        [
+            Exception("Connection timeout"),
+            ValueError("No tables found"),
+            "wiki_df_missing_cols",
+        ],
+        ids=["network_error", "malformed_html", "missing_columns"],
+    )
+    def test_fetch_constituents_falls_back(
+        self, mock_read_html, failure, request, sp500_config
+    ):
+        """Test that network errors, bad HTML and missing columns use the fallback"""
+        if isinstance(failure, Exception):
+            mock_read_html.side_effect = failure
+        else:
+            mock_read_html.return_value = [request.getfixturevalue(failure)]
+
+        fetcher = SP500Fetcher(sp500_config)
         stocks = fetcher.fetch_constituents()
 
-        # Should return fallback data
-        assert len(stocks) > 0
-        assert stocks[0]["symbol"] == "AAPL"  # First fallback stock
-
-    @patch("pandas.read_html")
-    def test_fetch_constituents_malformed_html(self, mock_read_html):
-        """Test handling of malformed HTML"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        # Setup mock to raise exception
-        mock_read_html.side_effect = ValueError("No tables found")
-
-        fetcher = SP500Fetcher(self.test_config)
-        stocks = fetcher.fetch_constituents()
-
-        # Should return fallback data
-        assert len(stocks) > 0
-
-    @patch("pandas.read_html")
-    def test_fetch_constituents_missing_columns(self, mock_read_html):
-        """Test handling of missing required columns - falls back gracefully"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        # Setup mock with missing columns
-        mock_df = pd.DataFrame({"Symbol": ["AAPL"], "WrongColumn": ["Test"]})
-        mock_read_html.return_value = [mock_df]
-
-        fetcher = SP500Fetcher(self.test_config)
-
-        # Should fallback gracefully instead of raising KeyError
-        stocks = fetcher.fetch_constituents()
+        # Should return fallback data, AAPL first
         assert len(stocks) > 0
-        # Verify we got fallback data (AAPL should be in fallback)
-        symbols = [s["symbol"] for s in stocks]
-        assert "AAPL" in symbols
+        assert stocks[0]["symbol"] == "AAPL"
 
-    def test_fetch_constituents_uses_correct_headers(self):
+    def test_fetch_constituents_uses_correct_headers(
+        self, mock_read_html, sp500_config, wiki_df_basic
+    ):
         """Test that proper User-Agent headers are sent"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        with patch("pandas.read_html") as mock_read_html:
-            mock_df = self.create_mock_wikipedia_data()
-            mock_read_html.return_value = [mock_df]
+        mock_read_html.return_value = [wiki_df_basic]
 
-            fetcher = SP500Fetcher(self.test_config)
-            fetcher.fetch_constituents()
+        fetcher = SP500Fetcher(sp500_config)
+        fetcher.fetch_constituents()
 
-            # Check that headers were passed
-            call_args = mock_read_html.call_args
-            assert "storage_options" in call_args.kwargs
-            headers = call_args.kwargs["storage_options"]
-            assert "User-Agent" in headers
-            assert "Mozilla/5.0" in headers["User-Agent"]
+        # Check that headers were passed
+        call_args = mock_read_html.call_args
+        assert "storage_options" in call_args.kwargs
+        headers = call_args.kwargs["storage_options"]
+        assert "User-Agent" in headers
+        assert "Mozilla/5.0" in headers["User-Agent"]
 
 
 class TestSP500FetcherFallback:
     """Test fallback functionality"""
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.test_config = {
-            "id": "sp500",
-            "name": "S&P 500",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NYSE",
-            "exchangeSuffix": "",
-            "dataSource": "wikipedia",
-            "url": "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies",
-        }
-
-    def test_fallback_returns_valid_stocks(self):
+    def test_fallback_returns_valid_stocks(self, sp500_fetcher):
         """Test that fallback method returns properly formatted stocks"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
+        stocks = sp500_fetcher._get_fallback()
 
-        fetcher = SP500Fetcher(self.test_config)
-        stocks = fetcher._get_fallback()
+        frame = pd.DataFrame(stocks)
 
-        # Check structure
-        assert len(stocks) > 0
-        for stock in stocks:
-            assert "symbol" in stock
-            assert "name" in stock
-            assert "sector" in stock
-            assert "subSector" in stock
-            assert "region" in stock
-            assert "currency" in stock
-            assert "exchange" in stock
-
-            assert isinstance(stock["symbol"], str)
-            assert isinstance(stock["name"], str)
-            assert stock["region"] == "US"
-            assert stock["currency"] == "USD"
+        # Check structure: every stock carries every required field
+        assert not frame.empty
+        assert REQUIRED_STOCK_FIELDS <= set(frame.columns)
+        assert frame[sorted(REQUIRED_STOCK_FIELDS)].notna().all(axis=None)
 
-    def test_fallback_includes_major_stocks(self):
-        """Test that fallback includes major S&P 500 stocks"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
+        assert frame["symbol"].map(type).eq(str).all()
+        assert frame["name"].map(type).eq(str).all()
+        assert frame["region"].eq("US").all()
+        assert frame["currency"].eq("USD").all()
 
-        fetcher = SP500Fetcher(self.test_config)
-        stocks = fetcher._get_fallback()
+    def test_fallback_includes_major_stocks(self, sp500_fetcher):
+        """Test that fallback includes major S&P 500 stocks"""
+        stocks = sp500_fetcher._get_fallback()
 
-        symbols = [s["symbol"] for s in stocks]
+        symbols = {s["symbol"] for s in stocks}
 
         # Check for major stocks
-        assert "AAPL" in symbols
-        assert "MSFT" in symbols
-        assert "GOOGL" in symbols
-        assert "AMZN" in symbols
+        assert {"AAPL", "MSFT", "GOOGL", "AMZN"} <= symbols
 
-    def test_fallback_normalizes_symbols(self):
+    def test_fallback_normalizes_symbols(self, sp500_fetcher):
         """Test that fallback normalizes symbols correctly"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        fetcher = SP500Fetcher(self.test_config)
-        stocks = fetcher._get_fallback()
+        stocks = sp500_fetcher._get_fallback()
 
         symbols = [s["symbol"] for s in stocks]
 
@@ -325,14 +307,11 @@ class TestSP500FetcherFallback:
         assert "BRK-B" in symbols
         assert "BRK.B" not in symbols
 
-    @patch("pandas.read_html")
-    def test_fallback_called_on_exception(self, mock_read_html):
+    def test_fallback_called_on_exception(self, mock_read_html, sp500_config):
         """Test that fallback is called when fetch fails"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
         mock_read_html.side_effect = Exception("Network error")
 
-        fetcher = SP500Fetcher(self.test_config)
+        fetcher = SP500Fetcher(sp500_config)
 
         with patch.object(fetcher, "_get_fallback") as mock_fallback:
             mock_fallback.return_value = [{"symbol": "TEST"}]
@@ -345,41 +324,13 @@ class TestSP500FetcherFallback:
 class TestSP500FetcherIntegration:
     """Integration-style tests"""
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.test_config = {
-            "id": "sp500",
-            "name": "S&P 500",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NYSE",
-            "exchangeSuffix": "",
-            "dataSource": "wikipedia",
-            "url": "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies",
-        }
-
-    @patch("pandas.read_html")
-    def test_full_fetch_and_format_pipeline(self, mock_read_html):
+    def test_full_fetch_and_format_pipeline(
+        self, mock_read_html, sp500_config, wiki_df_pipeline
+    ):
         """Test complete fetch and format pipeline"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        # Create realistic mock data
-        mock_df = pd.DataFrame(
-            {
-                "Symbol": ["AAPL", "MSFT", "BRK.B"],
-                "Security": ["Apple Inc.", "Microsoft Corp.", "Berkshire Hathaway"],
-                "GICS Sector": [
-                    "Information Technology",
-                    "Information Technology",
-                    "Financials",
-                ],
-                "GICS Sub-Industry": ["Software", "Software", "Insurance"],
-                "Headquarters Location": ["Cupertino, CA", "Redmond, WA", "Omaha, NE"],
-            }
-        )
-        mock_read_html.return_value = [mock_df]
+        mock_read_html.return_value = [wiki_df_pipeline]
 
-        fetcher = SP500Fetcher(self.test_config)
+        fetcher = SP500Fetcher(sp500_config)
         stocks = fetcher.fetch_constituents()
 
         # Verify all data is properly formatted
@@ -399,12 +350,9 @@ class TestSP500FetcherIntegration:
         brk = next(s for s in stocks if s["symbol"] == "BRK-B")
         assert brk["name"] == "Berkshire Hathaway"
 
-    def test_stock_count_consistency(self):
+    def test_stock_count_consistency(self, sp500_fetcher):
         """Test that fallback has reasonable number of stocks"""
-        from index_fetchers.sp500_fetcher import SP500Fetcher
-
-        fetcher = SP500Fetcher(self.test_config)
-        fallback_stocks = fetcher._get_fallback()
+        fallback_stocks = sp500_fetcher._get_fallback()
 
         # Fallback should have at least 30 stocks
         assert len(fallback_stocks) >= 30
@@ -12,220 +12,255 @@ Tests the complete stock universe seeding workflow:
 Uses mocked boto3 and yfinance to avoid external dependencies.
 """
 
-import sys
+import boto3
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, MagicMock
 from datetime import datetime
 from decimal import Decimal
 import json
+from types import MappingProxyType
 
-# Add backend path for imports
-sys.path.insert(0, "/home/ubuntupunk/Projects/stock-analyzer/infrastructure/backend")
+from stock_universe_seed import StockUniverseSeeder
 
+REQUIRED_ITEM_FIELDS = frozenset(
+    {
+        "symbol",
+        "name",
+        "nameLower",
+        "sector",
+        "region",
+        "currency",
+        "exchange",
+        "indexId",
+        "indexIds",
+        "marketCap",
+        "marketCapUSD",
+        "marketCapBucket",
+        "isActive",
+        "lastUpdated",
+    }
+)
 
-class TestStockUniverseSeederInitialization:
-    """Test StockUniverseSeeder initialization"""
 
-    @patch("boto3.resource")
-    def test_seeder_initialization(self, mock_boto3_resource):
-        """Test seeder initializes with DynamoDB table"""
-        from stock_universe_seed import StockUniverseSeeder
+def assert_required_fields(item):
+    """Assert a written stock item carries every field the API reads"""
+    missing = REQUIRED_ITEM_FIELDS - item.keys()
+    assert not missing, f"Missing required fields: {sorted(missing)}"
 
-        mock_table = Mock()
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
 
-        seeder = StockUniverseSeeder()
+class FakeTicker:
+    """yfinance Ticker stand-in whose info is a plain attribute"""
 
-        assert seeder.table is not None
-        assert "SP500" in seeder.fetchers
-        assert "RUSSELL3000" in seeder.fetchers
-        assert "JSE_ALSI" in seeder.fetchers
+    __slots__ = ("info",)
 
-    @patch("boto3.resource")
-    def test_seeder_uses_environment_variable(self, mock_boto3_resource):
-        """Test seeder uses STOCK_UNIVERSE_TABLE env var"""
-        from stock_universe_seed import StockUniverseSeeder
+    def __init__(self, info):
+        self.info = info
 
-        with patch.dict("os.environ", {"STOCK_UNIVERSE_TABLE": "test-table"}):
-            mock_table = Mock()
-            mock_dynamodb = Mock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto3_resource.return_value = mock_dynamodb
 
-            seeder = StockUniverseSeeder()
+class FakeTickers:
+    """yfinance Tickers stand-in built from a {symbol: info} mapping"""
 
-            mock_dynamodb.Table.assert_called_once_with("test-table")
+    __slots__ = ("tickers",)
 
+    def __init__(self, infos):
+        self.tickers = {symbol: FakeTicker(info) for symbol, info in infos.items()}
 
-class TestSeedSingleIndex:
-    """Test seeding a single index"""
 
-    @patch("boto3.resource")
-    @patch("stock_universe_seed.SP500Fetcher")
-    def test_seed_index_success(self, mock_fetcher_class, mock_boto3_resource):
-        """Test successful seeding of single index"""
-        from stock_universe_seed import StockUniverseSeeder
+class FixedDatetime(datetime):
+    """datetime whose utcnow() is pinned to 2024-01-01T00:00:00"""
 
-        # Mock fetcher
-        mock_fetcher = Mock()
-        mock_fetcher.fetch_constituents.return_value = [
-            {"symbol": "AAPL", "name": "Apple Inc.", "sector": "Technology"},
-            {"symbol": "MSFT", "name": "Microsoft", "sector": "Technology"},
-        ]
-        mock_fetcher_class.return_value = mock_fetcher
+    @classmethod
+    def utcnow(cls):
+        return cls(2024, 1, 1)
 
-        # Mock DynamoDB
-        mock_table = Mock()
-        mock_table.batch_writer.return_value.__enter__ = Mock(return_value=Mock())
-        mock_table.batch_writer.return_value.__exit__ = Mock(return_value=False)
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
 
-        seeder = StockUniverseSeeder()
-        result = seeder.seed_index("SP500", enrich=False)
+@pytest.fixture
+def seeder(patched_boto3):
+    """StockUniverseSeeder wired to the mocked DynamoDB table"""
+    return StockUniverseSeeder()
 
-        assert result["seeded"] == 2
-        assert result["failed"] == 0
-        assert result["total"] == 2
 
-    @patch("boto3.resource")
-    @patch("stock_universe_seed.SP500Fetcher")
-    def test_seed_index_no_stocks(self, mock_fetcher_class, mock_boto3_resource):
-        """Test seeding when no stocks fetched"""
-        from stock_universe_seed import StockUniverseSeeder
+@pytest.fixture(scope="module")
+def sp500_index_config():
+    """S&P 500 index config shared by the seeding tests; copy it to vary"""
+    return MappingProxyType(
+        {
+            "id": "SP500",
+            "region": "US",
+            "currency": "USD",
+            "exchange": "NASDAQ",
+            "marketCapThresholds": MappingProxyType(
+                {
+                    "mega": 200_000_000_000,
+                    "large": 10_000_000_000,
+                    "mid": 2_000_000_000,
+                }
+            ),
+        }
+    )
 
-        mock_fetcher = Mock()
-        mock_fetcher.fetch_constituents.return_value = []
-        mock_fetcher_class.return_value = mock_fetcher
 
-        mock_table = Mock()
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
+@pytest.fixture
+def frozen_utcnow(monkeypatch):
+    """Freeze the seeder's clock so timestamp fields can be asserted exactly"""
+    monkeypatch.setattr("stock_universe_seed.datetime", FixedDatetime)
+    return FixedDatetime.utcnow()
 
-        seeder = StockUniverseSeeder()
-        result = seeder.seed_index("SP500", enrich=False)
 
-        assert "error" in result
-        assert result["seeded"] == 0
+@pytest.fixture
+def mock_tickers_class(monkeypatch):
+    """Replace yfinance.Tickers, as seen by the seeder, with a Mock"""
+    tickers_class = Mock()
+    monkeypatch.setattr("stock_universe_seed.yf.Tickers", tickers_class)
+    return tickers_class
 
-    @patch("boto3.resource")
-    def test_seed_index_unknown_index(self, mock_boto3_resource):
-        """Test seeding unknown index returns error"""
-        from stock_universe_seed import StockUniverseSeeder
 
-        mock_table = Mock()
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
+@pytest.fixture
+def stock_universe_table(monkeypatch):
+    """
+    In-memory stock-universe table served by moto
 
-        seeder = StockUniverseSeeder()
-        result = seeder.seed_index("UNKNOWN_INDEX", enrich=False)
+    Unlike the Mock table, writes go through boto3's real BatchWriter and
+    DynamoDB serialization, so batching and type errors surface here.
+    """
+    moto = pytest.importorskip("moto")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.delenv("STOCK_UNIVERSE_TABLE", raising=False)
+
+    with moto.mock_aws():
+        yield boto3.resource("dynamodb").create_table(
+            TableName="stock-universe",
+            KeySchema=[{"AttributeName": "symbol", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "symbol", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+
+class TestStockUniverseSeederInitialization:
+    """Test StockUniverseSeeder initialization"""
+
+    def test_seeder_initialization(self, seeder):
+        """Test seeder initializes with DynamoDB table"""
+        assert seeder.table is not None
+        assert "SP500" in seeder.fetchers
+        assert "RUSSELL3000" in seeder.fetchers
+        assert "JSE_ALSI" in seeder.fetchers
 
-        assert "error" in result
-        assert "Unknown index" in result["error"]
+    def test_seeder_uses_environment_variable(
+        self, monkeypatch, patched_boto3, mock_dynamodb
+    ):
+        """Test seeder uses STOCK_UNIVERSE_TABLE env var"""
+        monkeypatch.setenv("STOCK_UNIVERSE_TABLE", "test-table")
+
+        StockUniverseSeeder()
+
+        mock_dynamodb.Table.assert_called_once_with("test-table")
+
+
+class TestSeedSingleIndex:
+    """Test seeding a single index"""
+
+    @pytest.mark.parametrize(
+        "index_id, stocks, expected, expected_error",
+        [
+            (
+                "SP500",
+                [
+                    {"symbol": "AAPL", "name": "Apple Inc.", "sector": "Technology"},
+                    {"symbol": "MSFT", "name": "Microsoft", "sector": "Technology"},
+                ],
+                {"seeded": 2, "failed": 0, "total": 2},
+                None,
+            ),
+            ("SP500", [], {"seeded": 0}, "No stocks fetched"),
+            ("UNKNOWN_INDEX", [], {}, "Unknown index"),
+        ],
+        ids=["success", "no_stocks", "unknown_index"],
+    )
+    @pytest.mark.usefixtures("mock_batch_writer")
+    def test_seed_index(self, seeder, index_id, stocks, expected, expected_error):
+        """Test seed_index results for seeded, empty and unknown indices"""
+        mock_fetcher = Mock()
+        mock_fetcher.fetch_constituents.return_value = stocks
+        seeder.fetchers["SP500"] = Mock(return_value=mock_fetcher)
+
+        result = seeder.seed_index(index_id, enrich=False)
+
+        assert expected.items() <= result.items()
+        if expected_error is None:
+            assert "error" not in result
+        else:
+            assert expected_error in result["error"]
 
 
 class TestEnrichStocks:
     """Test enriching stocks with market data"""
 
-    @patch("boto3.resource")
-    @patch("stock_universe_seed.yf.Tickers")
-    def test_enrich_stocks_success(self, mock_tickers_class, mock_boto3_resource):
+    def test_enrich_stocks_success(
+        self, mock_tickers_class, seeder, sp500_index_config
+    ):
         """Test successful enrichment with market data"""
-        from stock_universe_seed import StockUniverseSeeder
-
-        # Mock yfinance
-        mock_ticker = Mock()
-        mock_ticker.info = {
+        # Fake yfinance
+        aapl_info = {
             "marketCap": 3000000000000,
             "exchange": "NASDAQ",
             "country": "US",
             "industry": "Technology",
         }
-        mock_tickers = Mock()
-        mock_tickers.tickers = {"AAPL": mock_ticker}
-        mock_tickers_class.return_value = mock_tickers
+        mock_tickers_class.return_value = FakeTickers({"AAPL": aapl_info})
 
         # Mock fetcher for FX
         mock_fetcher = Mock()
         mock_fetcher.get_fx_rate.return_value = None
         mock_fetcher.apply_fx_conversion.return_value = 3000000000000
 
-        mock_table = Mock()
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
-        seeder = StockUniverseSeeder()
         stocks = [{"symbol": "AAPL", "name": "Apple"}]
-        index_config = {"currency": "USD", "exchange": "NASDAQ", "region": "US"}
 
-        market_data = seeder._enrich_stocks(stocks, index_config, mock_fetcher)
+        market_data = seeder._enrich_stocks(stocks, sp500_index_config, mock_fetcher)
 
         assert "AAPL" in market_data
         assert market_data["AAPL"]["marketCap"] == 3000000000000
         assert market_data["AAPL"]["exchange"] == "NASDAQ"
 
-    @patch("boto3.resource")
-    @patch("stock_universe_seed.yf.Tickers")
     def test_enrich_stocks_with_fx_conversion(
-        self, mock_tickers_class, mock_boto3_resource
+        self, mock_tickers_class, seeder, sp500_index_config
     ):
         """Test enrichment with FX conversion for non-USD"""
-        from stock_universe_seed import StockUniverseSeeder
-
-        # Mock yfinance
-        mock_ticker = Mock()
-        mock_ticker.info = {"marketCap": 500000000000}  # ZAR value
-        mock_tickers = Mock()
-        mock_tickers.tickers = {"AGL.JO": mock_ticker}
-        mock_tickers_class.return_value = mock_tickers
+        # Fake yfinance
+        agl_jo_info = {"marketCap": 500000000000}  # ZAR value
+        mock_tickers_class.return_value = FakeTickers({"AGL.JO": agl_jo_info})
 
         # Mock fetcher for FX conversion
         mock_fetcher = Mock()
         mock_fetcher.get_fx_rate.return_value = 18.5  # ZAR per USD
         mock_fetcher.apply_fx_conversion.return_value = 27027027027  # ~500B / 18.5
 
-        mock_table = Mock()
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
-        seeder = StockUniverseSeeder()
         stocks = [{"symbol": "AGL.JO", "name": "Anglo American"}]
-        index_config = {"currency": "ZAR", "exchange": "JSE", "region": "ZA"}
+        index_config = {
+            **sp500_index_config,
+            "currency": "ZAR",
+            "exchange": "JSE",
+            "region": "ZA",
+        }
 
         market_data = seeder._enrich_stocks(stocks, index_config, mock_fetcher)
 
         assert "AGL.JO" in market_data
         mock_fetcher.get_fx_rate.assert_called_once()
 
-    @patch("boto3.resource")
-    @patch("stock_universe_seed.yf.Tickers")
     def test_enrich_stocks_handles_errors(
-        self, mock_tickers_class, mock_boto3_resource
+        self, mock_tickers_class, seeder, sp500_index_config
     ):
         """Test enrichment handles individual stock errors"""
-        from stock_universe_seed import StockUniverseSeeder
-
         mock_tickers_class.side_effect = Exception("Network error")
 
         mock_fetcher = Mock()
 
-        mock_table = Mock()
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
-        seeder = StockUniverseSeeder()
         stocks = [{"symbol": "AAPL", "name": "Apple"}]
-        index_config = {"currency": "USD", "exchange": "NASDAQ", "region": "US"}
 
-        market_data = seeder._enrich_stocks(stocks, index_config, mock_fetcher)
+        market_data = seeder._enrich_stocks(stocks, sp500_index_config, mock_fetcher)
 
         # Should return empty or partial data, not crash
         assert isinstance(market_data, dict)
@@ -234,23 +269,8 @@ class TestEnrichStocks:
 class TestSeedToDatabase:
     """Test seeding to DynamoDB"""
 
-    @patch("boto3.resource")
-    def test_seed_to_database_success(self, mock_boto3_resource):
+    def test_seed_to_database_success(self, seeder, written_items, sp500_index_config):
         """Test successful batch write to DynamoDB"""
-        from stock_universe_seed import StockUniverseSeeder
-
-        mock_batch_writer = Mock()
-        mock_batch_writer.__enter__ = Mock(return_value=mock_batch_writer)
-        mock_batch_writer.__exit__ = Mock(return_value=False)
-
-        mock_table = Mock()
-        mock_table.batch_writer.return_value = mock_batch_writer
-
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
-        seeder = StockUniverseSeeder()
         stocks = [
             {
                 "symbol": "AAPL",
@@ -281,41 +301,16 @@ class TestSeedToDatabase:
                 "isActive": "true",
             },
         }
-        index_config = {
-            "id": "SP500",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NASDAQ",
-            "marketCapThresholds": {
-                "mega": 200000000000,
-                "large": 10000000000,
-                "mid": 2000000000,
-            },
-        }
 
-        result = seeder._seed_to_database(stocks, market_data, index_config)
+        result = seeder._seed_to_database(stocks, market_data, sp500_index_config)
 
-        assert result["seeded"] == 2
-        assert result["failed"] == 0
-        assert mock_batch_writer.put_item.call_count == 2
+        assert result == {"seeded": 2, "failed": 0, "total": 2}
+        assert [item["symbol"] for item in written_items] == ["AAPL", "MSFT"]
 
-    @patch("boto3.resource")
-    def test_market_cap_bucket_assignment(self, mock_boto3_resource):
+    def test_market_cap_bucket_assignment(
+        self, seeder, written_items, sp500_index_config
+    ):
         """Test market cap buckets are correctly assigned"""
-        from stock_universe_seed import StockUniverseSeeder
-
-        mock_batch_writer = Mock()
-        mock_batch_writer.__enter__ = Mock(return_value=mock_batch_writer)
-        mock_batch_writer.__exit__ = Mock(return_value=False)
-
-        mock_table = Mock()
-        mock_table.batch_writer.return_value = mock_batch_writer
-
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
-        seeder = StockUniverseSeeder()
         stocks = [
             {
                 "symbol": "MEGA",
@@ -344,47 +339,18 @@ class TestSeedToDatabase:
                 "isActive": "true",
             },  # < 2B = small
         }
-        index_config = {
-            "id": "SP500",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NYSE",
-            "marketCapThresholds": {
-                "mega": 200000000000,
-                "large": 10000000000,
-                "mid": 2000000000,
-            },
-        }
+        index_config = {**sp500_index_config, "exchange": "NYSE"}
 
         seeder._seed_to_database(stocks, market_data, index_config)
 
-        # Check that put_item was called with correct bucket
-        calls = mock_batch_writer.put_item.call_args_list
-        items = [call.kwargs["Item"] for call in calls]
+        # Check that each item was written with the correct bucket
+        items_by_symbol = {item["symbol"]: item for item in written_items}
 
-        mega_item = next(item for item in items if item["symbol"] == "MEGA")
-        small_item = next(item for item in items if item["symbol"] == "SMALL")
+        assert items_by_symbol["MEGA"]["marketCapBucket"] == "mega"
+        assert items_by_symbol["SMALL"]["marketCapBucket"] == "small"
 
-        assert mega_item["marketCapBucket"] == "mega"
-        assert small_item["marketCapBucket"] == "small"
-
-    @patch("boto3.resource")
-    def test_decimal_conversion(self, mock_boto3_resource):
+    def test_decimal_conversion(self, seeder, written_items, sp500_index_config):
         """Test numeric values are converted to Decimal"""
-        from stock_universe_seed import StockUniverseSeeder
-
-        mock_batch_writer = Mock()
-        mock_batch_writer.__enter__ = Mock(return_value=mock_batch_writer)
-        mock_batch_writer.__exit__ = Mock(return_value=False)
-
-        mock_table = Mock()
-        mock_table.batch_writer.return_value = mock_batch_writer
-
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
-        seeder = StockUniverseSeeder()
         stocks = [
             {
                 "symbol": "AAPL",
@@ -402,19 +368,13 @@ class TestSeedToDatabase:
                 "isActive": "true",
             }
         }
-        index_config = {
-            "id": "SP500",
-            "region": "US",
-            "currency": "USD",
-            "exchange": "NASDAQ",
-            "marketCapThresholds": {},
-        }
+        index_config = {**sp500_index_config, "marketCapThresholds": {}}
 
         seeder._seed_to_database(stocks, market_data, index_config)
 
-        call_args = mock_batch_writer.put_item.call_args
-        item = call_args.kwargs["Item"]
+        (item,) = written_items
 
+        assert_required_fields(item)
         assert isinstance(item["marketCap"], Decimal)
         assert isinstance(item["marketCapUSD"], Decimal)
 
@@ -422,148 +382,140 @@ class TestSeedToDatabase:
 class TestMergeIndexMemberships:
     """Test merging stocks that belong to multiple indices"""
 
-    @patch("boto3.resource")
-    def test_merge_overlapping_stocks(self, mock_boto3_resource):
-        """Test merging stocks in multiple indices"""
-        from stock_universe_seed import StockUniverseSeeder
-
-        mock_batch_writer = Mock()
-        mock_batch_writer.__enter__ = Mock(return_value=mock_batch_writer)
-        mock_batch_writer.__exit__ = Mock(return_value=False)
-
-        mock_table = Mock()
-        mock_table.scan.return_value = {
-            "Items": [
-                {"symbol": "AAPL", "name": "Apple", "indexIds": ["SP500"]},
-                {
-                    "symbol": "AAPL",
-                    "name": "Apple",
-                    "indexIds": ["RUSSELL3000"],
-                },  # Same stock, different index
-                {"symbol": "MSFT", "name": "Microsoft", "indexIds": ["SP500"]},
-            ]
-        }
-        mock_table.batch_writer.return_value = mock_batch_writer
-
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
+    @pytest.mark.parametrize(
+        "pages,expected_updates",
+        [
+            pytest.param(
+                [
+                    {
+                        "Items": [
+                            {"symbol": "AAPL", "name": "Apple", "indexIds": ["SP500"]},
+                            {
+                                "symbol": "AAPL",
+                                "name": "Apple",
+                                "indexIds": ["RUSSELL3000"],
+                            },
+                            {
+                                "symbol": "MSFT",
+                                "name": "Microsoft",
+                                "indexIds": ["SP500"],
+                            },
+                        ]
+                    }
+                ],
+                {"AAPL": ["RUSSELL3000", "SP500"]},
+                id="overlapping_stocks",
+            ),
+            pytest.param(
+                [
+                    {
+                        "Items": [
+                            {
+                                "symbol": "UNIQUE1",
+                                "name": "Unique 1",
+                                "indexIds": ["SP500"],
+                            },
+                            {
+                                "symbol": "UNIQUE2",
+                                "name": "Unique 2",
+                                "indexIds": ["RUSSELL3000"],
+                            },
+                        ]
+                    }
+                ],
+                {},
+                id="unique_stocks",
+            ),
+            pytest.param(
+                [
+                    {
+                        "Items": [
+                            {"symbol": "AAPL", "name": "Apple", "indexIds": ["SP500"]},
+                        ],
+                        "LastEvaluatedKey": {"symbol": "AAPL"},
+                    },
+                    {
+                        "Items": [
+                            {
+                                "symbol": "AAPL",
+                                "name": "Apple",
+                                "indexIds": ["RUSSELL3000"],
+                            },
+                            {
+                                "symbol": "MSFT",
+                                "name": "Microsoft",
+                                "indexIds": ["SP500"],
+                            },
+                        ]
+                    },
+                ],
+                {"AAPL": ["RUSSELL3000", "SP500"]},
+                id="overlap_across_pages",
+            ),
+        ],
+    )
+    def test_merge_index_memberships(
+        self, seeder, mock_table, written_items, pages, expected_updates
+    ):
+        """Test only stocks listed in several indices are rewritten, across scan pages"""
+        mock_table.scan.side_effect = pages
 
-        seeder = StockUniverseSeeder()
         seeder._merge_index_memberships()
 
-        # Should update AAPL with merged indexIds
-        calls = mock_batch_writer.put_item.call_args_list
-        assert len(calls) == 1  # Only AAPL should be updated (in both indices)
-
-        item = calls[0].kwargs["Item"]
-        assert "SP500" in item["indexIds"]
-        assert "RUSSELL3000" in item["indexIds"]
-
-    @patch("boto3.resource")
-    def test_no_merge_for_unique_stocks(self, mock_boto3_resource):
-        """Test stocks unique to one index are not updated"""
-        from stock_universe_seed import StockUniverseSeeder
-
-        mock_batch_writer = Mock()
-        mock_batch_writer.__enter__ = Mock(return_value=mock_batch_writer)
-        mock_batch_writer.__exit__ = Mock(return_value=False)
-
-        mock_table = Mock()
-        mock_table.scan.return_value = {
-            "Items": [
-                {"symbol": "UNIQUE1", "name": "Unique 1", "indexIds": ["SP500"]},
-                {"symbol": "UNIQUE2", "name": "Unique 2", "indexIds": ["RUSSELL3000"]},
-            ]
-        }
-        mock_table.batch_writer.return_value = mock_batch_writer
-
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
-        seeder = StockUniverseSeeder()
-        seeder._merge_index_memberships()
+        assert mock_table.scan.call_count == len(pages)
+        for page, scan_call in zip(pages, mock_table.scan.call_args_list[1:]):
+            assert scan_call.kwargs["ExclusiveStartKey"] == page["LastEvaluatedKey"]
 
-        # No updates needed - no stocks in multiple indices
-        mock_batch_writer.put_item.assert_not_called()
+        updated = {item["symbol"]: sorted(item["indexIds"]) for item in written_items}
+        assert updated == expected_updates
+        assert len(written_items) == len(expected_updates)
 
 
 class TestSeedAllIndices:
     """Test seeding all indices"""
 
-    @patch("boto3.resource")
-    @patch("stock_universe_seed.SP500Fetcher")
-    @patch("stock_universe_seed.Russell3000Fetcher")
-    @patch("stock_universe_seed.JSEFetcher")
-    def test_seed_all_indices(
-        self,
-        mock_jse_fetcher,
-        mock_russell_fetcher,
-        mock_sp500_fetcher,
-        mock_boto3_resource,
-    ):
+    @pytest.mark.usefixtures("mock_batch_writer")
+    def test_seed_all_indices(self, seeder, mock_table):
         """Test seeding all configured indices"""
-        from stock_universe_seed import StockUniverseSeeder
-
         # Mock SP500 fetcher
         mock_sp500 = Mock()
         mock_sp500.fetch_constituents.return_value = [
             {"symbol": "AAPL", "name": "Apple", "sector": "Tech"},
         ]
-        mock_sp500_fetcher.return_value = mock_sp500
+        seeder.fetchers["SP500"] = Mock(return_value=mock_sp500)
 
         # Mock Russell fetcher
         mock_russell = Mock()
         mock_russell.fetch_constituents.return_value = [
             {"symbol": "MSFT", "name": "Microsoft", "sector": "Tech"},
         ]
-        mock_russell_fetcher.return_value = mock_russell
+        seeder.fetchers["RUSSELL3000"] = Mock(return_value=mock_russell)
 
         # Mock JSE fetcher
         mock_jse = Mock()
         mock_jse.fetch_constituents.return_value = [
             {"symbol": "AGL.JO", "name": "Anglo", "sector": "Materials"},
         ]
-        mock_jse_fetcher.return_value = mock_jse
-
-        mock_batch_writer = Mock()
-        mock_batch_writer.__enter__ = Mock(return_value=mock_batch_writer)
-        mock_batch_writer.__exit__ = Mock(return_value=False)
+        seeder.fetchers["JSE_ALSI"] = Mock(return_value=mock_jse)
 
-        mock_table = Mock()
         mock_table.scan.return_value = {"Items": []}
-        mock_table.batch_writer.return_value = mock_batch_writer
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
-        seeder = StockUniverseSeeder()
         results = seeder.seed_all_indices(enrich=False)
 
-        # Should have results for all three indices
-        assert "SP500" in results
-        assert "RUSSELL3000" in results
-        assert "JSE_ALSI" in results
-
-        # Each should be seeded successfully
-        for index_id, result in results.items():
-            assert result["seeded"] >= 1
+        # Each index should be seeded successfully
+        assert results == {
+            index_id: {"seeded": 1, "failed": 0, "total": 1}
+            for index_id in ("SP500", "RUSSELL3000", "JSE_ALSI")
+        }
 
 
 class TestE2EWorkflow:
     """End-to-end integration tests"""
 
-    @patch("boto3.resource")
-    @patch("stock_universe_seed.yf.Tickers")
-    @patch("stock_universe_seed.SP500Fetcher")
     def test_complete_seeding_workflow(
-        self, mock_fetcher_class, mock_tickers_class, mock_boto3_resource
+        self, mock_tickers_class, seeder, mock_table, written_items, frozen_utcnow
     ):
         """Test complete seeding workflow with enrichment"""
-        from stock_universe_seed import StockUniverseSeeder
-
         # Mock fetcher returns stocks
         mock_fetcher = Mock()
         mock_fetcher.fetch_constituents.return_value = [
@@ -576,43 +528,28 @@ class TestE2EWorkflow:
         ]
         mock_fetcher.get_fx_rate.return_value = None
         mock_fetcher.apply_fx_conversion.return_value = 3000000000000
-        mock_fetcher_class.return_value = mock_fetcher
+        seeder.fetchers["SP500"] = Mock(return_value=mock_fetcher)
 
-        # Mock yfinance returns market data
-        mock_ticker = Mock()
-        mock_ticker.info = {
+        # Fake yfinance returns market data
+        aapl_info = {
             "marketCap": 3000000000000,
             "exchange": "NASDAQ",
             "country": "US",
             "industry": "Consumer Electronics",
         }
-        mock_tickers = Mock()
-        mock_tickers.tickers = {"AAPL": mock_ticker}
-        mock_tickers_class.return_value = mock_tickers
+        mock_tickers_class.return_value = FakeTickers({"AAPL": aapl_info})
 
         # Mock DynamoDB
-        mock_batch_writer = Mock()
-        mock_batch_writer.__enter__ = Mock(return_value=mock_batch_writer)
-        mock_batch_writer.__exit__ = Mock(return_value=False)
-
-        mock_table = Mock()
         mock_table.scan.return_value = {"Items": []}
-        mock_table.batch_writer.return_value = mock_batch_writer
-
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
 
-        seeder = StockUniverseSeeder()
         result = seeder.seed_index("SP500", enrich=True)
 
-        assert result["seeded"] == 1
-        assert result["failed"] == 0
+        assert result == {"seeded": 1, "failed": 0, "total": 1}
 
         # Verify the item written has all expected fields
-        call_args = mock_batch_writer.put_item.call_args
-        item = call_args.kwargs["Item"]
+        (item,) = written_items
 
+        assert_required_fields(item)
         assert item["symbol"] == "AAPL"
         assert item["name"] == "Apple Inc."
         assert item["sector"] == "Technology"
@@ -623,73 +560,33 @@ class TestE2EWorkflow:
         assert item["exchange"] == "NASDAQ"
         assert item["marketCapBucket"] == "mega"  # 3T > 200B threshold
         assert item["isActive"] == "true"
-        assert "lastUpdated" in item
-        assert "lastValidated" in item
+        assert item["lastUpdated"] == "2024-01-01T00:00:00"
+        assert item["lastValidated"] == "2024-01-01T00:00:00"
 
-    @patch("boto3.resource")
-    @patch("stock_universe_seed.SP500Fetcher")
-    def test_partial_failure_handling(self, mock_fetcher_class, mock_boto3_resource):
+    def test_partial_failure_handling(self, seeder, mock_batch_writer):
         """Test handling of partial failures during seeding"""
-        from stock_universe_seed import StockUniverseSeeder
-
         mock_fetcher = Mock()
         mock_fetcher.fetch_constituents.return_value = [
             {"symbol": "AAPL", "name": "Apple", "sector": "Tech"},
             {"symbol": "MSFT", "name": "Microsoft", "sector": "Tech"},
         ]
-        mock_fetcher_class.return_value = mock_fetcher
-
-        # Mock batch writer that fails on second item
-        mock_batch_writer = Mock()
-        mock_batch_writer.__enter__ = Mock(return_value=mock_batch_writer)
-        mock_batch_writer.__exit__ = Mock(return_value=False)
-
-        call_count = 0
-
-        def side_effect(*args, **kwargs):
-            nonlocal call_count
-            call_count += 1
-            if call_count == 2:
-                raise Exception("Database error")
-
-        mock_batch_writer.put_item = Mock(side_effect=side_effect)
+        seeder.fetchers["SP500"] = Mock(return_value=mock_fetcher)
 
-        mock_table = Mock()
-        mock_table.batch_writer.return_value = mock_batch_writer
+        # Batch writer that fails on the second item
+        mock_batch_writer.put_item.side_effect = [None, Exception("Database error")]
 
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
-        seeder = StockUniverseSeeder()
         result = seeder.seed_index("SP500", enrich=False)
 
         # Should report 1 success and 1 failure
-        assert result["seeded"] == 1
-        assert result["failed"] == 1
-        assert result["total"] == 2
+        assert result == {"seeded": 1, "failed": 1, "total": 2}
+        assert mock_batch_writer.put_item.call_count == 2
 
 
 class TestDataValidation:
     """Test data validation during seeding"""
 
-    @patch("boto3.resource")
-    def test_stock_has_required_fields(self, mock_boto3_resource):
+    def test_stock_has_required_fields(self, seeder, written_items, sp500_index_config):
         """Test that seeded stocks have all required fields"""
-        from stock_universe_seed import StockUniverseSeeder
-
-        mock_batch_writer = Mock()
-        mock_batch_writer.__enter__ = Mock(return_value=mock_batch_writer)
-        mock_batch_writer.__exit__ = Mock(return_value=False)
-
-        mock_table = Mock()
-        mock_table.batch_writer.return_value = mock_batch_writer
-
-        mock_dynamodb = Mock()
-        mock_dynamodb.Table.return_value = mock_table
-        mock_boto3_resource.return_value = mock_dynamodb
-
-        seeder = StockUniverseSeeder()
         stocks = [
             {
                 "symbol": "TEST",
@@ -708,36 +605,80 @@ class TestDataValidation:
             }
         }
         index_config = {
-            "id": "SP500",
-            "region": "US",
-            "currency": "USD",
+            **sp500_index_config,
             "exchange": "NYSE",
             "marketCapThresholds": {},
         }
 
         seeder._seed_to_database(stocks, market_data, index_config)
 
-        call_args = mock_batch_writer.put_item.call_args
-        item = call_args.kwargs["Item"]
-
-        required_fields = [
-            "symbol",
-            "name",
-            "sector",
-            "region",
-            "currency",
-            "exchange",
-            "indexId",
-            "indexIds",
-            "marketCap",
-            "marketCapUSD",
-            "marketCapBucket",
-            "isActive",
-            "lastUpdated",
+        (item,) = written_items
+
+        assert_required_fields(item)
+
+
+# Importing moto and starting its backend takes longer than the suite's 2s cap
+@pytest.mark.timeout(10)
+class TestSeedToDynamoDB:
+    """Seed against a moto-backed table instead of Mock scaffolding"""
+
+    def test_seed_to_database_spans_multiple_batches(
+        self, stock_universe_table, sp500_index_config
+    ):
+        """Test more than one 25-item BatchWriteItem worth of stocks is stored"""
+        stocks = [
+            {
+                "symbol": f"SYM{i:03d}",
+                "name": f"Company {i}",
+                "sector": "Tech",
+                "indexId": "SP500",
+                "indexIds": ["SP500"],
+            }
+            for i in range(60)
+        ]
+        market_data = {
+            stock["symbol"]: {
+                "marketCap": 5000000000.5,
+                "marketCapUSD": 5000000000.5,
+                "exchange": "NYSE",
+                "isActive": "true",
+            }
+            for stock in stocks
+        }
+        index_config = {
+            **sp500_index_config,
+            "exchange": "NYSE",
+            "marketCapThresholds": {},
+        }
+
+        seeder = StockUniverseSeeder()
+        result = seeder._seed_to_database(stocks, market_data, index_config)
+
+        assert result == {"seeded": 60, "failed": 0, "total": 60}
+
+        items = stock_universe_table.scan()["Items"]
+        for item in items:
+            assert_required_fields(item)
+        assert {item["symbol"] for item in items} == {s["symbol"] for s in stocks}
+        assert {item["marketCapBucket"] for item in items} == {"mid"}
+        assert {item["marketCapUSD"] for item in items} == {Decimal("5000000000.5")}
+
+    def test_seed_index_round_trip(self, stock_universe_table):
+        """Test seed_index writes items that read back with their index"""
+        mock_fetcher = Mock()
+        mock_fetcher.fetch_constituents.return_value = [
+            {"symbol": "AAPL", "name": "Apple Inc.", "sector": "Technology"},
         ]
+        seeder = StockUniverseSeeder()
+        seeder.fetchers["SP500"] = Mock(return_value=mock_fetcher)
+
+        result = seeder.seed_index("SP500", enrich=False)
 
-        for field in required_fields:
-            assert field in item, f"Missing required field: {field}"
+        assert result == {"seeded": 1, "failed": 0, "total": 1}
+        item = stock_universe_table.get_item(Key={"symbol": "AAPL"})["Item"]
+        assert_required_fields(item)
+        assert item["indexIds"] == ["SP500"]
+        assert item["nameLower"] == "apple inc."
 
 
 if __name__ == "__main__":